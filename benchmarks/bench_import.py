@@ -0,0 +1,85 @@
+"""Benchmark for the time it takes to import clubs in a fresh interpreter,
+which is paid by every spawned worker process"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List
+
+HEAVY_MODULES = ["clubs.render", "flask", "flask_socketio", "gevent"]
+
+
+def time_import(statement: str, repeats: int) -> List[float]:
+    """Times a statement in fresh interpreters
+
+    Parameters
+    ----------
+    statement : str
+        python statement to time, e.g. "import clubs"
+    repeats : int
+        number of interpreters to start
+
+    Returns
+    -------
+    List[float]
+        import time in seconds per run
+    """
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(time.perf_counter() - start)"
+    )
+    times = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", code], check=True, capture_output=True, text=True
+        ).stdout
+        times.append(float(output))
+    return times
+
+
+def loaded_modules(statement: str) -> List[str]:
+    """Returns which heavy modules are loaded after running a statement
+
+    Parameters
+    ----------
+    statement : str
+        python statement to run, e.g. "import clubs"
+
+    Returns
+    -------
+    List[str]
+        loaded heavy modules
+    """
+    code = (
+        "import sys\n"
+        f"{statement}\n"
+        f"print(' '.join(name for name in {HEAVY_MODULES} if name in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return output.split()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    statements = [
+        "import clubs",
+        "import clubs; clubs.Dealer(**clubs.configs.LEDUC_TWO_PLAYER)",
+        "import clubs.render",
+    ]
+    for statement in statements:
+        times = time_import(statement, args.repeats)
+        print(statement)
+        print(f"  median: {statistics.median(times) * 1000:.2f}ms")
+        print(f"  min: {min(times) * 1000:.2f}ms")
+        print(f"  loaded: {', '.join(loaded_modules(statement)) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark for the cost of Dealer.step for different numbers of
+players. Every player calls until the end of the hand. The last step of
+a hand evaluates the showdown and is timed separately.
+
+Run from the repository root with: python -m benchmarks.bench_step"""
+import argparse
+import time
+from typing import Dict
+
+import clubs
+
+
+def time_step(num_players: int, num_hands: int) -> Dict[str, float]:
+    """Times Dealer.reset and Dealer.step on a no limit hold'em table
+
+    Parameters
+    ----------
+    num_players : int
+        number of players at the table
+    num_hands : int
+        number of hands to play
+
+    Returns
+    -------
+    Dict[str, float]
+        average time per reset, per step during the hand and per final
+        step in microseconds
+    """
+    config = clubs.configs.NO_LIMIT_HOLDEM_NINE_PLAYER.copy()
+    config["num_players"] = num_players
+    config["blinds"] = [1, 2] + [0] * (num_players - 2)
+    config["antes"] = 0
+    dealer = clubs.Dealer(**config)
+
+    reset_time = step_time = showdown_time = 0.0
+    num_steps = 0
+    for _ in range(num_hands):
+        start = time.perf_counter()
+        obs = dealer.reset(reset_stacks=True)
+        reset_time += time.perf_counter() - start
+        while True:
+            start = time.perf_counter()
+            obs, _, done = dealer.step(obs["call"])
+            end = time.perf_counter()
+            if all(done):
+                showdown_time += end - start
+                break
+            step_time += end - start
+            num_steps += 1
+    return {
+        "reset": reset_time / num_hands * 1e6,
+        "step": step_time / num_steps * 1e6,
+        "showdown": showdown_time / num_hands * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hands", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'players':>8} {'reset (us)':>12} {'step (us)':>12} {'showdown (us)':>14}")
+    for num_players in range(2, 10):
+        times = time_step(num_players, args.hands)
+        print(
+            f"{num_players:>8} {times['reset']:>12.2f} {times['step']:>12.2f} "
+            f"{times['showdown']:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""Benchmark suite covering hand evaluation, lookup table construction,
+dealing, equity computation, render encoding and import time.
+
+Every benchmark is timed in several repeats and the median and minimum
+time per operation are written to a json file, which can be compared
+against the results of a previous run to catch regressions.
+
+Run from the repository root with:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --filter evaluate --compare results.json
+"""
+import argparse
+import fnmatch
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, cast
+
+import clubs
+from clubs.render import graphic
+
+from . import bench_import
+
+# a benchmark is a setup function which returns the operation to time
+Benchmark = Callable[[], Callable[[], object]]
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+# operations of these benchmarks measure themselves and return seconds
+MEASURED: Set[str] = set()
+
+CONFIGS: Dict[str, clubs.configs.PokerConfig] = {
+    name.lower(): getattr(clubs.configs, name)
+    for name in dir(clubs.configs)
+    if name.isupper()
+}
+
+
+def benchmark(name: str, measured: bool = False) -> Callable[[Benchmark], Benchmark]:
+    """Registers a benchmark setup function
+
+    Parameters
+    ----------
+    name : str
+        unique benchmark name, dots separate groups
+    measured : bool, optional
+        the operation measures itself and returns its time in seconds,
+        which is reported instead of the time of the call, by default
+        False
+
+    Returns
+    -------
+    Callable[[Benchmark], Benchmark]
+        decorator
+    """
+
+    def register(setup: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = setup
+        if measured:
+            MEASURED.add(name)
+        return setup
+
+    return register
+
+
+def _deals(
+    config: clubs.configs.PokerConfig, num_deals: int
+) -> List[Tuple[List[clubs.Card], List[clubs.Card]]]:
+    # hole cards and full boards from freshly shuffled decks, drawn
+    # outside of the timed operation
+    deck = clubs.Deck(config["num_suits"], config["num_ranks"])
+    num_community_cards = config["num_community_cards"]
+    if isinstance(num_community_cards, int):
+        num_community_cards = [num_community_cards] * config["num_streets"]
+    deals = []
+    for _ in range(num_deals):
+        deck.shuffle()
+        deals.append(
+            (deck.draw(config["num_hole_cards"]), deck.draw(sum(num_community_cards)))
+        )
+    return deals
+
+
+def _play(dealer: clubs.Dealer) -> None:
+    # plays a hand where every player calls, with an occasional raise
+    obs = dealer.reset(reset_stacks=True)
+    done = [False]
+    while not all(done):
+        bet = obs["min_raise"] if random.random() < 0.1 else obs["call"]
+        obs, _, done = dealer.step(bet)
+
+
+def _register_config_benchmarks(name: str, config: clubs.configs.PokerConfig) -> None:
+    @benchmark(f"evaluate.{name}")
+    def evaluate() -> Callable[[], object]:
+        evaluator = clubs.Dealer.from_config(config).evaluator
+        deals = itertools.cycle(_deals(config, 1000))
+
+        def run() -> object:
+            hole_cards, community_cards = next(deals)
+            return evaluator.evaluate(hole_cards, community_cards)
+
+        return run
+
+    @benchmark(f"lookup_table.{name}")
+    def lookup_table() -> Callable[[], object]:
+        def run() -> object:
+            return clubs.LookupTable(
+                config["num_suits"],
+                config["num_ranks"],
+                config["num_cards_for_hand"],
+                low_end_straight=config["low_end_straight"],
+                order=config["order"],
+            )
+
+        return run
+
+    @benchmark(f"dealer.hand.{name}")
+    def hand() -> Callable[[], object]:
+        random.seed(0)
+        dealer = clubs.Dealer.from_config(config)
+        return lambda: _play(dealer)
+
+    @benchmark(f"dealer.reset.{name}")
+    def reset() -> Callable[[], object]:
+        dealer = clubs.Dealer.from_config(config)
+        return lambda: dealer.reset(reset_stacks=True)
+
+
+for _name, _config in CONFIGS.items():
+    _register_config_benchmarks(_name, _config)
+
+
+def _register_win_probability_benchmark(
+    name: str, config: clubs.configs.PokerConfig, street: int
+) -> None:
+    @benchmark(f"win_probabilities.{name}.street_{street}")
+    def win_probabilities() -> Callable[[], object]:
+        random.seed(0)
+        dealer = clubs.Dealer.from_config(config)
+        obs = dealer.reset(reset_stacks=True)
+        while dealer.street < street:
+            obs, _, _ = dealer.step(obs["call"])
+        return dealer.win_probabilities
+
+
+# preflop equities of hold'em enumerate millions of boards, leduc
+# covers the preflop street
+for _street in range(2):
+    _register_win_probability_benchmark(
+        "leduc_two_player", clubs.configs.LEDUC_TWO_PLAYER, _street
+    )
+for _street in range(1, 4):
+    _register_win_probability_benchmark(
+        "no_limit_holdem_two_player", clubs.configs.NO_LIMIT_HOLDEM_TWO_PLAYER, _street
+    )
+
+
+def _render_dealer() -> clubs.Dealer:
+    random.seed(0)
+    dealer = clubs.Dealer(**clubs.configs.NO_LIMIT_HOLDEM_NINE_PLAYER)
+    obs = dealer.reset()
+    while dealer.street < 2:
+        obs, _, _ = dealer.step(obs["call"])
+    return dealer
+
+
+@benchmark("render.ascii")
+def render_ascii() -> Callable[[], object]:
+    dealer = _render_dealer()
+    return lambda: str(dealer)
+
+
+@benchmark("render.json")
+def render_json() -> Callable[[], object]:
+    dealer = _render_dealer()
+    return lambda: json.dumps(graphic._jsonify(dealer._render_config()))
+
+
+@benchmark("import.clubs", measured=True)
+def import_clubs() -> Callable[[], object]:
+    # the interpreter start up is not part of the import time
+    return lambda: bench_import.time_import("import clubs", 1)[0]
+
+
+def _time(operation: Callable[[], object], number: int, measured: bool) -> float:
+    if measured:
+        return sum(cast(float, operation()) for _ in range(number))
+    start = time.perf_counter()
+    for _ in range(number):
+        operation()
+    return time.perf_counter() - start
+
+
+def time_benchmark(
+    setup: Benchmark, repeats: int, min_time: float, measured: bool = False
+) -> Dict[str, Any]:
+    """Times a benchmark. The number of operations per repeat is
+    calibrated so that every repeat takes at least min_time seconds.
+
+    Parameters
+    ----------
+    setup : Benchmark
+        benchmark setup function
+    repeats : int
+        number of repeats
+    min_time : float
+        minimum time per repeat in seconds
+    measured : bool, optional
+        use the seconds returned by the operation instead of timing the
+        call, by default False
+
+    Returns
+    -------
+    Dict[str, Any]
+        median and minimum seconds per operation, repeats and number of
+        operations per repeat
+    """
+    operation = setup()
+    number = 1
+    while True:
+        elapsed = _time(operation, number, measured)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(2, int(min_time / elapsed * 1.2))
+    times = [elapsed / number]
+    for _ in range(repeats - 1):
+        times.append(_time(operation, number, measured) / number)
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "repeats": repeats,
+        "number": number,
+    }
+
+
+def run(pattern: str = "*", repeats: int = 5, min_time: float = 0.1) -> Dict[str, Any]:
+    """Runs all benchmarks matching a pattern
+
+    Parameters
+    ----------
+    pattern : str, optional
+        glob pattern of benchmark names, by default "*"
+    repeats : int, optional
+        number of repeats per benchmark, by default 5
+    min_time : float, optional
+        minimum time per repeat in seconds, by default 0.1
+
+    Returns
+    -------
+    Dict[str, Any]
+        machine info and results per benchmark
+    """
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        results[name] = time_benchmark(setup, repeats, min_time, name in MEASURED)
+        print(
+            f"{name:<60} {results[name]['median'] * 1e6:>14.2f}us",
+            file=sys.stderr,
+        )
+    return {"machine": _machine(), "results": results}
+
+
+def _machine() -> Dict[str, Optional[str]]:
+    try:
+        commit: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "clubs": clubs.__version__,
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1
+) -> List[str]:
+    """Compares benchmark results against a baseline
+
+    Parameters
+    ----------
+    baseline : Dict[str, Any]
+        results of a previous run
+    current : Dict[str, Any]
+        results of the current run
+    threshold : float, optional
+        relative slowdown of the median which counts as regression, by
+        default 0.1
+
+    Returns
+    -------
+    List[str]
+        names of regressed benchmarks
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        ratio = result["median"] / baseline["results"][name]["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif ratio < 1 - threshold:
+            flag = "  improved"
+        print(f"{name:<60} {ratio:>8.2f}x{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--filter", default="*", help="glob of benchmark names")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1)
+    parser.add_argument("--output", help="json file to write results to")
+    parser.add_argument("--compare", help="json file of baseline results")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--list", action="store_true", help="list benchmarks")
+    args = parser.parse_args()
+
+    if args.list:
+        print(
+            "\n".join(name for name in BENCHMARKS if fnmatch.fnmatch(name, args.filter))
+        )
+        return
+
+    results = run(args.filter, args.repeats, args.min_time)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+import importlib
+from typing import Any
+
 __version__ = "0.1.4"
 __author__ = "Ferdinand Schlatt"
 __license__ = "GPL-3.0"
@@ -20,9 +23,18 @@ except NameError:
 if __CLUBS_SETUP__:
     pass  # pragma: no cover
 else:
-    from . import configs, poker, render
+    from . import configs, poker
     from .poker import Card, Dealer, Deck, Evaluator, LookupTable
 
+
+def __getattr__(name: str) -> Any:
+    # the render package is only imported on first access so importing
+    # clubs (e.g. in worker processes) doesn't pay for rendering dependencies
+    if name == "render":
+        return importlib.import_module(".render", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "configs",
     "poker",
@@ -34,6 +34,14 @@ class TableResetError(Exception):
     pass
 
 
+class EmptyUndoStackError(Exception):
+    pass
+
+
+class GameTreeSizeError(Exception):
+    pass
+
+
 class InvalidRenderModeError(Exception):
     pass
 
@@ -44,3 +52,31 @@ class RenderInitializationError(Exception):
 
 class MissingImportsError(Exception):
     pass
+
+
+class InvalidPolicyError(Exception):
+    pass
+
+
+class InvalidCompressionError(Exception):
+    pass
+
+
+class InvalidHistoryError(Exception):
+    pass
+
+
+class ReplayMismatchError(Exception):
+    pass
+
+
+class InvalidFormatError(Exception):
+    pass
+
+
+class InvalidSeatError(Exception):
+    pass
+
+
+class ViewerClosedError(Exception):
+    pass
@@ -0,0 +1,188 @@
+"""Batched policy inference across many tables.
+
+Every table runs as a coroutine which awaits the action of its acting
+player. The scheduler collects the pending observations of all tables
+and calls the policy once per batch, so a neural network evaluates many
+decision points in a single forward pass. A batch is evaluated as soon
+as it holds max_batch_size observations, every table it runs is waiting
+or the oldest observation has waited max_latency seconds.
+"""
+import asyncio
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from clubs import error
+
+from . import engine
+
+BatchPolicy = Callable[[List[engine.ObservationDict]], Sequence[float]]
+
+
+class BatchScheduler:
+    """Collects observations of many tables into batches for a policy
+
+    Parameters
+    ----------
+    policy : BatchPolicy
+        called with a list of observations, returns a bet for every
+        observation
+    max_batch_size : int, optional
+        maximum number of observations per policy call, by default 256
+    max_latency : float, optional
+        maximum seconds an observation waits for a batch to fill, by
+        default 0.005
+
+    Examples
+    --------
+
+    >>> def policy(observations):
+    ...     features = np.stack([encode(obs) for obs in observations])
+    ...     return decode(model(features))
+    >>> scheduler = BatchScheduler(policy, max_batch_size=512)
+    >>> dealers = [
+    ...     Dealer.from_config(configs.NO_LIMIT_HOLDEM_SIX_PLAYER) for _ in range(1024)
+    ... ]
+    >>> payouts = scheduler.run(dealers, num_hands=100)
+    >>> scheduler.mean_batch_size
+    """
+
+    def __init__(
+        self, policy: BatchPolicy, max_batch_size: int = 256, max_latency: float = 0.005
+    ) -> None:
+        if max_batch_size < 1:
+            raise error.InvalidConfigError(
+                f"max batch size must be positive, got {max_batch_size}"
+            )
+        self.policy = policy
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.num_batches = 0
+        self.num_observations = 0
+
+        self._pending: List[Tuple[engine.ObservationDict, "asyncio.Future[float]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # number of tables played by run, a batch is complete when all
+        # of them are waiting
+        self._num_tables: Optional[int] = None
+
+    @property
+    def mean_batch_size(self) -> float:
+        """Average number of observations per policy call
+
+        Returns
+        -------
+        float
+            mean batch size
+        """
+        if not self.num_batches:
+            return 0.0
+        return self.num_observations / self.num_batches
+
+    async def act(self, observation: engine.ObservationDict) -> float:
+        """Waits for the policy's bet for an observation
+
+        Parameters
+        ----------
+        observation : engine.ObservationDict
+            observation of the acting player
+
+        Returns
+        -------
+        float
+            bet
+        """
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[float]" = loop.create_future()
+        self._pending.append((observation, future))
+        if len(self._pending) >= self.max_batch_size or (
+            self._num_tables is not None and len(self._pending) >= self._num_tables
+        ):
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_latency, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Calls the policy with all pending observations and sends the
+        bets to the waiting tables"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            bets = self.policy([observation for observation, _ in pending])
+            if len(bets) != len(pending):
+                raise error.InvalidPolicyError(
+                    f"policy returned {len(bets)} bets for {len(pending)} "
+                    "observations"
+                )
+        except Exception as exception:
+            for _, future in pending:
+                future.set_exception(exception)
+            return
+        self.num_batches += 1
+        self.num_observations += len(pending)
+        for (_, future), bet in zip(pending, bets):
+            future.set_result(bet)
+
+    async def _play(
+        self,
+        dealer: engine.Dealer,
+        num_hands: int,
+        reset_stacks: bool,
+        payouts: List[List[float]],
+    ) -> None:
+        try:
+            for _ in range(num_hands):
+                obs = dealer.reset(reset_stacks=reset_stacks)
+                done = [False]
+                while not all(done):
+                    obs, hand_payouts, done = dealer.step(await self.act(obs))
+                payouts.append(hand_payouts)
+        finally:
+            assert self._num_tables is not None
+            self._num_tables -= 1
+            # the remaining tables may all be waiting already
+            if self._pending and len(self._pending) >= self._num_tables:
+                self.flush()
+
+    def run(
+        self,
+        dealers: Sequence[engine.Dealer],
+        num_hands: int,
+        reset_stacks: bool = True,
+    ) -> List[List[List[float]]]:
+        """Plays hands on many dealers with the policy acting for every
+        player
+
+        Parameters
+        ----------
+        dealers : Sequence[engine.Dealer]
+            dealers to play on
+        num_hands : int
+            number of hands per dealer
+        reset_stacks : bool, optional
+            reset stacks before every hand, by default True
+
+        Returns
+        -------
+        List[List[List[float]]]
+            payouts of every hand of every dealer
+        """
+        payouts: List[List[List[float]]] = [[] for _ in dealers]
+
+        async def play() -> None:
+            self._num_tables = len(dealers)
+            await asyncio.gather(
+                *(
+                    self._play(dealer, num_hands, reset_stacks, dealer_payouts)
+                    for dealer, dealer_payouts in zip(dealers, payouts)
+                )
+            )
+
+        try:
+            asyncio.run(play())
+        finally:
+            self._num_tables = None
+        return payouts
@@ -1,7 +1,7 @@
 """Classes and functions to create and manipulate cards and lists of
 cards from a standard 52 card poker deck"""
 import random
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 
 from clubs import error
 
@@ -160,9 +160,17 @@ class Deck:
         for rank in ranks:
             for suit in suits:
                 self.full_deck.append(Card(rank + suit))
+        self._full_deck_idcs = {
+            card._int: idx for idx, card in enumerate(self.full_deck)
+        }
         self._tricked = False
         self._top_idcs: List[int] = []
         self._bottom_idcs: List[int] = []
+        # cards are never removed from the shuffled order, drawing only
+        # advances the cursor. shuffle always creates a new order list,
+        # so snapshots can keep a reference to the order without copying
+        self._order: List[Card] = []
+        self._cursor = 0
         self.shuffle()
 
     def __str__(self) -> str:
@@ -181,7 +189,23 @@ class Deck:
         int
             number of remaining cards
         """
-        return len(self.cards)
+        return len(self._order) - self._cursor
+
+    @property
+    def cards(self) -> List[Card]:
+        """Remaining cards in the deck, top card first
+
+        Returns
+        -------
+        List[Card]
+            remaining cards
+        """
+        return self._order[self._cursor :]  # noqa: E203
+
+    @cards.setter
+    def cards(self, cards: List[Card]) -> None:
+        self._order = list(cards)
+        self._cursor = 0
 
     def draw(self, n: int = 1) -> List[Card]:
         """Draws cards from the top of the deck. If the number of cards
@@ -198,12 +222,8 @@ class Deck:
         List[Card]
             cards drawn from the deck
         """
-        cards = []
-        for _ in range(n):
-            if self.cards:
-                cards.append(self.cards.pop(0))
-            else:
-                break
+        cards = self._order[self._cursor : self._cursor + n]  # noqa: E203
+        self._cursor += len(cards)
         return cards
 
     def shuffle(self) -> "Deck":
@@ -215,14 +235,64 @@ class Deck:
         Deck
             self
         """
-        self.cards = list(self.full_deck)
-        if self._tricked and self._top_idcs and self._bottom_idcs:
+        if self._tricked and self._top_idcs:
             top_cards = [self.full_deck[idx] for idx in self._top_idcs]
             bottom_cards = [self.full_deck[idx] for idx in self._bottom_idcs]
             random.shuffle(bottom_cards)
-            self.cards = top_cards + bottom_cards
+            self._order = top_cards + bottom_cards
         else:
-            random.shuffle(self.cards)
+            self._order = list(self.full_deck)
+            random.shuffle(self._order)
+        self._cursor = 0
+        return self
+
+    def copy(self) -> "Deck":
+        """Creates a new deck with the same cards and tricking order.
+        Cards are immutable, so the full deck is shared instead of
+        parsing every card again.
+
+        Returns
+        -------
+        Deck
+            shuffled copy of the deck
+        """
+        deck = Deck.__new__(Deck)
+        deck.num_ranks = self.num_ranks
+        deck.num_suits = self.num_suits
+        deck.full_deck = self.full_deck
+        deck._full_deck_idcs = self._full_deck_idcs
+        deck._tricked = self._tricked
+        deck._top_idcs = list(self._top_idcs)
+        deck._bottom_idcs = list(self._bottom_idcs)
+        deck._order = []
+        deck._cursor = 0
+        return deck.shuffle()
+
+    def snapshot(self) -> Tuple[List[Card], int]:
+        """Captures the current order of the deck and the position of
+        the top card. The order list is shared, not copied.
+
+        Returns
+        -------
+        Tuple[List[Card], int]
+            card order and cursor position
+        """
+        return self._order, self._cursor
+
+    def restore(self, state: Tuple[List[Card], int]) -> "Deck":
+        """Restores the deck to a previously captured snapshot.
+
+        Parameters
+        ----------
+        state : Tuple[List[Card], int]
+            card order and cursor position from snapshot()
+
+        Returns
+        -------
+        Deck
+            self
+        """
+        self._order, self._cursor = state
         return self
 
     def trick(self, top_cards: List[Card]) -> "Deck":
@@ -242,7 +312,10 @@ class Deck:
         Deck
             self
         """
-        self._top_idcs = [self.full_deck.index(top_card) for top_card in top_cards]
+        try:
+            self._top_idcs = [self._full_deck_idcs[int(card)] for card in top_cards]
+        except KeyError:
+            raise ValueError("tricked card is not in the deck")
         all_idcs = set(range(self.num_ranks * self.num_suits))
         self._bottom_idcs = list(all_idcs.difference(set(self._top_idcs)))
         self._tricked = True
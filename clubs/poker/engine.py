@@ -1,15 +1,39 @@
 """Classes and functions for running poker games"""
 import itertools
-import operator
+import random
 import sys
-from typing import Any, List, Optional, Tuple, Type, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 if sys.version_info >= (3, 8):
     from typing import Literal, TypedDict
 else:
     from typing_extensions import Literal, TypedDict
 
-from clubs import error, poker, render
+from clubs import configs, error, poker
+
+if TYPE_CHECKING:
+    from clubs import render
+
+
+def _config_key(config: configs.PokerConfig) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, repr(value)) for key, value in config.items()))
+
+
+ALL_IN_PAYOUTS = ["runout", "exact", "monte_carlo"]
+
+_TEMPLATES: Dict[Tuple[type, Tuple[Tuple[str, str], ...]], "Dealer"] = {}
 
 
 class ObservationDict(TypedDict):
@@ -26,6 +50,114 @@ class ObservationDict(TypedDict):
     street_commits: List[int]
 
 
+class DealerState(NamedTuple):
+    """Compact, immutable snapshot of the mutable state of a Dealer.
+    Lists are stored as tuples, the deck is stored as a reference to
+    its card order and the cursor position of the top card, and the
+    hole cards, which are never modified during a hand, are shared
+    with the dealer."""
+
+    action: int
+    active: Tuple[bool, ...]
+    button: int
+    community_cards: Tuple[poker.Card, ...]
+    deck: Tuple[List[poker.Card], int]
+    history: Tuple[Tuple[int, int, bool], ...]
+    hole_cards: List[List[poker.Card]]
+    largest_raise: int
+    pot: int
+    pot_commits: Tuple[int, ...]
+    stacks: Tuple[int, ...]
+    street: int
+    street_commits: Tuple[int, ...]
+    street_option: Tuple[bool, ...]
+    street_raises: int
+
+
+class PotLayer(NamedTuple):
+    """Main or side pot
+
+    Attributes
+    ----------
+    amount : int
+        number of chips in the layer
+    eligible : Tuple[int, ...]
+        players still in the hand who can win the layer, ordered by
+        their pot commit
+    """
+
+    amount: int
+    eligible: Tuple[int, ...]
+
+
+def _pot_layers(pot_commits: List[int], active: List[bool]) -> List[PotLayer]:
+    # every distinct commit of an active player closes a layer. with
+    # commits sorted, the chips below a level are the sum of all smaller
+    # commits plus the level times the number of remaining players
+    order = sorted(range(len(pot_commits)), key=pot_commits.__getitem__)
+    active_order = [player for player in order if active[player]]
+    layers: List[PotLayer] = []
+    level = 0
+    below = 0
+    prefix = 0
+    num_active = 0
+    for idx, player in enumerate(order):
+        commit = pot_commits[player]
+        if active[player]:
+            if commit > level:
+                total = prefix + commit * (len(order) - idx)
+                eligible = tuple(active_order[num_active:])
+                layers.append(PotLayer(total - below, eligible))
+                level = commit
+                below = total
+            num_active += 1
+        prefix += commit
+    # uncalled chips of folded players go to the last layer
+    if layers and prefix > below:
+        layers[-1] = PotLayer(layers[-1].amount + prefix - below, layers[-1].eligible)
+    return layers
+
+
+class DealerListener:
+    """Base class for objects notified by a Dealer, e.g. to log hand
+    histories. Append listeners to Dealer.listeners, they are called
+    after the dealer has updated its state.
+    """
+
+    def on_reset(self, dealer: "Dealer") -> None:
+        """Called at the end of Dealer.reset
+
+        Parameters
+        ----------
+        dealer : Dealer
+            dealer which was reset
+        """
+
+    def on_step(self, dealer: "Dealer", payouts: List[int], done: List[bool]) -> None:
+        """Called at the end of Dealer.step. The action is the last
+        entry of Dealer.history. At the end of a hand, stacks are
+        already settled.
+
+        Parameters
+        ----------
+        dealer : Dealer
+            dealer which was stepped
+        payouts : List[int]
+            payouts for every player
+        done : List[bool]
+            done flag for every player
+        """
+
+    def on_restore(self, dealer: "Dealer") -> None:
+        """Called at the end of Dealer.restore and Dealer.undo
+
+        Parameters
+        ----------
+        dealer : Dealer
+            dealer which was restored
+        """
+
+
 class Dealer:
     """Runs a range of different of poker games dependent on the
     given configuration. Supports limit, no limit and pot limit
@@ -202,10 +334,6 @@ class Dealer:
         self.start_stack = start_stack
 
         # dealer
-        self.action = -1
-        self.active = [False] * self.num_players
-        self.button = 0
-        self.community_cards: List[poker.Card] = []
         self.deck = poker.Deck(self.num_suits, self.num_ranks)
         self.evaluator = poker.Evaluator(
             self.num_suits,
@@ -215,6 +343,14 @@ class Dealer:
             low_end_straight=low_end_straight,
             order=order,
         )
+        self._init_state()
+
+    def _init_state(self) -> None:
+        # mutable table state, everything else is set once by the config
+        self.action = -1
+        self.active = [False] * self.num_players
+        self.button = 0
+        self.community_cards: List[poker.Card] = []
         self.history: List[Tuple[int, int, bool]] = []
         self.hole_cards: List[List[poker.Card]] = []
         self.largest_raise = 0
@@ -226,12 +362,149 @@ class Dealer:
         self.street_option = [False] * self.num_players
         self.street_raises = 0
 
+        # seats taking part in the next hand, see sit and stand
+        self.seated = [True] * self.num_players
+
+        # running aggregates updated by step, see _recount
+        self._max_commit = 0
+        self._num_active = 0
+        self._num_all_in = 0
+        self._num_options = 0
+        self._num_unmatched = 0
+        self._done_flags = [True] * self.num_players
+        self._fold_payouts = [0] * self.num_players
+
+        # all in evaluation, see all_in_payouts
+        self._all_in_payouts = "runout"
+        self.all_in_samples = 1000
+
+        # undo
+        self.undo_enabled = False
+        self.undo_stack: List[DealerState] = []
+
+        # listeners
+        self.listeners: List[DealerListener] = []
+
         # render
-        self.viewer: Optional[render.PokerViewer]
-        self.viewer = None
-        self.ascii_viewer = render.ASCIIViewer(
-            num_players, num_hole_cards, sum(num_community_cards)
-        )
+        self._viewer: Optional[render.PokerViewer] = None
+        # throttled viewer created by render, closed when replaced
+        self._throttled_viewer: Optional[render.ThrottledViewer] = None
+        self._ascii_viewer: Optional[render.ASCIIViewer] = None
+
+    @classmethod
+    def from_config(cls, config: configs.PokerConfig, shared: bool = True) -> "Dealer":
+        """Creates a dealer from a poker configuration. With shared=True,
+        the first dealer created for a configuration is kept as a
+        template and later dealers reuse its validated config, card
+        objects and evaluator lookup tables, so only the table state is
+        created anew.
+
+        Parameters
+        ----------
+        config : configs.PokerConfig
+            poker configuration
+        shared : bool, optional
+            reuse precompiled parts of previous dealers with the same
+            configuration, by default True
+
+        Returns
+        -------
+        Dealer
+            new dealer
+
+        Examples
+        --------
+
+        >>> dealer = Dealer.from_config(configs.NO_LIMIT_HOLDEM_SIX_PLAYER)
+        >>> dealer.evaluator is Dealer.from_config(
+        ...     configs.NO_LIMIT_HOLDEM_SIX_PLAYER
+        ... ).evaluator
+        True
+        """
+        if not shared:
+            return cls(**config)
+        key = (cls, _config_key(config))
+        template = _TEMPLATES.get(key)
+        if template is None:
+            template = _TEMPLATES[key] = cls(**config)
+        dealer = cls.__new__(cls)
+        dealer.__dict__.update(template.__dict__)
+        # config lists are copied so dealers can change blinds etc.
+        # independently, cards and the evaluator are immutable and shared
+        dealer.blinds = list(template.blinds)
+        dealer.antes = list(template.antes)
+        dealer.raise_sizes = list(template.raise_sizes)
+        dealer.num_raises = list(template.num_raises)
+        dealer.num_community_cards = list(template.num_community_cards)
+        dealer.deck = template.deck.copy()
+        dealer._init_state()
+        return dealer
+
+    @property
+    def viewer(self) -> Optional["render.PokerViewer"]:
+        """Viewer used by render, created on the first call to render.
+        Replacing a throttled viewer created by render closes it, so its
+        last frame is rendered.
+
+        Returns
+        -------
+        Optional[render.PokerViewer]
+            viewer
+        """
+        return self._viewer
+
+    @viewer.setter
+    def viewer(self, viewer: Optional["render.PokerViewer"]) -> None:
+        throttled = self._throttled_viewer
+        if throttled is not None and throttled is not viewer:
+            self._throttled_viewer = None
+            throttled.close()
+        self._viewer = viewer
+
+    @property
+    def ascii_viewer(self) -> "render.ASCIIViewer":
+        """ASCII viewer used for the string representation of the dealer,
+        constructed on first access so dealers which are never printed
+        don't import the render package or read the table template
+
+        Returns
+        -------
+        render.ASCIIViewer
+            ascii viewer
+        """
+        if self._ascii_viewer is None:
+            from clubs import render
+
+            self._ascii_viewer = render.ASCIIViewer(
+                self.num_players, self.num_hole_cards, sum(self.num_community_cards)
+            )
+        return self._ascii_viewer
+
+    @property
+    def all_in_payouts(self) -> str:
+        """Payouts returned by step() when the betting ends because at
+        most one player in the hand is not all in. 'runout' returns the
+        payouts of the dealt community cards. 'exact' returns the
+        expected payouts over every possible runout and 'monte_carlo'
+        estimates them from all_in_samples random runouts, see
+        expected_payouts(). The community cards are dealt and stacks are
+        settled with the dealt runout in every mode, listeners always
+        receive the payouts of the dealt runout. By default 'runout'
+
+        Returns
+        -------
+        str
+            all in payout mode
+        """
+        return self._all_in_payouts
+
+    @all_in_payouts.setter
+    def all_in_payouts(self, mode: str) -> None:
+        if mode not in ALL_IN_PAYOUTS:
+            raise error.InvalidConfigError(
+                f"unknown all in payout mode {mode}, expected one of {ALL_IN_PAYOUTS}"
+            )
+        self._all_in_payouts = mode
 
     def __str__(self) -> str:
         config = self._render_config()
@@ -244,18 +517,86 @@ class Dealer:
         )
         return string
 
+    def sit(self, seat: int, stack: Optional[int] = None) -> None:
+        """Seats a player between hands. If stack is None, a player who
+        sat out takes part in the next hand with the stack left at the
+        seat.
+
+        Parameters
+        ----------
+        seat : int
+            seat index
+        stack : Optional[int], optional
+            chips the player brings to the table, by default None
+
+        Examples
+        --------
+
+        >>> dealer = Dealer(**configs.NO_LIMIT_HOLDEM_SIX_PLAYER)
+        >>> stack = dealer.stand(3)
+        >>> obs = dealer.reset()  # five players
+        >>> dealer.sit(3, 150)
+        >>> obs = dealer.reset()  # six players
+        """
+        self._check_seat(seat)
+        if stack is not None:
+            self.stacks[seat] = stack
+        self.seated[seat] = True
+
+    def sit_out(self, seat: int) -> None:
+        """Sits a player out between hands. The player keeps the seat and
+        stack but is not dealt in until sit() is called again.
+
+        Parameters
+        ----------
+        seat : int
+            seat index
+        """
+        self._check_seat(seat)
+        self.seated[seat] = False
+
+    def stand(self, seat: int) -> int:
+        """Removes a player from a seat between hands
+
+        Parameters
+        ----------
+        seat : int
+            seat index
+
+        Returns
+        -------
+        int
+            stack of the removed player
+        """
+        self._check_seat(seat)
+        stack = self.stacks[seat]
+        self.stacks[seat] = 0
+        self.seated[seat] = False
+        return stack
+
+    def _check_seat(self, seat: int) -> None:
+        if not 0 <= seat < self.num_players:
+            raise error.InvalidSeatError(
+                f"invalid seat {seat}, table has {self.num_players} seats"
+            )
+        if self.action != -1:
+            raise error.InvalidSeatError("seats can only change between hands")
+
     def reset(
         self, reset_button: bool = False, reset_stacks: bool = False
     ) -> ObservationDict:
         """Resets the table. Shuffles the deck, deals new hole cards
         to all players, moves the button and collects blinds and antes.
+        Only seated players with chips are dealt in, the button, blinds
+        and antes skip all other seats.
 
         Parameters
         ----------
         reset_button : bool, optional
             reset button to first position at table, by default False
         reset_stacks : bool, optional
-            reset stack sizes to starting stack size, by default False
+            reset stack sizes of seated players to starting stack size,
+            by default False
 
         Returns
         -------
@@ -280,18 +621,24 @@ class Dealer:
         ...  'street_commits': [0, 0]}
         """
         if reset_stacks:
-            self.active = [True] * self.num_players
-            self.stacks = [self.start_stack] * self.num_players
-        else:
-            self.active = [stack > 0 for stack in self.stacks]
-            if sum(self.active) <= 1:
-                raise error.TooFewActivePlayersError(
-                    "not enough players have chips, set reset_stacks=True"
-                )
-        if reset_button:
-            self.button = 0
-        else:
-            self.button = (self.button + 1) % self.num_players
+            self.stacks = [
+                self.start_stack if seated else stack
+                for seated, stack in zip(self.seated, self.stacks)
+            ]
+        self.active = [
+            seated and stack > 0 for seated, stack in zip(self.seated, self.stacks)
+        ]
+        num_active = sum(self.active)
+        if num_active <= 1:
+            raise error.TooFewActivePlayersError(
+                "not enough seated players have chips, set reset_stacks=True "
+                "or seat more players"
+            )
+        # the button moves to the next player dealt in
+        self.button = 0 if reset_button else self.button + 1
+        while not self.active[self.button % self.num_players]:
+            self.button += 1
+        self.button %= self.num_players
 
         self.deck.shuffle()
         self.community_cards = self.deck.draw(self.num_community_cards[0])
@@ -306,19 +653,24 @@ class Dealer:
         self.street_commits = [0] * self.num_players
         self.street_option = [False] * self.num_players
         self.street_raises = 0
+        self.undo_stack = []
 
         self.action = self.button
         # in heads up button posts small blind
-        if self.num_players > 2:
+        if num_active > 2:
             self._move_action()
         self._collect_multiple_bets(bets=self.antes, street_commits=False)
         self._collect_multiple_bets(bets=self.blinds, street_commits=True)
         self._move_action()
         self._move_action()
+        self._recount()
+
+        for listener in self.listeners:
+            listener.on_reset(self)
 
         return self._observation(False)
 
-    def step(self, bet: float) -> Tuple[ObservationDict, List[int], List[bool]]:
+    def step(self, bet: float) -> Tuple[ObservationDict, List[float], List[bool]]:
         """Advances poker game to next player. If the bet is 0, it is
         either considered a check or fold, depending on the previous
         action. The given bet is always rounded to the closest valid bet
@@ -333,9 +685,11 @@ class Dealer:
 
         Returns
         -------
-        Tuple[ObservationDict, List[int], List[bool]]
+        Tuple[ObservationDict, List[float], List[bool]]
             observation dictionary, payouts for every player, boolean value for every
-            player showing if that player is still active in the round
+            player showing if that player is still active in the round. payouts
+            are expected payouts if the hand ends all in and all_in_payouts
+            is not 'runout'
 
         Examples
         --------
@@ -362,19 +716,27 @@ class Dealer:
                 done = self._done()
                 payouts = self._payouts()
                 observation = self._observation(all(done))
-                return observation, payouts, done
+                return observation, list(payouts), done
             raise error.TableResetError("call reset() before calling first step()")
 
+        if self.undo_enabled:
+            self.undo_stack.append(self.snapshot())
+
         fold = bet < 0
         bet = round(bet)
+        action = self.action
 
         call, min_raise, max_raise = self._bet_sizes()
         # round bet to nearest sizing
         bet = self._clean_bet(bet, call, min_raise, max_raise)
+        unmatched = self._unmatched(action)
 
         # only fold if player cannot check
         if call and ((bet < call) or fold):
-            self.active[self.action] = False
+            self.active[action] = False
+            self._num_active -= 1
+            self._done_flags[action] = True
+            self._fold_payouts[action] = -self.pot_commits[action]
             bet = 0
 
         # if bet is full raise record as largest raise
@@ -384,39 +746,54 @@ class Dealer:
 
         self._collect_bet(bet)
 
-        self.history.append((self.action, int(bet), bool(fold)))
+        self.history.append((action, int(bet), bool(fold)))
 
-        self.street_option[self.action] = True
+        if not self.street_option[action]:
+            self.street_option[action] = True
+            self._num_options += 1
+        # a raise reopens the action for all other players, otherwise
+        # only the acting player can have matched the largest commit
+        if self.street_commits[action] > self._max_commit:
+            self._max_commit = self.street_commits[action]
+            self._num_unmatched = sum(
+                self._unmatched(player) for player in range(self.num_players)
+            )
+        else:
+            self._num_unmatched += self._unmatched(action) - unmatched
         self._move_action()
 
+        expected_payouts: Optional[List[float]] = None
         # if all agreed go to next street
         if self._all_agreed():
             self.action = self.button
             self._move_action()
-            # if at most 1 player active and not all in turn up all
-            # community cards and evaluate hand
-            while True:
-                self.street += 1
-                full_streets = self.street >= self.num_streets
-                all_in = [
-                    bool(active * (stack == 0))
-                    for active, stack in zip(self.active, self.stacks)
-                ]
-                all_all_in = sum(self.active) - sum(all_in) <= 1
-                if full_streets:
-                    break
-                self.community_cards += self.deck.draw(
-                    self.num_community_cards[self.street]
-                )
-                if not all_all_in:
-                    break
+            self.street += 1
+            if self.street < self.num_streets:
+                num_cards = self.num_community_cards[self.street]
+                # if at most 1 player active and not all in turn up all
+                # community cards at once and evaluate hand
+                if self._num_active - self._num_all_in <= 1:
+                    if self._num_active > 1 and self._all_in_payouts != "runout":
+                        num_samples = (
+                            self.all_in_samples
+                            if self._all_in_payouts == "monte_carlo"
+                            else None
+                        )
+                        expected_payouts = self.expected_payouts(num_samples)
+                    num_cards = sum(self.num_community_cards[self.street :])
+                    self.street = self.num_streets
+                self.community_cards = self.community_cards + self.deck.draw(num_cards)
             self.street_commits = [0] * self.num_players
             self.street_option = [not active for active in self.active]
             self.street_raises = 0
+            self._max_commit = 0
+            self._num_options = self.num_players - self._num_active
+            self._num_unmatched = 0
 
         done = self._done()
-        payouts = self._payouts()
         if all(done):
+            # payouts are only evaluated once the hand is over
+            payouts = self._payouts()
             self.action = -1
             self.pot = 0
             self.stacks = [
@@ -425,10 +802,106 @@ class Dealer:
                     self.stacks, payouts, self.pot_commits
                 )
             ]
+            self._recount()
+        else:
+            # mid hand only folded players have lost their commits
+            payouts = list(self._fold_payouts)
+        for listener in self.listeners:
+            listener.on_step(self, payouts, done)
         observation = self._observation(all(done))
-        return observation, payouts, done
+        if expected_payouts is not None:
+            return observation, expected_payouts, done
+        return observation, list(payouts), done
+
+    def snapshot(self) -> DealerState:
+        """Captures the current state of the table. The snapshot only
+        holds ints, tuples and references to immutable hand data, so
+        it is cheap to create and can be restored any number of times,
+        e.g. when expanding nodes in a tree search.
+
+        Returns
+        -------
+        DealerState
+            snapshot of the table state
+
+        Examples
+        --------
+
+        >>> dealer = Dealer(**configs.LEDUC_TWO_PLAYER)
+        >>> obs = dealer.reset()
+        >>> state = dealer.snapshot()
+        >>> obs, payouts, done = dealer.step(2)
+        >>> dealer.restore(state)
+        """
+        return DealerState(
+            self.action,
+            tuple(self.active),
+            self.button,
+            tuple(self.community_cards),
+            self.deck.snapshot(),
+            tuple(self.history),
+            self.hole_cards,
+            self.largest_raise,
+            self.pot,
+            tuple(self.pot_commits),
+            tuple(self.stacks),
+            self.street,
+            tuple(self.street_commits),
+            tuple(self.street_option),
+            self.street_raises,
+        )
+
+    def restore(self, state: DealerState) -> "Dealer":
+        """Restores the table to a previously captured snapshot and
+        notifies the listeners.
+
+        Parameters
+        ----------
+        state : DealerState
+            snapshot created by snapshot()
+
+        Returns
+        -------
+        Dealer
+            self
+        """
+        self.action = state.action
+        self.active = list(state.active)
+        self.button = state.button
+        self.community_cards = list(state.community_cards)
+        self.deck.restore(state.deck)
+        self.history = list(state.history)
+        self.hole_cards = state.hole_cards
+        self.largest_raise = state.largest_raise
+        self.pot = state.pot
+        self.pot_commits = list(state.pot_commits)
+        self.stacks = list(state.stacks)
+        self.street = state.street
+        self.street_commits = list(state.street_commits)
+        self.street_option = list(state.street_option)
+        self.street_raises = state.street_raises
+        self._recount()
+        for listener in self.listeners:
+            listener.on_restore(self)
+        return self
 
-    def _render_config(self) -> render.viewer.RenderConfig:
+    def undo(self) -> ObservationDict:
+        """Reverts the last call to step(). Requires undo_enabled to be
+        set before stepping, the undo stack is cleared on reset().
+
+        Returns
+        -------
+        ObservationDict
+            observation dictionary of the restored state
+        """
+        if not self.undo_stack:
+            raise error.EmptyUndoStackError(
+                "nothing to undo, set undo_enabled=True before calling step()"
+            )
+        self.restore(self.undo_stack.pop())
+        return self._observation(False)
+
+    def _render_config(self) -> "render.viewer.RenderConfig":
         action = int(self.action)
         active = self.active
         all_in = [
@@ -461,7 +934,13 @@ class Dealer:
 
         return config
 
-    def render(self, mode: str = "human", sleep: float = 0, **kwargs: Any) -> None:
+    def render(
+        self,
+        mode: str = "human",
+        sleep: float = 0,
+        fps: Optional[float] = None,
+        **kwargs: Any,
+    ) -> None:
         """Renders poker table. Render mode options are: ascii, human
 
         Parameters
@@ -470,7 +949,13 @@ class Dealer:
             toggle for using different renderer, by default 'human'
         sleep : float, optional
             time to wait after rendering, by default 0
+        fps : Optional[float], optional
+            render in a background thread with at most fps frames per
+            second, intermediate states are dropped. only used when the
+            viewer is created on the first call, by default None
         """
+        from clubs import render
+
         viewer: Optional[Type[render.PokerViewer]] = None
         render_modes = ["ascii", "human"]
         if self.viewer is None:
@@ -488,6 +973,9 @@ class Dealer:
                 sum(self.num_community_cards),
                 **kwargs,
             )
+            if fps is not None:
+                throttled = render.ThrottledViewer(self.viewer, fps)
+                self.viewer = self._throttled_viewer = throttled
 
         config = self._render_config()
 
@@ -502,16 +990,8 @@ class Dealer:
         List[float]
             win probabilities
         """
-        hand_strengths = []
-        num_additional_comm_cards = sum(self.num_community_cards) - len(
-            self.community_cards
-        )
-        comm_combinations = itertools.combinations(
-            self.deck.cards, num_additional_comm_cards
-        )
         hands_won = [0] * self.num_players
-        for additional_comm_cards in comm_combinations:
-            community_cards = self.community_cards + list(additional_comm_cards)
+        for community_cards in self._runouts():
             hand_strengths = self._eval_hands(self.hole_cards, community_cards)
             best_hand = min(hand_strengths)
             for player_idx, hand_strength in enumerate(hand_strengths):
@@ -523,28 +1003,108 @@ class Dealer:
         ]
         return win_probs
 
-    def _all_agreed(self) -> bool:
-        # not all agreed if not all players had chance to act
-        if not all(self.street_option):
-            return False
-        # all agreed if street commits equal to maximum street commit
-        street_commit = [
-            street_commit == max(self.street_commits)
-            for street_commit in self.street_commits
+    def expected_payouts(
+        self, num_samples: Optional[int] = None, known_cards: Optional[int] = None
+    ) -> List[float]:
+        """Computes the expected payouts of every player over the
+        remaining community cards, assuming no further bets. If
+        num_samples is None every possible runout is evaluated,
+        otherwise the payouts are averaged over num_samples random
+        runouts. Evaluating every runout is only feasible for small
+        decks or late streets, e.g. a preflop all in of texas hold'em
+        has over 1.7 million runouts.
+
+        Parameters
+        ----------
+        num_samples : Optional[int], optional
+            number of random runouts, by default None
+        known_cards : Optional[int], optional
+            only the first known_cards community cards are considered
+            dealt, the others are treated as part of the deck, by
+            default None which considers all community cards
+
+        Returns
+        -------
+        List[float]
+            expected payouts
+
+        Examples
+        --------
+
+        >>> dealer = Dealer(**configs.NO_LIMIT_HOLDEM_TWO_PLAYER)
+        >>> obs = dealer.reset()
+        >>> obs, payouts, done = dealer.step(obs["call"])
+        >>> obs, payouts, done = dealer.step(0)
+        >>> dealer.expected_payouts(num_samples=1000)  # flop equities
+        """
+        if self._num_active <= 1:
+            return [float(payout) for payout in self._payouts()]
+        pot_layers = self.pot_layers()
+        totals = [0] * self.num_players
+        num_runouts = 0
+        for community_cards in self._runouts(num_samples, known_cards):
+            hand_strengths = self._eval_hands(self.hole_cards, community_cards)
+            for player, payout in enumerate(
+                self._split_pot(hand_strengths, pot_layers)
+            ):
+                totals[player] += payout
+            num_runouts += 1
+        return [
+            total / num_runouts - pot_commit
+            for total, pot_commit in zip(totals, self.pot_commits)
         ]
-        # or player is all in
-        all_in = [stack == 0 for stack in self.stacks]
-        # or player is not active
-        active = [not active for active in self.active]
-        agreed = [
-            _street_commit or _all_in or _active
-            for _street_commit, _all_in, _active in zip(street_commit, all_in, active)
+
+    def _runouts(
+        self, num_samples: Optional[int] = None, known_cards: Optional[int] = None
+    ) -> Iterator[List[poker.Card]]:
+        # every combination of remaining community cards or random samples
+        community_cards = self.community_cards[:known_cards]
+        num_cards = sum(self.num_community_cards) - len(community_cards)
+        cards = self.community_cards[len(community_cards) :] + self.deck.cards
+        combinations: Iterator[Sequence[poker.Card]]
+        if num_samples is None:
+            combinations = itertools.combinations(cards, num_cards)
+        else:
+            combinations = (random.sample(cards, num_cards) for _ in range(num_samples))
+        for additional_cards in combinations:
+            yield community_cards + list(additional_cards)
+
+    def _recount(self) -> None:
+        # recomputes the running aggregates from scratch, called whenever
+        # the table state changes by more than a single action
+        self._max_commit = max(self.street_commits)
+        self._num_active = sum(self.active)
+        self._num_all_in = sum(
+            active and stack == 0 for active, stack in zip(self.active, self.stacks)
+        )
+        self._num_options = sum(self.street_option)
+        self._num_unmatched = sum(
+            self._unmatched(player) for player in range(self.num_players)
+        )
+        self._done_flags = [
+            not active or stack == 0 for active, stack in zip(self.active, self.stacks)
         ]
-        return all(agreed)
+        self._fold_payouts = [
+            -1 * pot_commit * (not active)
+            for pot_commit, active in zip(self.pot_commits, self.active)
+        ]
+
+    def _unmatched(self, player: int) -> bool:
+        # player still has to call the largest commit of the street
+        return (
+            self.active[player]
+            and self.stacks[player] > 0
+            and self.street_commits[player] < self._max_commit
+        )
+
+    def _all_agreed(self) -> bool:
+        # all agreed if all players had the chance to act and every
+        # player matched the largest commit, is all in or is not active
+        return self._num_options == self.num_players and not self._num_unmatched
 
     def _bet_sizes(self) -> Tuple[int, int, int]:
         # call difference between commit and maximum commit
-        call = max(self.street_commits) - self.street_commits[self.action]
+        call = self._max_commit - self.street_commits[self.action]
         # min raise at least largest previous raise
         # if limit game min and max raise equal to raise size
         raise_size = self.raise_sizes[self.street]
@@ -589,12 +1149,15 @@ class Dealer:
     def _collect_multiple_bets(
         self, bets: List[int], street_commits: bool = True
     ) -> None:
-        # roll list to action
-        bets = bets[-self.action :] + bets[: -self.action]  # noqa: E203
-        bets = [
-            (stack > 0) * active * bet
-            for stack, active, bet in zip(self.stacks, self.active, bets)
+        # the i-th bet is posted by the i-th active player from the
+        # action on, players without enough chips post what they have
+        seats = [
+            (self.action + idx) % self.num_players for idx in range(self.num_players)
         ]
+        posted = [0] * self.num_players
+        for player, bet in zip([seat for seat in seats if self.active[seat]], bets):
+            posted[player] = min(self.stacks[player], bet)
+        bets = posted
         if street_commits:
             self.street_commits = [
                 street_commit + bet
@@ -614,15 +1177,15 @@ class Dealer:
         self.pot_commits[self.action] += bet
         self.street_commits[self.action] += bet
         self.stacks[self.action] -= bet
+        if bet and not self.stacks[self.action]:
+            self._num_all_in += 1
+            self._done_flags[self.action] = True
 
     def _done(self) -> List[bool]:
-        if self.street >= self.num_streets or sum(self.active) <= 1:
+        if self.street >= self.num_streets or self._num_active <= 1:
             # end game
             return [True] * self.num_players
-        done = [
-            not active or stack == 0 for active, stack in zip(self.active, self.stacks)
-        ]
-        return done
+        return list(self._done_flags)
 
     def _observation(self, done: bool) -> ObservationDict:
         if done:
@@ -686,52 +1249,63 @@ class Dealer:
             hand_strengths.append(hand_strength)
         return hand_strengths
 
+    def pot_layers(self) -> List[PotLayer]:
+        """Splits the pot into a main pot and side pots. Every layer
+        holds the chips all players committed between two commit levels
+        of players still in the hand and can be won by the players who
+        committed at least the upper level. Chips of folded players
+        above the largest commit of any player still in the hand are
+        added to the last layer.
+
+        Returns
+        -------
+        List[PotLayer]
+            pot layers starting with the main pot
+
+        Examples
+        --------
+
+        >>> dealer.pot_commits, dealer.active = [50, 100, 100], [True, True, True]
+        >>> dealer.pot_layers()
+        [PotLayer(amount=150, eligible=(0, 1, 2)),
+         PotLayer(amount=100, eligible=(1, 2))]
+        """
+        return _pot_layers(self.pot_commits, self.active)
+
     def _eval_round(self) -> List[int]:
-        # grab array of hand strength and pot commits
         hand_strengths = self._eval_hands(self.hole_cards, self.community_cards)
-        hands: List[List[int]] = [
-            [player_idx, hand_strength, self.pot_commits[player_idx]]
-            for player_idx, hand_strength in enumerate(hand_strengths)
-        ]
-        # sort hands by hand strength and pot commits
-        hands = sorted(hands, key=operator.itemgetter(1, 2))
-        pot = self.pot
-        remainder = 0
+        return self._split_pot(hand_strengths, self.pot_layers())
+
+    def _split_pot(
+        self, hand_strengths: List[int], pot_layers: List[PotLayer]
+    ) -> List[int]:
         payouts = [0] * self.num_players
-        worst_hand = self.evaluator.table.max_rank + 1
-        # iterate over hand strength and
-        # pot commits from smallest to largest
-        for hand_idx, (_, strength, pot_commit) in enumerate(hands):
-            eligible = [
-                player_idx
-                for player_idx, other_strength, _ in hands
-                if other_strength == strength
-            ]
-            # cut can only be as large as lowest player commit amount
-            cut = [min(hand[2], pot_commit) for hand in hands]
-            split_pot = sum(cut)
-            if not split_pot:
-                continue
-            split = split_pot // len(eligible)
-            remain = split_pot % len(eligible)
-            for player_idx in eligible:
-                payouts[player_idx] += split
-            remainder += remain
-            # remove chips from players and pot
-            for idx in range(len(cut)):
-                hands[idx][2] -= cut[idx]
-            pot -= split_pot
-            # remove player from next split pot
-            hands[hand_idx][1] = worst_hand
-            if pot == 0:
-                break
-        # give worst position player remainder chips
-        if remainder:
-            # worst player is first player after button involved in pot
-            for player_idx in range(1, self.num_players + 1):
-                if payouts[player_idx + self.button % self.num_players]:
-                    payouts[player_idx] += remainder
-                    break
+        # eligible players of a layer are a prefix extension of the
+        # eligible players of the next layer, so walking the layers
+        # backwards only needs to look at every player once. with at most
+        # a handful of layers numpy's per call overhead outweighs this loop
+        best = self.evaluator.table.max_rank + 1
+        winners: List[int] = []
+        num_seen = 0
+        for amount, eligible in reversed(pot_layers):
+            for player in eligible[: len(eligible) - num_seen]:
+                strength = hand_strengths[player]
+                if strength < best:
+                    best = strength
+                    winners = [player]
+                elif strength == best:
+                    winners.append(player)
+            num_seen = len(eligible)
+            split, remainder = divmod(amount, len(winners))
+            for player in winners:
+                payouts[player] += split
+            # odd chips go to the first winner after the button
+            if remainder:
+                winner = min(
+                    winners,
+                    key=lambda player: (player - self.button - 1) % self.num_players,
+                )
+                payouts[winner] += remainder
         return payouts
 
     def _move_action(self) -> "Dealer":
@@ -740,8 +1314,9 @@ class Dealer:
             action = (self.action + idx) % self.num_players
             if self.active[action]:
                 break
-            else:
+            elif not self.street_option[action]:
                 self.street_option[action] = True
+                self._num_options += 1
         self.action = action
         return self
 
@@ -0,0 +1,267 @@
+"""Variance reduced evaluation of agents playing against each other.
+
+Two techniques are combined to reduce the number of hands needed to
+separate the skill of agents from the luck of the cards:
+
+Duplicate matches deal every deck order once per seat rotation, so
+every agent plays every seat with the same cards. Chance cancels out
+between the rotations of a deal.
+
+Equity baselines subtract the luck of every chance event from the
+payouts, similar to AIVAT. The value of a state is the expected payout
+of a check down with the current pot commits. Whenever cards are dealt
+the change of this value is the luck of the deal. The expected change
+is zero, so the corrected payouts are unbiased but have a much smaller
+variance.
+
+Confidence intervals are computed from independent deals, i.e. the
+payouts of all rotations of a deal are averaged before estimating the
+variance.
+"""
+import math
+import random
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from clubs import configs, error
+
+from . import card, engine
+
+Agent = Callable[[engine.ObservationDict], float]
+
+
+class EquityBaseline(engine.DealerListener):
+    """Dealer listener which accumulates the luck of every chance event
+    of a hand, i.e. the change of the expected check down payouts when
+    cards are dealt. Subtracting the corrections from the payouts of a
+    hand gives unbiased payouts with reduced variance.
+
+    Parameters
+    ----------
+    num_samples : Optional[int], optional
+        number of random runouts used to estimate expected payouts,
+        None evaluates every runout which is only feasible for small
+        decks, by default 100
+
+    Examples
+    --------
+
+    >>> baseline = EquityBaseline()
+    >>> dealer.listeners.append(baseline)
+    >>> obs = dealer.reset()
+    >>> ...
+    >>> obs, payouts, done = dealer.step(bet)
+    >>> corrected = baseline.corrected(payouts)
+    """
+
+    def __init__(self, num_samples: Optional[int] = 100) -> None:
+        self.num_samples = num_samples
+        self.corrections: List[float] = []
+        self._num_cards = 0
+
+    def on_reset(self, dealer: engine.Dealer) -> None:
+        # before the hole cards are dealt, every player is equally
+        # likely to win every pot layer they are eligible for
+        expected = [-float(pot_commit) for pot_commit in dealer.pot_commits]
+        for amount, eligible in dealer.pot_layers():
+            for player in eligible:
+                expected[player] += amount / len(eligible)
+        self.corrections = [
+            after - before
+            for after, before in zip(
+                dealer.expected_payouts(self.num_samples), expected
+            )
+        ]
+        self._num_cards = len(dealer.community_cards)
+
+    def on_step(
+        self, dealer: engine.Dealer, payouts: List[int], done: List[bool]
+    ) -> None:
+        num_cards = len(dealer.community_cards)
+        if num_cards == self._num_cards:
+            return
+        before = dealer.expected_payouts(self.num_samples, self._num_cards)
+        after = dealer.expected_payouts(self.num_samples)
+        self.corrections = [
+            correction + value_after - value_before
+            for correction, value_after, value_before in zip(
+                self.corrections, after, before
+            )
+        ]
+        self._num_cards = num_cards
+
+    def corrected(self, payouts: Sequence[float]) -> List[float]:
+        """Subtracts the luck of the current hand from payouts
+
+        Parameters
+        ----------
+        payouts : Sequence[float]
+            payouts of every player at the end of the hand
+
+        Returns
+        -------
+        List[float]
+            corrected payouts
+        """
+        return [
+            payout - correction for payout, correction in zip(payouts, self.corrections)
+        ]
+
+
+class MatchResult(NamedTuple):
+    """Result of an evaluation match
+
+    Attributes
+    ----------
+    mean : List[float]
+        average payout per hand of every agent
+    std_error : List[float]
+        standard error of the average payout of every agent
+    num_deals : int
+        number of independent deals
+    num_hands : int
+        number of played hands, i.e. deals times seat rotations
+    """
+
+    mean: List[float]
+    std_error: List[float]
+    num_deals: int
+    num_hands: int
+
+    def confidence_intervals(self, z: float = 1.96) -> List[Tuple[float, float]]:
+        """Normal confidence intervals of the average payouts
+
+        Parameters
+        ----------
+        z : float, optional
+            z score of the confidence level, by default 1.96 which
+            corresponds to 95% confidence
+
+        Returns
+        -------
+        List[Tuple[float, float]]
+            lower and upper bound for every agent
+        """
+        return [
+            (mean - z * std_error, mean + z * std_error)
+            for mean, std_error in zip(self.mean, self.std_error)
+        ]
+
+
+def play_hand(
+    dealer: engine.Dealer, agents: Sequence[Agent], order: List[card.Card]
+) -> List[int]:
+    """Plays a single hand with a fixed deck order, starting stacks and
+    the button on the first seat
+
+    Parameters
+    ----------
+    dealer : engine.Dealer
+        dealer of the hand
+    agents : Sequence[Agent]
+        agent of every seat
+    order : List[card.Card]
+        deck order, the preflop community cards are dealt first, then
+        the hole cards of every seat and the remaining community cards
+
+    Returns
+    -------
+    List[int]
+        payouts of every seat
+    """
+    dealer.deck.trick(order)
+    obs = dealer.reset(reset_button=True, reset_stacks=True)
+    dealer.deck.untrick()
+    while True:
+        obs, payouts, done = dealer.step(agents[obs["action"]](obs))
+        if all(done):
+            return [int(payout) for payout in payouts]
+
+
+def evaluate_agents(
+    config: configs.PokerConfig,
+    agents: Sequence[Agent],
+    num_deals: int,
+    duplicate: bool = True,
+    baseline: bool = False,
+    num_samples: Optional[int] = 100,
+) -> MatchResult:
+    """Evaluates agents by playing deals against each other. In a
+    duplicate match, agent i sits in seat (i + r) % num_players in
+    rotation r, so every deal is played num_players times and every
+    agent plays every seat with the same cards. Without duplicate
+    play, every deal is played once and the seats rotate between
+    deals. Every hand is played with starting stacks and the button on
+    the first seat.
+
+    Parameters
+    ----------
+    config : configs.PokerConfig
+        poker configuration
+    agents : Sequence[Agent]
+        one agent per player, agents are called with the observation
+        of the acting player and return a bet
+    num_deals : int
+        number of deck orders to play
+    duplicate : bool, optional
+        play every deal in every seat rotation, by default True
+    baseline : bool, optional
+        subtract the luck of chance events using EquityBaseline, by
+        default False
+    num_samples : Optional[int], optional
+        number of random runouts of the equity baseline, None
+        evaluates every runout, by default 100
+
+    Returns
+    -------
+    MatchResult
+        average payouts and standard errors of every agent
+
+    Examples
+    --------
+
+    >>> def caller(obs):
+    ...     return obs["call"]
+    >>> def raiser(obs):
+    ...     return obs["min_raise"]
+    >>> result = evaluate_agents(
+    ...     configs.LEDUC_TWO_PLAYER, [caller, raiser], 1000, baseline=True,
+    ...     num_samples=None
+    ... )
+    >>> result.confidence_intervals()
+    """
+    dealer = engine.Dealer.from_config(config)
+    num_players = dealer.num_players
+    if len(agents) != num_players:
+        raise error.InvalidConfigError(
+            f"expected {num_players} agents, got {len(agents)}"
+        )
+    equity_baseline = None
+    if baseline:
+        equity_baseline = EquityBaseline(num_samples)
+        dealer.listeners.append(equity_baseline)
+
+    full_deck = dealer.deck.full_deck
+    deal_payouts = np.zeros((num_deals, num_players))
+    for deal in range(num_deals):
+        order = random.sample(full_deck, len(full_deck))
+        rotations = range(num_players) if duplicate else [deal % num_players]
+        for rotation in rotations:
+            seats = [(seat - rotation) % num_players for seat in range(num_players)]
+            payouts: Sequence[float] = play_hand(
+                dealer, [agents[agent] for agent in seats], order
+            )
+            if equity_baseline is not None:
+                payouts = equity_baseline.corrected(payouts)
+            for seat, agent in enumerate(seats):
+                deal_payouts[deal, agent] += payouts[seat]
+        deal_payouts[deal] /= len(rotations)
+
+    mean = deal_payouts.mean(axis=0)
+    if num_deals > 1:
+        std_error = deal_payouts.std(axis=0, ddof=1) / math.sqrt(num_deals)
+    else:
+        std_error = np.full(num_players, math.inf)
+    num_hands = num_deals * (num_players if duplicate else 1)
+    return MatchResult(mean.tolist(), std_error.tolist(), num_deals, num_hands)
@@ -173,8 +173,12 @@ class Evaluator(object):
 
         time = 0.0
         for _ in range(n):
+            # shuffle outside of the timed evaluation, drawing from the
+            # same deck runs out of cards after a few hands
+            deck.shuffle()
+            hole_cards, community_cards = deck.draw(2), deck.draw(5)
             start = timer()
-            self.evaluate(deck.draw(2), deck.draw(5))
+            self.evaluate(hole_cards, community_cards)
             time += timer() - start
 
         avg = time / n
@@ -0,0 +1,256 @@
+"""Functions to compute best responses and the exploitability of poker
+policies for small configurations"""
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from clubs import configs, error
+
+from . import card, engine, tree
+
+InfoSetKey = Tuple[
+    int, Tuple[str, ...], Tuple[str, ...], Tuple[Tuple[int, int, bool], ...]
+]
+
+
+class InfoSet(NamedTuple):
+    """Information set of the acting player. A policy maps an
+    information set to a probability for every legal action.
+
+    Attributes
+    ----------
+    player : int
+        acting player
+    hole_cards : Tuple[card.Card, ...]
+        hole cards of the acting player
+    community_cards : Tuple[card.Card, ...]
+        community cards
+    history : Tuple[Tuple[int, int, bool], ...]
+        public action history as in Dealer.history
+    actions : Tuple[int, ...]
+        legal bets, -1 for fold
+    """
+
+    player: int
+    hole_cards: Tuple[card.Card, ...]
+    community_cards: Tuple[card.Card, ...]
+    history: Tuple[Tuple[int, int, bool], ...]
+    actions: Tuple[int, ...]
+
+    @property
+    def key(self) -> InfoSetKey:
+        """Hashable key of the information set, used for policy tables
+
+        Returns
+        -------
+        InfoSetKey
+            player, hole card strings, community card strings and history
+        """
+        return (
+            self.player,
+            tuple(str(card) for card in self.hole_cards),
+            tuple(str(card) for card in self.community_cards),
+            self.history,
+        )
+
+
+Policy = Union[
+    Callable[[InfoSet], Sequence[float]], Mapping[InfoSetKey, Sequence[float]]
+]
+
+
+def info_sets(game_tree: tree.GameTree) -> Iterator[Tuple[int, int, InfoSet]]:
+    """Iterates over all information sets of a game tree
+
+    Parameters
+    ----------
+    game_tree : tree.GameTree
+        game tree
+
+    Yields
+    ------
+    Iterator[Tuple[int, int, InfoSet]]
+        decision node row, hand index and information set
+    """
+    for row, node in enumerate(game_tree.decision_nodes):
+        start = game_tree.child_start[node]
+        end = start + game_tree.num_children[node]
+        actions = tuple(
+            -1 if fold else int(bet)
+            for bet, fold in zip(game_tree.bet[start:end], game_tree.fold[start:end])
+        )
+        board = tuple(game_tree.cards[idx] for idx in game_tree.board[node] if idx >= 0)
+        history = game_tree.histories[node]
+        player = int(game_tree.player[node])
+        for hand_idx, hand in enumerate(game_tree.hands):
+            hole_cards = tuple(game_tree.cards[idx] for idx in hand)
+            yield row, hand_idx, InfoSet(player, hole_cards, board, history, actions)
+
+
+def strategy_from_policy(game_tree: tree.GameTree, policy: Policy) -> np.ndarray:
+    """Converts a policy into a strategy array of a game tree. Policies
+    are either callables which take an InfoSet and return action
+    probabilities or tables which map InfoSet.key to action
+    probabilities. Information sets missing from a table are played
+    uniformly at random.
+
+    Parameters
+    ----------
+    game_tree : tree.GameTree
+        game tree
+    policy : Policy
+        callable or table policy
+
+    Returns
+    -------
+    np.ndarray
+        strategy of shape (decision nodes, hands, actions)
+    """
+    strategy = game_tree.uniform_strategy().copy()
+    for row, hand_idx, info_set in info_sets(game_tree):
+        if callable(policy):
+            policy_probs = policy(info_set)
+        elif info_set.key in policy:
+            policy_probs = policy[info_set.key]
+        else:
+            continue
+        probs = np.asarray(policy_probs, dtype=float)
+        if len(probs) != len(info_set.actions):
+            raise error.InvalidPolicyError(
+                f"expected {len(info_set.actions)} action probabilities "
+                f"for {info_set.key}, got {len(probs)}"
+            )
+        total = probs.sum()
+        if total <= 0:
+            continue
+        strategy[row, hand_idx, : len(probs)] = probs / total
+    return strategy
+
+
+def policy_from_strategy(
+    game_tree: tree.GameTree, strategy: np.ndarray
+) -> Dict[InfoSetKey, List[float]]:
+    """Converts a strategy array of a game tree into a policy table
+
+    Parameters
+    ----------
+    game_tree : tree.GameTree
+        game tree
+    strategy : np.ndarray
+        strategy of shape (decision nodes, hands, actions)
+
+    Returns
+    -------
+    Dict[InfoSetKey, List[float]]
+        table mapping InfoSet.key to action probabilities
+    """
+    return {
+        info_set.key: strategy[row, hand_idx, : len(info_set.actions)].tolist()
+        for row, hand_idx, info_set in info_sets(game_tree)
+    }
+
+
+_TREES: Dict[Tuple[Tuple[str, str], ...], tree.GameTree] = {}
+
+
+def get_game_tree(config: configs.PokerConfig) -> tree.GameTree:
+    """Returns a cached game tree for a configuration, so repeated
+    evaluations of policies only expand the tree once
+
+    Parameters
+    ----------
+    config : configs.PokerConfig
+        poker configuration
+
+    Returns
+    -------
+    tree.GameTree
+        game tree
+    """
+    config_key = engine._config_key(config)
+    if config_key not in _TREES:
+        _TREES[config_key] = tree.GameTree(config)
+    return _TREES[config_key]
+
+
+def _tree(config: Union[configs.PokerConfig, tree.GameTree]) -> tree.GameTree:
+    if isinstance(config, tree.GameTree):
+        return config
+    return get_game_tree(config)
+
+
+def best_response(
+    config: Union[configs.PokerConfig, tree.GameTree], policy: Policy, player: int
+) -> Tuple[float, Dict[InfoSetKey, List[float]]]:
+    """Computes the best response of a player against a policy played
+    by all other players
+
+    Parameters
+    ----------
+    config : Union[configs.PokerConfig, tree.GameTree]
+        poker configuration or game tree
+    policy : Policy
+        callable or table policy
+    player : int
+        player for which to compute the best response
+
+    Returns
+    -------
+    Tuple[float, Dict[InfoSetKey, List[float]]]
+        expected payout of the best response and best response policy
+        table of the player
+
+    Examples
+    --------
+
+    >>> value, table = best_response(configs.KUHN_TWO_PLAYER, lambda _: [1, 1], 0)
+    """
+    game_tree = _tree(config)
+    strategy = strategy_from_policy(game_tree, policy)
+    value, best = game_tree.best_response(strategy, player)
+    table = {
+        key: probs
+        for key, probs in policy_from_strategy(game_tree, best).items()
+        if key[0] == player
+    }
+    return value, table
+
+
+def exploitability(
+    config: Union[configs.PokerConfig, tree.GameTree], policy: Policy
+) -> float:
+    """Computes the exploitability of a policy played by all players,
+    i.e. the average gain of a player switching to a best response.
+    The game tree is traversed once for the reach probabilities of all
+    information sets and deals and once backwards for every player.
+
+    Parameters
+    ----------
+    config : Union[configs.PokerConfig, tree.GameTree]
+        poker configuration or game tree
+    policy : Policy
+        callable or table policy
+
+    Returns
+    -------
+    float
+        exploitability in chips per hand
+
+    Examples
+    --------
+
+    >>> exploitability(configs.KUHN_TWO_PLAYER, lambda info_set: [1, 1])
+    0.4583333333333333
+    """
+    game_tree = _tree(config)
+    return game_tree.exploitability(strategy_from_policy(game_tree, policy))
@@ -0,0 +1,359 @@
+"""Columnar export of simulated hands to numpy or parquet files.
+
+Hands and actions are accumulated in preallocated numpy buffers and
+written to a directory in chunks, so memory stays bounded no matter how
+many hands are simulated. Every chunk is written as a pair of files,
+one row per hand and one row per action::
+
+    hands-00000.npz    hand_id, button, street, pot, num_actions,
+                       action_start, stacks, payouts, hand_ranks
+    actions-00000.npz  hand_id, player, street, bet, fold, pot
+
+Per player columns (stacks, payouts, hand_ranks) have shape
+(hands, players). action_start indexes the first action of a hand in
+the action file of the same chunk. Exporting to a directory with
+existing chunks appends new chunks, hand ids continue from the last
+exported hand.
+"""
+import glob
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from clubs import error
+
+from . import engine
+
+HAND_COLUMNS: Dict[str, str] = {
+    "hand_id": "int64",
+    "button": "int8",
+    "street": "int8",
+    "pot": "int32",
+    "num_actions": "int16",
+    "action_start": "int64",
+}
+PLAYER_COLUMNS: Dict[str, str] = {
+    "stacks": "int32",
+    "payouts": "int32",
+    "hand_ranks": "int32",
+}
+ACTION_COLUMNS: Dict[str, str] = {
+    "hand_id": "int64",
+    "player": "int8",
+    "street": "int8",
+    "bet": "int32",
+    "fold": "bool",
+    "pot": "int32",
+}
+FORMATS = ["npz", "parquet"]
+
+
+class ColumnarExporter(engine.DealerListener):
+    """Dealer listener which records every finished hand into columnar
+    buffers and flushes them to a directory in chunks. Call close (or
+    use the exporter as a context manager) to write the last chunk.
+
+    Parameters
+    ----------
+    directory : str
+        output directory, created if it does not exist
+    num_players : int
+        number of players of the recorded dealers
+    chunk_size : int, optional
+        number of hands per chunk, by default 100000
+    file_format : str, optional
+        'npz' or 'parquet', parquet requires pyarrow, by default 'npz'
+    compress : bool, optional
+        compress npz chunks, by default False
+    hand_ranks : bool, optional
+        evaluate the hand rank of every player at the end of a hand, by
+        default True. ranks of players without a complete hand are -1
+
+    Examples
+    --------
+
+    >>> dealer = Dealer(**configs.NO_LIMIT_HOLDEM_SIX_PLAYER)
+    >>> with ColumnarExporter("results", dealer.num_players).attach(dealer):
+    ...     for _ in range(1000):
+    ...         dealer.reset(reset_stacks=True)
+    ...         while not all(dealer.step(0)[2]):
+    ...             pass
+    >>> for hands, actions in read_chunks("results"):
+    ...     print(hands["payouts"].mean(axis=0))
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        num_players: int,
+        chunk_size: int = 100000,
+        file_format: str = "npz",
+        compress: bool = False,
+        hand_ranks: bool = True,
+    ) -> None:
+        if file_format not in FORMATS:
+            raise error.InvalidFormatError(
+                f"unknown file format {file_format}, expected one of {FORMATS}"
+            )
+        if file_format == "parquet":
+            _import_pyarrow()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.num_players = num_players
+        self.chunk_size = chunk_size
+        self.file_format = file_format
+        self.compress = compress
+        self.hand_ranks = hand_ranks
+        hands_paths = sorted(glob.glob(os.path.join(directory, "hands-*")))
+        self.chunk_idx = len(hands_paths)
+        self.hand_id = 0
+        if hands_paths:
+            hand_ids = _read_chunk(hands_paths[-1])[0]["hand_id"]
+            if len(hand_ids):
+                self.hand_id = int(hand_ids[-1]) + 1
+
+        self.hands = {
+            name: np.zeros(chunk_size, dtype=dtype)
+            for name, dtype in HAND_COLUMNS.items()
+        }
+        self.hands.update(
+            {
+                name: np.zeros((chunk_size, num_players), dtype=dtype)
+                for name, dtype in PLAYER_COLUMNS.items()
+            }
+        )
+        self.actions = self._action_buffers(chunk_size * 4)
+        self.num_hands = 0
+        self.num_actions = 0
+
+        # state of the current hand
+        self._street = 0
+        self._stacks: List[int] = []
+        self._action_start = 0
+
+    @staticmethod
+    def _action_buffers(size: int) -> Dict[str, np.ndarray]:
+        return {
+            name: np.zeros(size, dtype=dtype) for name, dtype in ACTION_COLUMNS.items()
+        }
+
+    def attach(self, dealer: engine.Dealer) -> "ColumnarExporter":
+        """Registers the exporter as listener of a dealer
+
+        Parameters
+        ----------
+        dealer : engine.Dealer
+            dealer to record
+
+        Returns
+        -------
+        ColumnarExporter
+            self
+        """
+        if dealer.num_players != self.num_players:
+            raise error.InvalidConfigError(
+                f"exporter expects {self.num_players} players, "
+                f"dealer has {dealer.num_players}"
+            )
+        dealer.listeners.append(self)
+        return self
+
+    def on_reset(self, dealer: engine.Dealer) -> None:
+        self._street = 0
+        self._stacks = [
+            stack + commit for stack, commit in zip(dealer.stacks, dealer.pot_commits)
+        ]
+        self._action_start = self.num_actions
+
+    def on_step(
+        self, dealer: engine.Dealer, payouts: List[int], done: List[bool]
+    ) -> None:
+        if self.num_actions == len(self.actions["hand_id"]):
+            self._grow_actions()
+        row = self.num_actions
+        player, bet, fold = dealer.history[-1]
+        pot = sum(dealer.pot_commits)
+        actions = self.actions
+        actions["hand_id"][row] = self.hand_id
+        actions["player"][row] = player
+        actions["street"][row] = self._street
+        actions["bet"][row] = bet
+        actions["fold"][row] = fold
+        actions["pot"][row] = pot
+        self.num_actions += 1
+
+        if not all(done):
+            self._street = dealer.street
+            return
+
+        row = self.num_hands
+        hands = self.hands
+        hands["hand_id"][row] = self.hand_id
+        hands["button"][row] = dealer.button
+        hands["street"][row] = self._street
+        hands["pot"][row] = pot
+        hands["num_actions"][row] = self.num_actions - self._action_start
+        hands["action_start"][row] = self._action_start
+        hands["stacks"][row] = self._stacks
+        hands["payouts"][row] = payouts
+        if self.hand_ranks:
+            num_cards = dealer.num_hole_cards + len(dealer.community_cards)
+            if num_cards >= dealer.num_cards_for_hand:
+                hands["hand_ranks"][row] = [
+                    dealer.evaluator.evaluate(hole_cards, dealer.community_cards)
+                    for hole_cards in dealer.hole_cards
+                ]
+            else:
+                hands["hand_ranks"][row] = -1
+        self.num_hands += 1
+        self.hand_id += 1
+
+        if self.num_hands == self.chunk_size:
+            self.flush()
+
+    def _grow_actions(self) -> None:
+        size = len(self.actions["hand_id"])
+        actions = self._action_buffers(size * 2)
+        for name, column in self.actions.items():
+            actions[name][:size] = column
+        self.actions = actions
+
+    def flush(self) -> None:
+        """Writes all finished hands as a chunk. Actions of a hand which
+        is still being played are kept for the next chunk."""
+        if not self.num_hands:
+            return
+        num_actions = int(
+            self.hands["action_start"][self.num_hands - 1]
+            + self.hands["num_actions"][self.num_hands - 1]
+        )
+        hands = {name: column[: self.num_hands] for name, column in self.hands.items()}
+        actions = {name: column[:num_actions] for name, column in self.actions.items()}
+        _write_chunk(
+            self.directory,
+            self.chunk_idx,
+            hands,
+            actions,
+            self.file_format,
+            self.compress,
+        )
+        self.chunk_idx += 1
+
+        # move actions of the running hand to the start of the buffer
+        pending = self.num_actions - num_actions
+        for column in self.actions.values():
+            column[:pending] = column[num_actions : self.num_actions]
+        self.num_actions = pending
+        self._action_start -= num_actions
+        self.num_hands = 0
+
+    def close(self) -> None:
+        """Writes the last chunk"""
+        self.flush()
+
+    def __enter__(self) -> "ColumnarExporter":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise error.MissingImportsError(
+            "parquet export requires pyarrow, install it with: pip install pyarrow"
+        )
+    return pyarrow
+
+
+def _write_chunk(
+    directory: str,
+    chunk_idx: int,
+    hands: Dict[str, np.ndarray],
+    actions: Dict[str, np.ndarray],
+    file_format: str,
+    compress: bool,
+) -> None:
+    for name, columns in (("hands", hands), ("actions", actions)):
+        path = os.path.join(directory, f"{name}-{chunk_idx:05d}.{file_format}")
+        if file_format == "npz":
+            save = np.savez_compressed if compress else np.savez
+            arrays: Dict[str, Any] = columns
+            save(path, **arrays)
+        else:
+            pyarrow = _import_pyarrow()
+            table = pyarrow.table(
+                {
+                    column_name: list(column) if column.ndim > 1 else column
+                    for column_name, column in columns.items()
+                }
+            )
+            pyarrow.parquet.write_table(table, path)
+
+
+def read_chunks(
+    directory: str,
+) -> Iterator[Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]]:
+    """Reads exported chunks one at a time
+
+    Parameters
+    ----------
+    directory : str
+        export directory
+
+    Yields
+    ------
+    Iterator[Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]]
+        hand columns and action columns of every chunk
+    """
+    for hands_path in sorted(glob.glob(os.path.join(directory, "hands-*"))):
+        yield _read_chunk(hands_path)
+
+
+def _read_chunk(hands_path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    actions_path = hands_path.replace("hands-", "actions-", 1)
+    if hands_path.endswith(".npz"):
+        with np.load(hands_path) as hands, np.load(actions_path) as actions:
+            return dict(hands), dict(actions)
+    pyarrow = _import_pyarrow()
+    return (
+        _from_arrow(pyarrow.parquet.read_table(hands_path)),
+        _from_arrow(pyarrow.parquet.read_table(actions_path)),
+    )
+
+
+def _from_arrow(table: Any) -> Dict[str, np.ndarray]:
+    columns: Dict[str, np.ndarray] = {}
+    for name in table.column_names:
+        column = table.column(name).to_numpy(zero_copy_only=False)
+        if column.dtype == object:
+            column = np.stack(column)
+        columns[name] = column
+    return columns
+
+
+def load(directory: str, columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """Loads the hand columns of all chunks into memory
+
+    Parameters
+    ----------
+    directory : str
+        export directory
+    columns : Optional[List[str]], optional
+        hand columns to load, by default None which loads all columns
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        concatenated hand columns
+    """
+    chunks: Dict[str, List[np.ndarray]] = {}
+    for hands, _ in read_chunks(directory):
+        for name, column in hands.items():
+            if columns is None or name in columns:
+                chunks.setdefault(name, []).append(column)
+    return {name: np.concatenate(column) for name, column in chunks.items()}
@@ -0,0 +1,530 @@
+"""Compact binary hand history format with a streaming writer and a
+generator based reader.
+
+A history file starts with a short file header followed by blocks of
+hand records. Every block is compressed on its own and stores its
+codec, so files can be appended to with any compression. Hand records
+consist of fixed width fields::
+
+    hand header  config id (u32), hand id (u64), button (u8),
+                 num players (u8), num hole cards (u8),
+                 num community cards (u8), num actions (u16)
+    hole cards   num players * num hole cards card codes (u8)
+    community    num community cards card codes (u8)
+    stacks       stack of every player before antes and blinds (i32)
+    seated       seated flag of every player (u8)
+    payouts      payout of every player (i32)
+    actions      player | fold << 7 (u8), bet (u32) per action
+
+Cards are stored as codes ``rank * 4 + suit`` with ranks from deuce to
+ace and suits in the order spades, hearts, diamonds, clubs.
+"""
+import lzma
+import os
+import struct
+import zlib
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from clubs import configs, error
+
+from . import card, engine
+
+MAGIC = b"CLHH"
+VERSION = 1
+
+_FILE_HEADER = struct.Struct("<4sB")
+_BLOCK_HEADER = struct.Struct("<BII")
+_HAND_HEADER = struct.Struct("<IQBBBBH")
+_ACTION = struct.Struct("<BI")
+
+_SUITS = "SHDC"
+CARDS: List[card.Card] = [
+    card.Card(rank + suit) for rank in card.STR_RANKS for suit in _SUITS
+]
+_CODES: Dict[int, int] = {int(card_): code for code, card_ in enumerate(CARDS)}
+
+Codec = Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+COMPRESSIONS: Dict[Optional[str], int] = {
+    None: 0,
+    "zlib": 1,
+    "lzma": 2,
+    "zstd": 3,
+    "lz4": 4,
+}
+
+
+class HandRecord(NamedTuple):
+    """Single hand read from a hand history
+
+    Attributes
+    ----------
+    config_id : int
+        id of the poker configuration, see config_id
+    hand_id : int
+        running id of the hand
+    button : int
+        button position
+    stacks : Tuple[int, ...]
+        stacks before antes and blinds were posted
+    seated : Tuple[bool, ...]
+        seated flag of every player, players who sat out keep their
+        stacks but are not dealt in
+    hole_cards : Tuple[Tuple[card.Card, ...], ...]
+        hole cards of every player
+    community_cards : Tuple[card.Card, ...]
+        community cards in the order they were dealt
+    actions : Tuple[Tuple[int, int, bool], ...]
+        action history as in Dealer.history
+    payouts : Tuple[int, ...]
+        payouts of every player
+    """
+
+    config_id: int
+    hand_id: int
+    button: int
+    stacks: Tuple[int, ...]
+    seated: Tuple[bool, ...]
+    hole_cards: Tuple[Tuple[card.Card, ...], ...]
+    community_cards: Tuple[card.Card, ...]
+    actions: Tuple[Tuple[int, int, bool], ...]
+    payouts: Tuple[int, ...]
+
+
+def encode_card(card_: card.Card) -> int:
+    """Converts a card into its one byte code
+
+    Parameters
+    ----------
+    card_ : card.Card
+        card
+
+    Returns
+    -------
+    int
+        card code
+    """
+    return _CODES[int(card_)]
+
+
+def config_id(config: configs.PokerConfig) -> int:
+    """Computes a stable 32 bit id of a poker configuration
+
+    Parameters
+    ----------
+    config : configs.PokerConfig
+        poker configuration
+
+    Returns
+    -------
+    int
+        configuration id
+    """
+    return zlib.crc32(repr(engine._config_key(config)).encode())
+
+
+def _codec(compression: Optional[str]) -> Codec:
+    if compression is None:
+        return bytes, bytes
+    if compression == "zlib":
+        return zlib.compress, zlib.decompress
+    if compression == "lzma":
+        return lzma.compress, lzma.decompress
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise error.MissingImportsError(
+                "zstd compression requires zstandard, "
+                "install it with: pip install zstandard"
+            )
+        return (
+            zstandard.ZstdCompressor().compress,
+            zstandard.ZstdDecompressor().decompress,
+        )
+    if compression == "lz4":
+        try:
+            import lz4.frame
+        except ImportError:
+            raise error.MissingImportsError(
+                "lz4 compression requires lz4, install it with: pip install lz4"
+            )
+        return lz4.frame.compress, lz4.frame.decompress
+    raise error.InvalidCompressionError(
+        f"unknown compression {compression}, "
+        f"expected one of {list(COMPRESSIONS.keys())}"
+    )
+
+
+def encode_hand(record: HandRecord) -> bytes:
+    """Serializes a hand record
+
+    Parameters
+    ----------
+    record : HandRecord
+        hand record
+
+    Returns
+    -------
+    bytes
+        serialized hand record
+    """
+    num_players = len(record.stacks)
+    num_hole_cards = len(record.hole_cards[0]) if record.hole_cards else 0
+    ints = struct.Struct(f"<{num_players}i")
+    parts = [
+        _HAND_HEADER.pack(
+            record.config_id,
+            record.hand_id,
+            record.button,
+            num_players,
+            num_hole_cards,
+            len(record.community_cards),
+            len(record.actions),
+        ),
+        bytes(_CODES[int(card_)] for hand in record.hole_cards for card_ in hand),
+        bytes(_CODES[int(card_)] for card_ in record.community_cards),
+        ints.pack(*record.stacks),
+        bytes(record.seated),
+        ints.pack(*record.payouts),
+    ]
+    parts.extend(
+        _ACTION.pack(player | fold << 7, bet) for player, bet, fold in record.actions
+    )
+    return b"".join(parts)
+
+
+def decode_hands(buffer: bytes) -> Iterator[HandRecord]:
+    """Deserializes concatenated hand records
+
+    Parameters
+    ----------
+    buffer : bytes
+        serialized hand records
+
+    Yields
+    ------
+    Iterator[HandRecord]
+        hand records
+    """
+    view = memoryview(buffer)
+    offset = 0
+    end = len(buffer)
+    while offset < end:
+        (
+            config,
+            hand_id,
+            button,
+            num_players,
+            num_hole_cards,
+            num_community_cards,
+            num_actions,
+        ) = _HAND_HEADER.unpack_from(view, offset)
+        offset += _HAND_HEADER.size
+
+        hole_cards = tuple(
+            tuple(CARDS[code] for code in view[start : start + num_hole_cards])
+            for start in range(
+                offset, offset + num_players * num_hole_cards, num_hole_cards or 1
+            )
+        )
+        offset += num_players * num_hole_cards
+        community_cards = tuple(
+            CARDS[code] for code in view[offset : offset + num_community_cards]
+        )
+        offset += num_community_cards
+
+        ints = struct.Struct(f"<{num_players}i")
+        stacks = ints.unpack_from(view, offset)
+        offset += ints.size
+        seated = tuple(bool(flag) for flag in view[offset : offset + num_players])
+        offset += num_players
+        payouts = ints.unpack_from(view, offset)
+        offset += ints.size
+
+        actions = tuple(
+            (player & 0x7F, bet, bool(player >> 7))
+            for player, bet in _ACTION.iter_unpack(
+                view[offset : offset + num_actions * _ACTION.size]
+            )
+        )
+        offset += num_actions * _ACTION.size
+
+        yield HandRecord(
+            config,
+            hand_id,
+            button,
+            stacks,
+            seated,
+            hole_cards,
+            community_cards,
+            actions,
+            payouts,
+        )
+
+
+class HistoryWriter(engine.DealerListener):
+    """Streaming writer for binary hand histories. Attach the writer to
+    a dealer and every finished hand is appended to the history. Hands
+    are buffered and written in compressed blocks, call close (or use
+    the writer as a context manager) to write the last block.
+
+    Parameters
+    ----------
+    file : Union[str, os.PathLike, BinaryIO]
+        path or binary file object, existing files are appended to
+    config_id : int, optional
+        id stored with every hand, see config_id, by default 0
+    compression : Optional[str], optional
+        block compression, one of None, 'zlib', 'lzma', 'zstd' or
+        'lz4', by default 'zlib'
+    block_size : int, optional
+        number of uncompressed bytes buffered before a block is
+        written, by default 65536
+    hand_id : Optional[int], optional
+        id of the first hand written, by default None which continues
+        after the last hand of an existing file or starts at 0
+
+    Examples
+    --------
+
+    >>> dealer = Dealer(**configs.LEDUC_TWO_PLAYER)
+    >>> with HistoryWriter("hands.clhh").attach(dealer):
+    ...     dealer.reset()
+    ...     dealer.step(0)
+    ...     dealer.step(0)
+    """
+
+    def __init__(
+        self,
+        file: Union[str, "os.PathLike[str]", BinaryIO],
+        config_id: int = 0,
+        compression: Optional[str] = "zlib",
+        block_size: int = 1 << 16,
+        hand_id: Optional[int] = None,
+    ) -> None:
+        self.compress, _ = _codec(compression)
+        self.codec = COMPRESSIONS[compression]
+        self.config_id = config_id
+        self.block_size = block_size
+        last_hand_id = -1
+
+        if isinstance(file, (str, os.PathLike)):
+            if os.path.exists(file) and os.path.getsize(file):
+                with open(file, "rb") as existing:
+                    last_hand_id = _last_hand_id(existing)
+            self.file: BinaryIO = open(file, "ab")
+            self._owns_file = True
+        else:
+            self.file = file
+            self._owns_file = False
+        if self.file.tell() == 0:
+            self.file.write(_FILE_HEADER.pack(MAGIC, VERSION))
+        self.hand_id = last_hand_id + 1 if hand_id is None else hand_id
+
+        self._buffer: List[bytes] = []
+        self._buffer_size = 0
+        self._button = 0
+        self._stacks: List[int] = []
+        self._seated: List[bool] = []
+
+    def attach(self, dealer: engine.Dealer) -> "HistoryWriter":
+        """Registers the writer as listener of a dealer
+
+        Parameters
+        ----------
+        dealer : engine.Dealer
+            dealer to record
+
+        Returns
+        -------
+        HistoryWriter
+            self
+        """
+        dealer.listeners.append(self)
+        return self
+
+    def on_reset(self, dealer: engine.Dealer) -> None:
+        self._button = dealer.button
+        self._stacks = [
+            stack + commit for stack, commit in zip(dealer.stacks, dealer.pot_commits)
+        ]
+        self._seated = list(dealer.seated)
+
+    def on_step(
+        self, dealer: engine.Dealer, payouts: List[int], done: List[bool]
+    ) -> None:
+        if not all(done):
+            return
+        self.write(
+            HandRecord(
+                self.config_id,
+                self.hand_id,
+                self._button,
+                tuple(self._stacks),
+                tuple(self._seated),
+                tuple(tuple(hand) for hand in dealer.hole_cards),
+                tuple(dealer.community_cards),
+                tuple(dealer.history),
+                tuple(payouts),
+            )
+        )
+        self.hand_id += 1
+
+    def write(self, record: HandRecord) -> None:
+        """Appends a hand record to the history
+
+        Parameters
+        ----------
+        record : HandRecord
+            hand record
+        """
+        data = encode_hand(record)
+        self._buffer.append(data)
+        self._buffer_size += len(data)
+        if self._buffer_size >= self.block_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes all buffered hands as a block"""
+        if not self._buffer:
+            return
+        raw = b"".join(self._buffer)
+        compressed = self.compress(raw)
+        self.file.write(_BLOCK_HEADER.pack(self.codec, len(compressed), len(raw)))
+        self.file.write(compressed)
+        self.file.flush()
+        self._buffer = []
+        self._buffer_size = 0
+
+    def close(self) -> None:
+        """Writes the last block and closes the file if it was opened
+        by the writer"""
+        self.flush()
+        if self._owns_file:
+            self.file.close()
+
+    def __enter__(self) -> "HistoryWriter":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+def _read_header(file: BinaryIO) -> None:
+    header = file.read(_FILE_HEADER.size)
+    if len(header) < _FILE_HEADER.size:
+        raise error.InvalidHistoryError("truncated file header")
+    magic, version = _FILE_HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise error.InvalidHistoryError(
+            f"not a clubs hand history or unsupported version {version}"
+        )
+
+
+def _read_blocks(file: BinaryIO) -> Iterator[bytes]:
+    decompressors: Dict[int, Callable[[bytes], bytes]] = {}
+    codecs = {value: key for key, value in COMPRESSIONS.items()}
+    while True:
+        header = file.read(_BLOCK_HEADER.size)
+        if not header:
+            break
+        if len(header) < _BLOCK_HEADER.size:
+            raise error.InvalidHistoryError("truncated block header")
+        codec, compressed_size, raw_size = _BLOCK_HEADER.unpack(header)
+        if codec not in codecs:
+            raise error.InvalidHistoryError(f"unknown block codec {codec}")
+        if codec not in decompressors:
+            decompressors[codec] = _codec(codecs[codec])[1]
+        compressed = file.read(compressed_size)
+        if len(compressed) < compressed_size:
+            raise error.InvalidHistoryError("truncated block")
+        raw = decompressors[codec](compressed)
+        if len(raw) != raw_size:
+            raise error.InvalidHistoryError("corrupt block")
+        yield raw
+
+
+def _last_hand_id(file: BinaryIO) -> int:
+    # id of the last hand of a history or -1, skips to the last block
+    # so only that block is decompressed
+    _read_header(file)
+    last_block = file.tell()
+    while True:
+        start = file.tell()
+        header = file.read(_BLOCK_HEADER.size)
+        if len(header) < _BLOCK_HEADER.size:
+            break
+        last_block = start
+        file.seek(_BLOCK_HEADER.unpack(header)[1], os.SEEK_CUR)
+    file.seek(last_block)
+    hand_id = -1
+    for raw in _read_blocks(file):
+        for record in decode_hands(raw):
+            hand_id = record.hand_id
+    return hand_id
+
+
+def read_history(
+    file: Union[str, "os.PathLike[str]", BinaryIO]
+) -> Iterator[HandRecord]:
+    """Reads hands from a binary hand history. Blocks are read and
+    decompressed one at a time, so arbitrarily large histories can be
+    streamed.
+
+    Parameters
+    ----------
+    file : Union[str, os.PathLike, BinaryIO]
+        path or binary file object
+
+    Yields
+    ------
+    Iterator[HandRecord]
+        hand records in the order they were written
+
+    Examples
+    --------
+
+    >>> for hand in read_history("hands.clhh"):
+    ...     print(hand.hand_id, hand.payouts)
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as opened:
+            yield from read_history(opened)
+        return
+
+    _read_header(file)
+    for raw in _read_blocks(file):
+        yield from decode_hands(raw)
+
+
+def write_history(
+    file: Union[str, "os.PathLike[str]", BinaryIO],
+    records: Iterable[HandRecord],
+    compression: Optional[str] = "zlib",
+) -> None:
+    """Writes hand records to a binary hand history
+
+    Parameters
+    ----------
+    file : Union[str, os.PathLike, BinaryIO]
+        path or binary file object
+    records : Iterable[HandRecord]
+        hand records
+    compression : Optional[str], optional
+        block compression, by default 'zlib'
+    """
+    writer = HistoryWriter(file, compression=compression)
+    for record in records:
+        writer.write(record)
+    writer.close()
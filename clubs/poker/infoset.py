@@ -0,0 +1,230 @@
+"""Incremental information set keys for solver and agent lookup tables.
+
+An information set tracker listens to a dealer and keeps the public part
+of the acting player's information set as a byte string which grows
+with every step, so keys are not rebuilt from Dealer.history at every
+decision. The public part starts a bucket for every street with the
+community cards dealt on that street, followed by the actions of the
+street::
+
+    street header  0xFF, street (u8), num cards (u8), card codes (u8)
+    action         player | fold << 7 (u8), bet (u32)
+
+Card codes are the one byte codes of the binary hand history format.
+The exact key of a player appends the player (u8) and their hole card
+codes to the public part, the compact key is the 64 bit FNV-1a hash of
+the exact key.
+
+exploitability.InfoSet.key identifies the same information sets for
+policy tables built from game trees. It holds card strings and the full
+history tuple and is rebuilt for every lookup, which is quadratic in
+the length of a hand when played online. The tracker's keys are bytes
+extended by every step, so they are kept as a separate scheme for
+lookup tables filled from played hands.
+"""
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from clubs import error, poker
+
+from . import engine, history
+
+FNV_OFFSET = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+_MASK = (1 << 64) - 1
+
+_ACTION = struct.Struct("<BI")
+_STREET = 0xFF
+
+
+def fnv1a64(data: bytes, state: int = FNV_OFFSET) -> int:
+    """64 bit FNV-1a hash, continues from state to hash data
+    incrementally
+
+    Parameters
+    ----------
+    data : bytes
+        data to hash
+    state : int, optional
+        hash of the preceding data, by default FNV_OFFSET
+
+    Returns
+    -------
+    int
+        hash
+    """
+    for byte in data:
+        state = ((state ^ byte) * FNV_PRIME) & _MASK
+    return state
+
+
+class _Checkpoint:
+    # street and number of community cards after an action, children
+    # are keyed by the next action so restored states of any explored
+    # line of the hand can be rebuilt
+    def __init__(self, street: int, num_cards: int) -> None:
+        self.street = street
+        self.num_cards = num_cards
+        self.children: Dict[Tuple[int, int, bool], _Checkpoint] = {}
+
+
+class InfoSetTracker(engine.DealerListener):
+    """Tracks information set keys of a dealer. The tracker is updated
+    by reset and step, after Dealer.restore and Dealer.undo the keys are
+    rebuilt from the dealer's history. The tracker remembers the street
+    of every action stepped since the last reset to do so. After
+    restoring a state of a different hand all keys raise an error until
+    the next reset.
+
+    Parameters
+    ----------
+    dealer : engine.Dealer
+        dealer to track, the tracker registers itself as listener
+
+    Examples
+    --------
+
+    >>> dealer = Dealer(**configs.NO_LIMIT_HOLDEM_SIX_PLAYER)
+    >>> tracker = InfoSetTracker(dealer)
+    >>> obs = dealer.reset()
+    >>> while not all(dealer.step(strategy[tracker.hash()].sample())[2]):
+    ...     pass
+    """
+
+    def __init__(self, dealer: engine.Dealer) -> None:
+        self.dealer = dealer
+        self.public = bytearray()
+        self.public_hash = FNV_OFFSET
+        self._street = 0
+        self._num_cards = 0
+        self._num_actions = 0
+        self._hole_cards: List[bytes] = []
+        # restored states of the tracked hand share its hole cards
+        self._hand: Optional[List[List[poker.Card]]] = None
+        # checkpoints of all actions stepped in the hand, the current
+        # checkpoint is None while the tracker is out of sync
+        self._root = _Checkpoint(0, 0)
+        self._checkpoint: Optional[_Checkpoint] = None
+        dealer.listeners.append(self)
+        # join a dealer in the middle of a hand only if its history is
+        # empty, otherwise wait for the next reset
+        if dealer.hole_cards and not dealer.history:
+            self.on_reset(dealer)
+        else:
+            self._num_actions = -1
+
+    def on_reset(self, dealer: engine.Dealer) -> None:
+        self._hand = dealer.hole_cards
+        self._hole_cards = [
+            bytes(history.encode_card(card) for card in cards)
+            for cards in dealer.hole_cards
+        ]
+        self._root = _Checkpoint(0, len(dealer.community_cards))
+        self._start(dealer)
+
+    def on_step(
+        self, dealer: engine.Dealer, payouts: List[int], done: List[bool]
+    ) -> None:
+        if self._checkpoint is None:
+            return
+        action = dealer.history[-1]
+        checkpoint = self._checkpoint.children.get(action)
+        if checkpoint is None:
+            checkpoint = _Checkpoint(dealer.street, len(dealer.community_cards))
+            self._checkpoint.children[action] = checkpoint
+        self._step(dealer, action, checkpoint)
+
+    def on_restore(self, dealer: engine.Dealer) -> None:
+        if dealer.hole_cards is not self._hand:
+            self._num_actions = -1
+            self._checkpoint = None
+            return
+        self._start(dealer)
+        checkpoint = self._root
+        for action in dealer.history:
+            child = checkpoint.children.get(action)
+            if child is None:
+                # the state was not reached by stepping this dealer
+                self._num_actions = -1
+                self._checkpoint = None
+                return
+            checkpoint = child
+            self._step(dealer, action, checkpoint)
+
+    def _start(self, dealer: engine.Dealer) -> None:
+        self.public = bytearray()
+        self.public_hash = FNV_OFFSET
+        self._street = 0
+        self._num_cards = 0
+        self._num_actions = 0
+        self._checkpoint = self._root
+        self._deal(dealer.community_cards[: self._root.num_cards])
+
+    def _step(
+        self,
+        dealer: engine.Dealer,
+        action: Tuple[int, int, bool],
+        checkpoint: _Checkpoint,
+    ) -> None:
+        player, bet, fold = action
+        self._append(_ACTION.pack(player | fold << 7, bet))
+        self._num_actions += 1
+        self._checkpoint = checkpoint
+        if checkpoint.street != self._street:
+            self._street = checkpoint.street
+            self._deal(dealer.community_cards[self._num_cards : checkpoint.num_cards])
+
+    def _deal(self, cards: List[poker.Card]) -> None:
+        self._num_cards += len(cards)
+        self._append(
+            bytes((_STREET, self._street, len(cards)))
+            + bytes(history.encode_card(card) for card in cards)
+        )
+
+    def _append(self, data: bytes) -> None:
+        self.public += data
+        self.public_hash = fnv1a64(data, self.public_hash)
+
+    def _private(self, player: Optional[int]) -> bytes:
+        if self._num_actions != len(self.dealer.history):
+            raise error.InvalidHistoryError(
+                "information set tracker is out of sync with the dealer "
+                "history, keys are available again after the next reset"
+            )
+        if player is None:
+            player = self.dealer.action
+        if not 0 <= player < len(self._hole_cards):
+            raise error.InvalidSeatError(f"no information set for player {player}")
+        return bytes((player,)) + self._hole_cards[player]
+
+    def key(self, player: Optional[int] = None) -> bytes:
+        """Exact canonical key of a player's information set
+
+        Parameters
+        ----------
+        player : Optional[int], optional
+            player, by default None which uses the acting player
+
+        Returns
+        -------
+        bytes
+            public actions and cards bucketed by street, followed by
+            the player and their hole cards
+        """
+        return bytes(self.public) + self._private(player)
+
+    def hash(self, player: Optional[int] = None) -> int:
+        """Compact 64 bit key of a player's information set, the
+        FNV-1a hash of the exact key
+
+        Parameters
+        ----------
+        player : Optional[int], optional
+            player, by default None which uses the acting player
+
+        Returns
+        -------
+        int
+            unsigned 64 bit hash
+        """
+        return fnv1a64(self._private(player), self.public_hash)
@@ -0,0 +1,219 @@
+"""Opt-in instrumentation of dealers and evaluators.
+
+A profiler wraps the methods of individual dealer, deck, evaluator and
+lookup table instances with counting timers. The classes themselves are
+never modified, so dealers without an attached profiler run exactly the
+same code as before and pay no overhead. Times are inclusive, e.g. the
+time of Dealer.step contains the time of the hand evaluation at
+showdown.
+"""
+import copy
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import engine, evaluator
+
+# timed methods of every instrumented object, lookup table lookups run
+# for every card combination of an evaluation and are only counted to
+# keep the overhead of profiling low
+DEALER_METHODS = [
+    "reset",
+    "step",
+    "_bet_sizes",
+    "_observation",
+    "_payouts",
+    "_eval_round",
+]
+DECK_METHODS = ["draw", "shuffle"]
+EVALUATOR_METHODS = ["evaluate"]
+
+
+class Profiler:
+    """Collects call counts and inclusive times of dealer, deck,
+    evaluator and lookup table methods. A single profiler can be
+    attached to any number of dealers and aggregates over all of them.
+
+    Examples
+    --------
+
+    >>> profiler = Profiler()
+    >>> dealer = profiler.attach(Dealer(**configs.NO_LIMIT_HOLDEM_SIX_PLAYER))
+    >>> for _ in range(1000):
+    ...     obs = dealer.reset(reset_stacks=True)
+    ...     while not all(dealer.step(obs["call"])[2]):
+    ...         pass
+    >>> profiler.as_dict()["evaluator.evaluate"]
+    {'calls': 21349, 'seconds': 1.09}
+    >>> print(profiler.to_prometheus())
+    """
+
+    def __init__(self) -> None:
+        self.calls: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        # objects and attributes replaced by attach, restored by detach
+        self._wrapped: List[Tuple[Any, str, Any]] = []
+
+    def _wrap(self, obj: Any, attr: str, name: str, timed: bool = True) -> None:
+        method = getattr(obj, attr)
+        calls = self.calls
+        seconds = self.seconds
+        calls.setdefault(name, 0)
+        wrapper: Callable[..., Any]
+        if timed:
+            seconds.setdefault(name, 0.0)
+            perf_counter = time.perf_counter
+
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    seconds[name] += perf_counter() - start
+                    calls[name] += 1
+
+        else:
+
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                calls[name] += 1
+                return method(*args, **kwargs)
+
+        self._wrapped.append((obj, attr, obj.__dict__.get(attr)))
+        setattr(obj, attr, wrapper)
+
+    def _replace(self, obj: Any, attr: str, value: Any) -> None:
+        self._wrapped.append((obj, attr, obj.__dict__.get(attr)))
+        setattr(obj, attr, value)
+
+    def attach(self, dealer: engine.Dealer) -> engine.Dealer:
+        """Instruments a dealer, its deck and its evaluator. Dealers
+        created with Dealer.from_config share their evaluator, the
+        dealer is given a shallow copy of the evaluator so other
+        dealers are not instrumented.
+
+        Parameters
+        ----------
+        dealer : engine.Dealer
+            dealer to instrument
+
+        Returns
+        -------
+        engine.Dealer
+            the instrumented dealer
+        """
+        for attr in DEALER_METHODS:
+            self._wrap(dealer, attr, f"dealer.{attr.lstrip('_')}")
+        for attr in DECK_METHODS:
+            self._wrap(dealer.deck, attr, f"deck.{attr}")
+        self._replace(dealer, "evaluator", copy.copy(dealer.evaluator))
+        self.attach_evaluator(dealer.evaluator)
+        return dealer
+
+    def attach_evaluator(
+        self, hand_evaluator: evaluator.Evaluator
+    ) -> evaluator.Evaluator:
+        """Instruments an evaluator and its lookup table. The evaluator
+        is given a shallow copy of its lookup table, which shares the
+        table data with the original.
+
+        Parameters
+        ----------
+        hand_evaluator : evaluator.Evaluator
+            evaluator to instrument
+
+        Returns
+        -------
+        evaluator.Evaluator
+            the instrumented evaluator
+        """
+        for attr in EVALUATOR_METHODS:
+            self._wrap(hand_evaluator, attr, f"evaluator.{attr}")
+        self._replace(hand_evaluator, "table", copy.copy(hand_evaluator.table))
+        self._wrap(hand_evaluator.table, "lookup", "lookup_table.lookup", timed=False)
+        return hand_evaluator
+
+    def detach(self) -> None:
+        """Removes the instrumentation of all attached objects"""
+        for obj, attr, original in reversed(self._wrapped):
+            if original is None:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, original)
+        self._wrapped = []
+
+    def clear(self) -> None:
+        """Resets all counters and timers to zero"""
+        for name in self.calls:
+            self.calls[name] = 0
+        for name in self.seconds:
+            self.seconds[name] = 0.0
+
+    @property
+    def lookups_per_evaluate(self) -> float:
+        """Average number of lookup table lookups per evaluation
+
+        Returns
+        -------
+        float
+            lookups per evaluate call
+        """
+        evaluations = self.calls.get("evaluator.evaluate", 0)
+        if not evaluations:
+            return 0.0
+        return self.calls.get("lookup_table.lookup", 0) / evaluations
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """Returns calls and seconds of every instrumented method, counted
+        methods only have calls
+
+        Returns
+        -------
+        Dict[str, Dict[str, float]]
+            calls and seconds per method name
+        """
+        stats: Dict[str, Dict[str, float]] = {}
+        for name, calls in self.calls.items():
+            stats[name] = {"calls": calls}
+            if name in self.seconds:
+                stats[name]["seconds"] = self.seconds[name]
+        return stats
+
+    def to_prometheus(
+        self, prefix: str = "clubs", labels: Optional[Dict[str, str]] = None
+    ) -> str:
+        """Exports counters and timers in the Prometheus text exposition
+        format
+
+        Parameters
+        ----------
+        prefix : str, optional
+            metric name prefix, by default "clubs"
+        labels : Optional[Dict[str, str]], optional
+            additional labels of every sample, e.g. {"table": "1"}, by
+            default None
+
+        Returns
+        -------
+        str
+            metrics in Prometheus text format
+        """
+        extra = "".join(f',{key}="{value}"' for key, value in (labels or {}).items())
+        lines = [
+            f"# HELP {prefix}_calls_total Number of calls of an instrumented method.",
+            f"# TYPE {prefix}_calls_total counter",
+        ]
+        lines.extend(
+            f'{prefix}_calls_total{{method="{name}"{extra}}} {calls}'
+            for name, calls in self.calls.items()
+        )
+        lines.extend(
+            [
+                f"# HELP {prefix}_seconds_total Inclusive time spent in an "
+                "instrumented method.",
+                f"# TYPE {prefix}_seconds_total counter",
+            ]
+        )
+        lines.extend(
+            f'{prefix}_seconds_total{{method="{name}"{extra}}} {seconds!r}'
+            for name, seconds in self.seconds.items()
+        )
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,199 @@
+"""Functions to deterministically replay hands from hand history records"""
+import multiprocessing
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from clubs import configs, error
+
+from . import engine, history
+
+
+class ReplayStep(NamedTuple):
+    """Single decision of a replayed hand
+
+    Attributes
+    ----------
+    observation : engine.ObservationDict
+        observation of the acting player before the action
+    action : Tuple[int, int, bool]
+        acting player, bet and fold flag as in Dealer.history
+    payouts : List[float]
+        payouts after the action
+    done : List[bool]
+        done flags after the action
+    """
+
+    observation: engine.ObservationDict
+    action: Tuple[int, int, bool]
+    payouts: List[float]
+    done: List[bool]
+
+
+def _copy_observation(observation: engine.ObservationDict) -> engine.ObservationDict:
+    # the dealer updates these lists in place
+    copied = observation.copy()
+    copied["active"] = list(observation["active"])
+    copied["stacks"] = list(observation["stacks"])
+    copied["street_commits"] = list(observation["street_commits"])
+    return copied
+
+
+def replay_hand(
+    record: history.HandRecord,
+    config: configs.PokerConfig,
+    dealer: Optional[engine.Dealer] = None,
+) -> Iterator[ReplayStep]:
+    """Replays a hand from a hand history record. The deck is tricked
+    to deal the recorded cards and the recorded actions are stepped
+    through, raising an error if the replay diverges from the record.
+
+    Parameters
+    ----------
+    record : history.HandRecord
+        hand record
+    config : configs.PokerConfig
+        poker configuration the hand was played with
+    dealer : Optional[engine.Dealer], optional
+        dealer to replay the hand with, reusing a dealer avoids
+        constructing one per hand, by default None
+
+    Yields
+    ------
+    Iterator[ReplayStep]
+        observation, action, payouts and done flags of every decision
+
+    Examples
+    --------
+
+    >>> for hand in history.read_history("hands.clhh"):
+    ...     for step in replay_hand(hand, configs.LEDUC_TWO_PLAYER):
+    ...         print(step.observation["hole_cards"], step.action)
+    """
+    if dealer is None:
+        dealer = engine.Dealer.from_config(config)
+    if len(record.stacks) != dealer.num_players:
+        raise error.ReplayMismatchError(
+            f"hand {record.hand_id} has {len(record.stacks)} players, "
+            f"config has {dealer.num_players}"
+        )
+
+    # cards are dealt preflop community cards first, then hole cards
+    num_preflop = dealer.num_community_cards[0]
+    order = list(record.community_cards[:num_preflop])
+    for hole_cards in record.hole_cards:
+        order.extend(hole_cards)
+    order.extend(record.community_cards[num_preflop:])
+    dealer.deck.trick(order)
+    dealer.button = (record.button - 1) % dealer.num_players
+    dealer.stacks = list(record.stacks)
+    dealer.seated = list(record.seated)
+    observation = dealer.reset()
+    dealer.deck.untrick()
+
+    payouts: List[float] = []
+    for action in record.actions:
+        player, bet, fold = action
+        if player != dealer.action:
+            raise error.ReplayMismatchError(
+                f"hand {record.hand_id}: expected action on player "
+                f"{dealer.action}, record has player {player}"
+            )
+        previous = _copy_observation(observation)
+        observation, payouts, done = dealer.step(-1 if fold else bet)
+        if dealer.history[-1] != action:
+            raise error.ReplayMismatchError(
+                f"hand {record.hand_id}: replayed action {dealer.history[-1]} "
+                f"does not match recorded action {action}"
+            )
+        yield ReplayStep(previous, action, payouts, done)
+
+    if dealer.action != -1 or tuple(payouts) != record.payouts:
+        raise error.ReplayMismatchError(
+            f"hand {record.hand_id}: replay did not reproduce the recorded payouts"
+        )
+
+
+Transform = Callable[[history.HandRecord, List[ReplayStep]], object]
+
+_WORKER_CONFIG: Optional[configs.PokerConfig] = None
+_WORKER_DEALER: Optional[engine.Dealer] = None
+_WORKER_TRANSFORM: Optional[Transform] = None
+
+
+def _init_worker(config: configs.PokerConfig, transform: Optional[Transform]) -> None:
+    global _WORKER_CONFIG, _WORKER_DEALER, _WORKER_TRANSFORM
+    _WORKER_CONFIG = config
+    _WORKER_DEALER = engine.Dealer.from_config(config)
+    _WORKER_TRANSFORM = transform
+
+
+def _replay_chunk(chunk: bytes) -> List[object]:
+    # records are sent as encoded bytes, which pickle much smaller
+    # and faster than records holding card objects
+    assert _WORKER_CONFIG is not None
+    results = []
+    for record in history.decode_hands(chunk):
+        steps = list(replay_hand(record, _WORKER_CONFIG, _WORKER_DEALER))
+        if _WORKER_TRANSFORM is not None:
+            results.append(_WORKER_TRANSFORM(record, steps))
+        else:
+            results.append(steps)
+    return results
+
+
+def _chunks(records: Iterable[history.HandRecord], chunk_size: int) -> Iterator[bytes]:
+    chunk: List[bytes] = []
+    for record in records:
+        chunk.append(history.encode_hand(record))
+        if len(chunk) == chunk_size:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
+
+
+def replay_hands(
+    records: Iterable[history.HandRecord],
+    config: configs.PokerConfig,
+    transform: Optional[Transform] = None,
+    processes: Optional[int] = 1,
+    chunk_size: int = 256,
+) -> Iterator[object]:
+    """Replays many hands, optionally in parallel worker processes.
+    Every worker keeps a single dealer for all of its hands. To avoid
+    sending observations back to the main process, pass a transform
+    which converts the replayed steps of a hand into training data
+    inside the worker. The transform must be picklable, i.e. defined
+    at module level.
+
+    Parameters
+    ----------
+    records : Iterable[history.HandRecord]
+        hand records, e.g. from history.read_history
+    config : configs.PokerConfig
+        poker configuration the hands were played with
+    transform : Optional[Transform], optional
+        function called with the record and the list of replay steps
+        of every hand, by default None which returns the replay steps
+    processes : Optional[int], optional
+        number of worker processes, None uses all cpus and 1 replays
+        in the current process, by default 1
+    chunk_size : int, optional
+        number of hands sent to a worker at once, by default 256
+
+    Yields
+    ------
+    Iterator[object]
+        replay steps or transformed result of every hand in order
+    """
+    if processes == 1:
+        dealer = engine.Dealer.from_config(config)
+        for record in records:
+            steps = list(replay_hand(record, config, dealer))
+            yield steps if transform is None else transform(record, steps)
+        return
+
+    with multiprocessing.Pool(
+        processes, initializer=_init_worker, initargs=(config, transform)
+    ) as pool:
+        for results in pool.imap(_replay_chunk, _chunks(records, chunk_size)):
+            yield from results
@@ -0,0 +1,465 @@
+"""Asyncio dealer service hosting many tables for remote agents.
+
+Agents connect over TCP or a unix socket and exchange newline delimited
+json messages with the service. All tables run as tasks on a single
+event loop, a table advances as soon as the acting seat responds. Seats
+which do not respond within the action timeout or whose connection is
+closed check or fold.
+
+Messages of the agents::
+
+    {"type": "join", "table": "0", "seat": 1}
+    {"type": "action", "table": "0", "seat": 1, "id": 7, "bet": 10}
+
+Messages of the service::
+
+    {"type": "joined", "table": "0", "seat": 1}
+    {"type": "observation", "table": "0", "seat": 1, "id": 7,
+     "observation": {...}}
+    {"type": "hand", "table": "0", "seat": 1, "payouts": [...],
+     "hole_cards": [...], "community_cards": [...]}
+    {"type": "closed", "table": "0", "seat": 1}
+    {"type": "error", "message": "...", "request": "join", "table": "0",
+     "seat": 1}
+
+Observations are the dealer observations of the acting seat with cards
+as strings. Every observation of a table has a new id which the action
+has to echo, actions answering an earlier observation, e.g. after a
+timeout, are ignored. Errors repeat the type, table and seat of the
+message which caused them. A table starts dealing when every seat is
+taken and sends "closed" after its last hand.
+"""
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from clubs import configs, error
+
+from . import engine
+from .evaluation import Agent
+
+Seat = Tuple[str, int]
+
+
+def _jsonify_observation(observation: engine.ObservationDict) -> Dict[str, Any]:
+    json_observation: Dict[str, Any] = {**observation}
+    for key, value in observation.items():
+        if isinstance(value, list):
+            json_observation[key] = [
+                str(item) if key.endswith("cards") else item for item in value
+            ]
+    return json_observation
+
+
+class _Connection:
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.closed = False
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        if self.closed:
+            return
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            self.closed = True
+
+
+class _Table:
+    def __init__(
+        self,
+        table_id: str,
+        dealer: engine.Dealer,
+        num_hands: Optional[int],
+        reset_stacks: bool,
+    ) -> None:
+        self.table_id = table_id
+        self.dealer = dealer
+        self.num_hands = num_hands
+        self.reset_stacks = reset_stacks
+        self.seats: List[Optional[_Connection]] = [None] * dealer.num_players
+        self.num_played = 0
+        # id of the last observation sent
+        self.observation_id = 0
+        # seat, observation id and future of the action the table is
+        # waiting for
+        self.pending: Optional[Tuple[int, int, "asyncio.Future[float]"]] = None
+        self.task: Optional["asyncio.Task[None]"] = None
+
+
+class DealerService:
+    """Hosts dealer tables for remote agents on a single event loop
+
+    Parameters
+    ----------
+    action_timeout : float, optional
+        seconds a seat has to respond to an observation, by default 10
+    timeout_action : float, optional
+        bet of seats which time out or are disconnected, by default -1
+        which checks if possible and folds otherwise
+
+    Examples
+    --------
+
+    >>> async def main():
+    ...     service = DealerService(action_timeout=1)
+    ...     for table_id in range(1000):
+    ...         service.add_table(str(table_id), configs.LEDUC_TWO_PLAYER, 100)
+    ...     await service.start(port=8765)
+    ...     await service.wait_closed()
+    >>> asyncio.run(main())
+
+    every seat is played by a remote agent, e.g.
+
+    >>> seats = [(str(table_id), 0) for table_id in range(1000)]
+    >>> asyncio.run(run_agent(agent, seats, port=8765))
+    """
+
+    def __init__(self, action_timeout: float = 10, timeout_action: float = -1) -> None:
+        self.action_timeout = action_timeout
+        self.timeout_action = timeout_action
+        self.tables: Dict[str, _Table] = {}
+        self.num_timeouts = 0
+        self.server: Optional[asyncio.Server] = None
+        self._connections: List[_Connection] = []
+        # set when every table has dealt its hands, created in start
+        # so it belongs to the running event loop
+        self._tables_closed: Optional[asyncio.Event] = None
+        self._num_closed = 0
+
+    def add_table(
+        self,
+        table_id: str,
+        config: configs.PokerConfig,
+        num_hands: Optional[int] = None,
+        reset_stacks: bool = True,
+    ) -> engine.Dealer:
+        """Adds a table, the table starts dealing when every seat is
+        taken
+
+        Parameters
+        ----------
+        table_id : str
+            unique table id
+        config : configs.PokerConfig
+            poker configuration
+        num_hands : Optional[int], optional
+            number of hands to deal, by default None which deals until
+            the service is closed
+        reset_stacks : bool, optional
+            reset stacks before every hand, by default True, otherwise
+            the table closes once fewer than two seated players have
+            chips
+
+        Returns
+        -------
+        engine.Dealer
+            dealer of the table
+        """
+        if table_id in self.tables:
+            raise error.InvalidConfigError(f"table {table_id} already exists")
+        dealer = engine.Dealer.from_config(config)
+        self.tables[table_id] = _Table(table_id, dealer, num_hands, reset_stacks)
+        return dealer
+
+    async def start(
+        self, host: str = "127.0.0.1", port: int = 0, path: Optional[str] = None
+    ) -> None:
+        """Starts accepting agent connections
+
+        Parameters
+        ----------
+        host : str, optional
+            tcp host, by default "127.0.0.1"
+        port : int, optional
+            tcp port, by default 0 which picks a free port
+        path : Optional[str], optional
+            unix socket path, used instead of tcp if given, by default
+            None
+        """
+        self._tables_closed = asyncio.Event()
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port)
+
+    @property
+    def port(self) -> int:
+        """Tcp port the service listens on
+
+        Returns
+        -------
+        int
+            port
+        """
+        assert self.server is not None
+        return int(self.server.sockets[0].getsockname()[1])
+
+    async def wait_closed(self) -> None:
+        """Waits until every table has dealt its hands"""
+        assert self._tables_closed is not None, "service is not started"
+        await self._tables_closed.wait()
+
+    async def close(self) -> None:
+        """Stops all tables and closes all connections"""
+        for table in self.tables.values():
+            if table.task is not None:
+                table.task.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for connection in self._connections:
+            connection.closed = True
+            connection.writer.close()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = _Connection(writer)
+        self._connections.append(connection)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message: Any = None
+                try:
+                    message = json.loads(line)
+                    await self._dispatch(connection, message)
+                except (
+                    ValueError,
+                    KeyError,
+                    TypeError,
+                    error.InvalidConfigError,
+                    error.InvalidSeatError,
+                ) as exception:
+                    response: Dict[str, Any] = {
+                        "type": "error",
+                        "message": str(exception),
+                    }
+                    if isinstance(message, dict):
+                        response["request"] = message.get("type")
+                        response["table"] = message.get("table")
+                        response["seat"] = message.get("seat")
+                    await connection.send(response)
+        except ConnectionError:
+            pass
+        finally:
+            connection.closed = True
+            self._connections.remove(connection)
+            # tables waiting for this connection continue without it
+            for table in self.tables.values():
+                if table.pending is None:
+                    continue
+                seat, _, future = table.pending
+                if table.seats[seat] is connection and not future.done():
+                    future.set_result(self.timeout_action)
+            writer.close()
+
+    def _table(self, message: Dict[str, Any]) -> Tuple[_Table, int]:
+        table_id = str(message["table"])
+        if table_id not in self.tables:
+            raise error.InvalidConfigError(f"unknown table {table_id}")
+        table = self.tables[table_id]
+        seat = int(message["seat"])
+        if not 0 <= seat < len(table.seats):
+            raise error.InvalidSeatError(
+                f"seat {seat} out of range, table {table_id} has "
+                f"{len(table.seats)} seats"
+            )
+        return table, seat
+
+    async def _dispatch(self, connection: _Connection, message: Dict[str, Any]) -> None:
+        table, seat = self._table(message)
+        if message["type"] == "join":
+            if table.seats[seat] is not None:
+                raise error.InvalidSeatError(
+                    f"seat {seat} of table {table.table_id} is taken"
+                )
+            table.seats[seat] = connection
+            await connection.send(
+                {"type": "joined", "table": table.table_id, "seat": seat}
+            )
+            if table.task is None and all(table.seats):
+                table.task = asyncio.ensure_future(self._play(table))
+        elif message["type"] == "action":
+            observation_id = int(message["id"])
+            if table.seats[seat] is not connection:
+                raise error.InvalidSeatError(
+                    f"seat {seat} of table {table.table_id} is not acting"
+                )
+            if (
+                table.pending is None
+                or table.pending[0] != seat
+                or table.pending[1] != observation_id
+            ):
+                # late answers to earlier observations are dropped
+                if 0 < observation_id <= table.observation_id:
+                    return
+                raise error.InvalidSeatError(
+                    f"seat {seat} of table {table.table_id} is not acting"
+                )
+            future = table.pending[2]
+            if not future.done():
+                future.set_result(float(message["bet"]))
+        else:
+            raise ValueError(f"unknown message type {message['type']}")
+
+    async def _act(
+        self, table: _Table, seat: int, observation: engine.ObservationDict
+    ) -> float:
+        connection = table.seats[seat]
+        if connection is None or connection.closed:
+            return self.timeout_action
+        future: "asyncio.Future[float]" = asyncio.get_running_loop().create_future()
+        table.observation_id += 1
+        table.pending = (seat, table.observation_id, future)
+        try:
+            await connection.send(
+                {
+                    "type": "observation",
+                    "table": table.table_id,
+                    "seat": seat,
+                    "id": table.observation_id,
+                    "observation": _jsonify_observation(observation),
+                }
+            )
+            return await asyncio.wait_for(future, self.action_timeout)
+        except asyncio.TimeoutError:
+            self.num_timeouts += 1
+            return self.timeout_action
+        finally:
+            table.pending = None
+
+    async def _play(self, table: _Table) -> None:
+        dealer = table.dealer
+        try:
+            while table.num_hands is None or table.num_played < table.num_hands:
+                # tables without agents stop, tables with disconnected seats
+                # play without waiting, yield to the other tables every hand
+                if all(
+                    connection is None or connection.closed
+                    for connection in table.seats
+                ):
+                    break
+                # without resetting stacks the table stops once all but
+                # one player busted
+                if not table.reset_stacks and (
+                    sum(
+                        seated and stack > 0
+                        for seated, stack in zip(dealer.seated, dealer.stacks)
+                    )
+                    < 2
+                ):
+                    break
+                await asyncio.sleep(0)
+                await self._play_hand(table)
+        finally:
+            for seat, connection in enumerate(table.seats):
+                if connection is not None:
+                    await connection.send(
+                        {"type": "closed", "table": table.table_id, "seat": seat}
+                    )
+            self._num_closed += 1
+            if self._num_closed == len(self.tables) and self._tables_closed is not None:
+                self._tables_closed.set()
+
+    async def _play_hand(self, table: _Table) -> None:
+        dealer = table.dealer
+        obs = dealer.reset(reset_stacks=table.reset_stacks)
+        done = [False]
+        payouts: List[float] = []
+        while not all(done):
+            bet = await self._act(table, obs["action"], obs)
+            obs, payouts, done = dealer.step(bet)
+        table.num_played += 1
+        hole_cards = [[str(card) for card in cards] for cards in dealer.hole_cards]
+        community_cards = [str(card) for card in dealer.community_cards]
+        for seat, connection in enumerate(table.seats):
+            if connection is not None:
+                await connection.send(
+                    {
+                        "type": "hand",
+                        "table": table.table_id,
+                        "seat": seat,
+                        "payouts": payouts,
+                        "hole_cards": hole_cards,
+                        "community_cards": community_cards,
+                    }
+                )
+
+
+async def run_agent(
+    agent: Agent,
+    seats: Sequence[Seat],
+    host: str = "127.0.0.1",
+    port: int = 0,
+    path: Optional[str] = None,
+) -> Dict[Seat, List[float]]:
+    """Plays seats of a dealer service with an agent until all their
+    tables are closed. Seats which cannot be joined are skipped, other
+    errors of the service are ignored.
+
+    Parameters
+    ----------
+    agent : Agent
+        called with the observation of an acting seat, cards are
+        strings, returns a bet
+    seats : Sequence[Seat]
+        table id and seat index of every seat to play
+    host : str, optional
+        tcp host, by default "127.0.0.1"
+    port : int, optional
+        tcp port, by default 0
+    path : Optional[str], optional
+        unix socket path, used instead of tcp if given, by default None
+
+    Returns
+    -------
+    Dict[Seat, List[float]]
+        payout of every hand of every seat
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    payouts: Dict[Seat, List[float]] = {(str(table), seat): [] for table, seat in seats}
+    for table, seat in payouts:
+        writer.write(
+            json.dumps({"type": "join", "table": table, "seat": seat}).encode() + b"\n"
+        )
+    await writer.drain()
+    open_seats = set(payouts)
+    try:
+        while open_seats:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            if message["type"] == "error":
+                # a seat which could not be joined is never played
+                if message.get("request") == "join":
+                    open_seats.discard((str(message["table"]), message["seat"]))
+                continue
+            if message["type"] not in ("observation", "hand", "closed"):
+                continue
+            key = (message["table"], message["seat"])
+            if message["type"] == "observation":
+                bet = agent(message["observation"])
+                response = {
+                    "type": "action",
+                    "table": key[0],
+                    "seat": key[1],
+                    "id": message["id"],
+                    "bet": bet,
+                }
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+            elif message["type"] == "hand":
+                payouts[key].append(message["payouts"][key[1]])
+            else:
+                open_seats.discard(key)
+    finally:
+        writer.close()
+    return payouts
@@ -0,0 +1,414 @@
+"""Multi table tournaments with blind schedules, eliminations and table
+balancing.
+
+A tournament is played in rounds. In every round all tables with at
+least two players play a number of hands, optionally in parallel worker
+processes. Between rounds the blind level is updated, busted players
+are removed from their seats and players are moved between tables so
+table sizes differ by at most one player. Tables are broken as soon as
+the remaining players fit on fewer tables.
+
+Every worker keeps a single dealer per configuration for all tables it
+plays, the table state (seats, stacks and button) is sent with every
+round. Empty seats are vacated with Dealer.stand and busted players
+have an empty stack, the dealer skips both without being rebuilt.
+"""
+import math
+import multiprocessing
+import random
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from clubs import configs, error
+
+from . import engine
+from .evaluation import Agent
+
+
+class BlindLevel(NamedTuple):
+    """Blind level of a tournament schedule
+
+    Attributes
+    ----------
+    blinds : List[int]
+        blind distribution relative to the button, as in the dealer
+        config, e.g. [1, 2, 0, 0, 0, 0]
+    antes : Union[int, List[int]]
+        ante distribution relative to the button, a single int is
+        expanded to every seat
+    hands : int
+        number of hands played at every table before the next level
+    """
+
+    blinds: List[int]
+    antes: Union[int, List[int]]
+    hands: int
+
+
+class TournamentResult(NamedTuple):
+    """Result of a tournament
+
+    Attributes
+    ----------
+    places : List[int]
+        players in finishing order, winner first
+    num_hands : int
+        number of hands played over all tables
+    num_rounds : int
+        number of rounds played
+    """
+
+    places: List[int]
+    num_hands: int
+    num_rounds: int
+
+
+class Table:
+    """Seats, stacks and button of a tournament table
+
+    Parameters
+    ----------
+    num_seats : int
+        number of seats
+    """
+
+    def __init__(self, num_seats: int) -> None:
+        self.seats: List[Optional[int]] = [None] * num_seats
+        self.stacks = [0] * num_seats
+        self.button = 0
+
+    @property
+    def players(self) -> List[int]:
+        """Players seated at the table
+
+        Returns
+        -------
+        List[int]
+            seated players
+        """
+        return [player for player in self.seats if player is not None]
+
+    def sit(self, player: int, stack: int) -> None:
+        """Seats a player in the first empty seat
+
+        Parameters
+        ----------
+        player : int
+            player id
+        stack : int
+            chips the player brings to the table
+        """
+        seat = self.seats.index(None)
+        self.seats[seat] = player
+        self.stacks[seat] = stack
+
+    def stand(self, seat: int) -> Tuple[int, int]:
+        """Removes the player from a seat
+
+        Parameters
+        ----------
+        seat : int
+            seat index
+
+        Returns
+        -------
+        Tuple[int, int]
+            player id and stack of the removed player
+        """
+        player = self.seats[seat]
+        if player is None:
+            raise error.InvalidConfigError(f"seat {seat} is empty")
+        stack = self.stacks[seat]
+        self.seats[seat] = None
+        self.stacks[seat] = 0
+        return player, stack
+
+
+def balance_tables(tables: List[Table]) -> List[Table]:
+    """Breaks tables until the remaining players fit on as few tables as
+    possible and moves players from the largest to the smallest table
+    until table sizes differ by at most one. Tables without players are
+    removed.
+
+    Parameters
+    ----------
+    tables : List[Table]
+        tables with busted players already removed
+
+    Returns
+    -------
+    List[Table]
+        balanced tables
+    """
+    tables = [table for table in tables if table.players]
+    if not tables:
+        return tables
+    num_seats = len(tables[0].seats)
+    num_players = sum(len(table.players) for table in tables)
+    num_tables = math.ceil(num_players / num_seats)
+    while len(tables) > num_tables:
+        # break the smallest table, seating its players at the
+        # smallest remaining tables
+        tables.sort(key=lambda table: len(table.players))
+        broken = tables.pop(0)
+        for seat, player in enumerate(broken.seats):
+            if player is not None:
+                smallest = min(tables, key=lambda table: len(table.players))
+                smallest.sit(*broken.stand(seat))
+    while True:
+        tables.sort(key=lambda table: len(table.players))
+        smallest, largest = tables[0], tables[-1]
+        if len(largest.players) - len(smallest.players) <= 1:
+            return tables
+        # move the player who is next to post the big blind
+        seat = next(
+            (largest.button + offset) % num_seats
+            for offset in range(2, num_seats + 2)
+            if largest.seats[(largest.button + offset) % num_seats] is not None
+        )
+        smallest.sit(*largest.stand(seat))
+
+
+class _TableTask(NamedTuple):
+    table_idx: int
+    seats: List[Optional[int]]
+    stacks: List[int]
+    button: int
+    blinds: List[int]
+    antes: Union[int, List[int]]
+    num_hands: int
+    seed: int
+
+
+class _TableResult(NamedTuple):
+    table_idx: int
+    stacks: List[int]
+    button: int
+    num_hands: int
+    # hand index, stack at the start of the hand and player of every
+    # elimination
+    eliminations: List[Tuple[int, int, int]]
+
+
+_WORKER_AGENTS: Sequence[Agent] = []
+_WORKER_DEALER: Optional[engine.Dealer] = None
+
+
+def _init_worker(config: configs.PokerConfig, agents: Sequence[Agent]) -> None:
+    global _WORKER_AGENTS, _WORKER_DEALER
+    _WORKER_AGENTS = agents
+    _WORKER_DEALER = engine.Dealer.from_config(config)
+
+
+def _play_table(task: _TableTask) -> _TableResult:
+    # every table is dealt from its own seed, the random state of the
+    # caller is restored afterwards
+    state = random.getstate()
+    random.seed(task.seed)
+    try:
+        return _deal_table(task)
+    finally:
+        random.setstate(state)
+
+
+def _deal_table(task: _TableTask) -> _TableResult:
+    dealer = _WORKER_DEALER
+    assert dealer is not None
+    dealer.blinds = list(task.blinds)
+    dealer.antes = (
+        [task.antes] * dealer.num_players
+        if isinstance(task.antes, int)
+        else list(task.antes)
+    )
+    dealer.big_blind = dealer.blinds[1]
+    for seat, player in enumerate(task.seats):
+        if player is None:
+            dealer.stand(seat)
+        else:
+            dealer.sit(seat, task.stacks[seat])
+    dealer.button = task.button
+
+    eliminations = []
+    num_hands = 0
+    while num_hands < task.num_hands and sum(stack > 0 for stack in dealer.stacks) > 1:
+        start_stacks = list(dealer.stacks)
+        obs = dealer.reset()
+        done = [False]
+        while not all(done):
+            player = task.seats[obs["action"]]
+            assert player is not None
+            obs, _, done = dealer.step(_WORKER_AGENTS[player](obs))
+        for seat, (start_stack, stack) in enumerate(zip(start_stacks, dealer.stacks)):
+            player = task.seats[seat]
+            if start_stack and not stack and player is not None:
+                eliminations.append((num_hands, start_stack, player))
+        num_hands += 1
+    return _TableResult(
+        task.table_idx, list(dealer.stacks), dealer.button, num_hands, eliminations
+    )
+
+
+class Tournament:
+    """Multi table freezeout tournament. Every player starts with the
+    start stack of the config, the config's number of players is the
+    number of seats per table.
+
+    Parameters
+    ----------
+    config : configs.PokerConfig
+        poker configuration of every table
+    agents : Sequence[Agent]
+        one agent per player, agents are called with the observation of
+        the acting player and return a bet. agents must be picklable to
+        play in worker processes, i.e. defined at module level
+    schedule : Sequence[BlindLevel]
+        blind levels, the last level is kept until the tournament ends
+    hands_per_round : int, optional
+        number of hands every table plays between two balancings, by
+        default 10
+    processes : Optional[int], optional
+        number of worker processes, None uses all cpus and 1 plays in
+        the current process, by default 1
+    seed : Optional[int], optional
+        seed for seating and dealing, results do not depend on the
+        number of processes, by default None
+
+    Examples
+    --------
+
+    >>> schedule = [
+    ...     BlindLevel([1, 2, 0, 0, 0, 0], 0, 20),
+    ...     BlindLevel([2, 4, 0, 0, 0, 0], 0, 20),
+    ...     BlindLevel([5, 10, 0, 0, 0, 0], 1, 20),
+    ... ]
+    >>> tournament = Tournament(
+    ...     configs.NO_LIMIT_HOLDEM_SIX_PLAYER, agents, schedule, processes=4
+    ... )
+    >>> result = tournament.run()
+    >>> result.places[:3]
+    """
+
+    def __init__(
+        self,
+        config: configs.PokerConfig,
+        agents: Sequence[Agent],
+        schedule: Sequence[BlindLevel],
+        hands_per_round: int = 10,
+        processes: Optional[int] = 1,
+        seed: Optional[int] = None,
+    ) -> None:
+        if not schedule:
+            raise error.InvalidConfigError("schedule needs at least one blind level")
+        if len(agents) < 2:
+            raise error.InvalidConfigError("a tournament needs at least two players")
+        num_seats = config["num_players"]
+        for level in schedule:
+            if len(level.blinds) != num_seats:
+                raise error.InvalidConfigError(
+                    f"incorrect blind distribution, expected list of length "
+                    f"{num_seats}, got {level.blinds}"
+                )
+        self.config = config
+        self.agents = agents
+        self.schedule = list(schedule)
+        self.hands_per_round = hands_per_round
+        self.processes = processes
+        self.random = random.Random(seed)
+
+        self.level = 0
+        self.level_hands = 0
+        self.num_hands = 0
+        self.num_rounds = 0
+        self.eliminated: List[int] = []
+
+        players = list(range(len(agents)))
+        self.random.shuffle(players)
+        num_tables = math.ceil(len(players) / num_seats)
+        self.tables = [Table(num_seats) for _ in range(num_tables)]
+        for idx, player in enumerate(players):
+            self.tables[idx % num_tables].sit(player, config["start_stack"])
+        for table in self.tables:
+            table.button = self.random.randrange(num_seats)
+
+    @property
+    def num_players(self) -> int:
+        """Number of players left in the tournament
+
+        Returns
+        -------
+        int
+            number of players
+        """
+        return sum(len(table.players) for table in self.tables)
+
+    def _tasks(self) -> List[_TableTask]:
+        level = self.schedule[self.level]
+        num_hands = min(self.hands_per_round, level.hands - self.level_hands)
+        return [
+            _TableTask(
+                table_idx,
+                list(table.seats),
+                list(table.stacks),
+                table.button,
+                level.blinds,
+                level.antes,
+                num_hands,
+                self.random.getrandbits(32),
+            )
+            for table_idx, table in enumerate(self.tables)
+            if len(table.players) > 1
+        ]
+
+    def _update(self, tasks: List[_TableTask], results: List[_TableResult]) -> None:
+        eliminations = []
+        for result in results:
+            table = self.tables[result.table_idx]
+            table.stacks = list(result.stacks)
+            table.button = result.button
+            self.num_hands += result.num_hands
+            eliminations.extend(result.eliminations)
+            for seat, stack in enumerate(table.stacks):
+                if table.seats[seat] is not None and not stack:
+                    table.stand(seat)
+        # players busted earlier or with smaller stacks finish lower
+        for _, _, player in sorted(eliminations):
+            self.eliminated.append(player)
+        self.num_rounds += 1
+
+        self.level_hands += tasks[0].num_hands
+        if self.level_hands >= self.schedule[self.level].hands:
+            self.level = min(self.level + 1, len(self.schedule) - 1)
+            self.level_hands = 0
+        self.tables = balance_tables(self.tables)
+
+    def run(self) -> TournamentResult:
+        """Plays the tournament until a single player is left
+
+        Returns
+        -------
+        TournamentResult
+            finishing order and number of hands and rounds played
+        """
+        pool = None
+        if self.processes != 1:
+            pool = multiprocessing.Pool(
+                self.processes,
+                initializer=_init_worker,
+                initargs=(self.config, self.agents),
+            )
+        else:
+            _init_worker(self.config, self.agents)
+        try:
+            while self.num_players > 1:
+                tasks = self._tasks()
+                if pool is None:
+                    results = [_play_table(task) for task in tasks]
+                else:
+                    results = pool.map(_play_table, tasks)
+                self._update(tasks, results)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        winners = [player for table in self.tables for player in table.players]
+        places = winners + self.eliminated[::-1]
+        return TournamentResult(places, self.num_hands, self.num_rounds)
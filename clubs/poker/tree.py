@@ -0,0 +1,599 @@
+"""Classes and functions to enumerate the game tree of small poker
+configurations and to solve it with counterfactual regret minimization"""
+import itertools
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from clubs import configs, error
+
+from . import card, engine
+
+CHANCE = 0
+DECISION = 1
+TERMINAL = 2
+
+
+class GameTree:
+    """Public game tree of a poker configuration. The tree contains
+    chance nodes for community card deals, decision nodes for the
+    betting actions of the acting player and terminal nodes. Private
+    hole cards are not part of the tree, instead every node is evaluated
+    for all possible deals of hole cards at once. Nodes are stored in
+    breadth first order, so children of a node are contiguous and
+    the node arrays can be traversed layer by layer.
+
+    Betting follows the rules of Dealer, the tree is expanded once by
+    stepping a Dealer and restoring snapshots. The legal bet sizes are
+    abstracted to fold, check/call, min raise, max raise and optional
+    raises relative to the pot.
+
+    Parameters
+    ----------
+    config : configs.PokerConfig
+        poker configuration, e.g. configs.LEDUC_TWO_PLAYER
+    raise_fractions : Optional[List[float]], optional
+        additional raise sizes as fractions of the pot after calling,
+        bets are rounded to valid bet sizes, by default None
+    max_nodes : int, optional
+        maximum number of nodes, by default 1000000
+    max_deals : int, optional
+        maximum number of hole card deals, by default 100000
+
+    Examples
+    --------
+
+    >>> tree = GameTree(configs.KUHN_TWO_PLAYER)
+    >>> solver = CFRSolver(tree).iterate(1000)
+    >>> tree.exploitability(solver.average_strategy())
+    ... 0.0008
+    """
+
+    def __init__(
+        self,
+        config: configs.PokerConfig,
+        raise_fractions: Optional[List[float]] = None,
+        max_nodes: int = 1000000,
+        max_deals: int = 100000,
+    ) -> None:
+        self.config = config
+        self.raise_fractions = list(raise_fractions or [])
+        self.max_nodes = max_nodes
+
+        self.dealer = engine.Dealer(**config)
+        self.num_players = self.dealer.num_players
+        self.num_streets = self.dealer.num_streets
+        self.num_community_cards = self.dealer.num_community_cards
+        self.cards: List[card.Card] = list(self.dealer.deck.full_deck)
+        self.hands: List[Tuple[int, ...]] = list(
+            itertools.combinations(range(len(self.cards)), self.dealer.num_hole_cards)
+        )
+        self.deals = self._deals(max_deals)
+
+        num_deals = len(self.deals)
+        # deal_cards[deal, card] is True if card is held by any player
+        self.deal_cards = np.zeros((num_deals, len(self.cards)), dtype=bool)
+        for player in range(self.num_players):
+            for card_idx in range(self.dealer.num_hole_cards):
+                hand_cards = np.array([hand[card_idx] for hand in self.hands])
+                self.deal_cards[
+                    np.arange(num_deals), hand_cards[self.deals[:, player]]
+                ] = True
+        # hand_masks[player][deal, hand] is 1 if player holds hand in deal
+        self.hand_masks = []
+        for player in range(self.num_players):
+            hand_mask = np.zeros((num_deals, len(self.hands)))
+            hand_mask[np.arange(num_deals), self.deals[:, player]] = 1
+            self.hand_masks.append(hand_mask)
+
+        self._build()
+
+    def __repr__(self) -> str:
+        return (
+            f"GameTree ({id(self)}) - nodes: {self.num_nodes}, "
+            f"decision nodes: {len(self.decision_nodes)}, deals: {len(self.deals)}"
+        )
+
+    def _deals(self, max_deals: int) -> np.ndarray:
+        hand_bits = [sum(1 << idx for idx in hand) for hand in self.hands]
+        deals: List[Tuple[int, ...]] = []
+
+        def add_deals(deal: Tuple[int, ...], used: int) -> None:
+            if len(deals) > max_deals:
+                raise error.GameTreeSizeError(
+                    f"too many hole card deals, expected at most {max_deals}"
+                )
+            if len(deal) == self.num_players:
+                deals.append(deal)
+                return
+            for hand_idx, bits in enumerate(hand_bits):
+                if not bits & used:
+                    add_deals(deal + (hand_idx,), used | bits)
+
+        add_deals((), 0)
+        return np.array(deals, dtype=np.int64).reshape(-1, self.num_players)
+
+    def _actions(self) -> List[int]:
+        dealer = self.dealer
+        call, min_raise, max_raise = dealer._bet_sizes()
+        pot = dealer.pot
+        bets = [min_raise, max_raise]
+        for fraction in self.raise_fractions:
+            bet = round(call + fraction * (pot + call))
+            bets.append(dealer._clean_bet(bet, call, min_raise, max_raise))
+        raises = sorted(set(bet for bet in bets if bet > call))
+        actions = [call] + raises
+        if call:
+            actions = [-1] + actions
+        return actions
+
+    def _add_node(
+        self,
+        node_type: int,
+        parent: int,
+        bet: int,
+        fold: bool,
+        board: Tuple[int, ...],
+    ) -> int:
+        node = len(self._types)
+        if node >= self.max_nodes:
+            raise error.GameTreeSizeError(
+                f"game tree too large, expected at most {self.max_nodes} nodes"
+            )
+        self._types.append(node_type)
+        self._parents.append(parent)
+        self._children.append([])
+        self._bets.append(bet)
+        self._folds.append(fold)
+        self._boards.append(board)
+        self._players.append(-1)
+        self._streets.append(self.dealer.street)
+        self._histories.append(tuple(self.dealer.history))
+        self._states.append(None)
+        if parent >= 0:
+            self._children[parent].append(node)
+        return node
+
+    def _add_chance(
+        self,
+        parent: int,
+        bet: int,
+        fold: bool,
+        state: engine.DealerState,
+        board: Tuple[int, ...],
+        num_cards: int,
+    ) -> int:
+        node = self._add_node(CHANCE, parent, bet, fold, board)
+        remaining = [idx for idx in range(len(self.cards)) if idx not in board]
+        for cards in itertools.combinations(remaining, num_cards):
+            self._expand(node, 0, False, state, board + cards)
+        return node
+
+    def _expand(
+        self,
+        parent: int,
+        bet: int,
+        fold: bool,
+        state: engine.DealerState,
+        board: Tuple[int, ...],
+    ) -> int:
+        dealer = self.dealer
+        dealer.restore(state)
+        if dealer.action == -1:
+            node = self._add_node(TERMINAL, parent, bet, fold, board)
+            self._states[node] = state
+            return node
+
+        node = self._add_node(DECISION, parent, bet, fold, board)
+        self._players[node] = dealer.action
+        for action in self._actions():
+            dealer.restore(state)
+            street = dealer.street
+            dealer.step(action)
+            _, bet, fold = dealer.history[-1]
+            last_street = min(dealer.street, self.num_streets - 1)
+            num_cards = sum(self.num_community_cards[street + 1 : last_street + 1])
+            child_state = dealer.snapshot()
+            # board is irrelevant if all but one player folded
+            if num_cards and sum(dealer.active) > 1:
+                self._add_chance(node, bet, fold, child_state, board, num_cards)
+            else:
+                self._expand(node, bet, fold, child_state, board)
+        return node
+
+    def _build(self) -> None:
+        self._types: List[int] = []
+        self._parents: List[int] = []
+        self._children: List[List[int]] = []
+        self._bets: List[int] = []
+        self._folds: List[bool] = []
+        self._boards: List[Tuple[int, ...]] = []
+        self._players: List[int] = []
+        self._streets: List[int] = []
+        self._histories: List[Tuple[Tuple[int, int, bool], ...]] = []
+        self._states: List[Optional[engine.DealerState]] = []
+
+        dealer = self.dealer
+        dealer.reset(reset_button=True, reset_stacks=True)
+        state = dealer.snapshot()
+        if self.num_community_cards[0]:
+            self._add_chance(-1, 0, False, state, (), self.num_community_cards[0])
+        else:
+            self._expand(-1, 0, False, state, ())
+
+        # renumber nodes in breadth first order
+        order = [0]
+        depths = [0]
+        for node, depth in zip(order, depths):
+            order.extend(self._children[node])
+            depths.extend([depth + 1] * len(self._children[node]))
+        new_idcs = np.empty(len(order), dtype=np.int64)
+        new_idcs[order] = np.arange(len(order))
+
+        num_nodes = self.num_nodes = len(order)
+        self.node_type = np.array([self._types[n] for n in order], dtype=np.int8)
+        self.player = np.array([self._players[n] for n in order], dtype=np.int8)
+        self.street = np.array([self._streets[n] for n in order], dtype=np.int8)
+        self.bet = np.array([self._bets[n] for n in order], dtype=np.int64)
+        self.fold = np.array([self._folds[n] for n in order], dtype=bool)
+        self.parent = np.array(
+            [new_idcs[self._parents[n]] if n else -1 for n in order], dtype=np.int64
+        )
+        self.num_children = np.array(
+            [len(self._children[n]) for n in order], dtype=np.int64
+        )
+        self.child_start = np.array(
+            [
+                new_idcs[self._children[n][0]] if self._children[n] else -1
+                for n in order
+            ],
+            dtype=np.int64,
+        )
+        max_board = sum(self.num_community_cards)
+        self.board = np.full((num_nodes, max(max_board, 1)), -1, dtype=np.int16)
+        for new_idx, node in enumerate(order):
+            board = self._boards[node]
+            self.board[new_idx, : len(board)] = board
+        self.histories = [self._histories[n] for n in order]
+        states = [self._states[n] for n in order]
+
+        # layer boundaries of breadth first order
+        depth_array = np.array(depths)
+        self.layers: List[Tuple[int, int]] = []
+        for depth in range(depth_array.max() + 1):
+            idcs = np.nonzero(depth_array == depth)[0]
+            self.layers.append((int(idcs[0]), int(idcs[-1]) + 1))
+
+        # index of node in decision, chance and terminal arrays
+        self.decision_nodes = np.nonzero(self.node_type == DECISION)[0]
+        self.terminal_nodes = np.nonzero(self.node_type == TERMINAL)[0]
+        self.decision_index = np.full(num_nodes, -1, dtype=np.int64)
+        self.decision_index[self.decision_nodes] = np.arange(len(self.decision_nodes))
+        self.terminal_index = np.full(num_nodes, -1, dtype=np.int64)
+        self.terminal_index[self.terminal_nodes] = np.arange(len(self.terminal_nodes))
+        self.num_actions = int(self.num_children[self.decision_nodes].max())
+        # padded children of decision nodes
+        action_range = np.arange(self.num_actions)
+        self.action_mask = (
+            action_range[None, :] < self.num_children[self.decision_nodes, None]
+        )
+        self.action_children = np.where(
+            self.action_mask,
+            self.child_start[self.decision_nodes, None] + action_range,
+            0,
+        )
+        self.action_index = np.zeros(num_nodes, dtype=np.int64)
+        has_parent = self.parent >= 0
+        self.action_index[has_parent] = (
+            np.arange(num_nodes)[has_parent] - self.child_start[self.parent[has_parent]]
+        )
+
+        self._chance_transitions()
+        self._utilities(states)
+
+    def _chance_transitions(self) -> None:
+        # transition probability from parent to node for every deal,
+        # for decision nodes this is filled in by the strategy
+        num_nodes = self.num_nodes
+        num_deals = len(self.deals)
+        self._transition = np.ones((num_nodes, num_deals))
+        # column of reach probability which is multiplied when moving
+        # to a node, players for decision nodes and chance otherwise
+        self._mover = np.full(num_nodes, self.num_players, dtype=np.int64)
+        has_parent = self.parent >= 0
+        parent_type = np.full(num_nodes, -1)
+        parent_type[has_parent] = self.node_type[self.parent[has_parent]]
+        self._decision_children = np.nonzero(parent_type == DECISION)[0]
+        self._mover[self._decision_children] = self.player[
+            self.parent[self._decision_children]
+        ]
+        num_hole_cards = self.num_players * self.dealer.num_hole_cards
+        for node in np.nonzero(parent_type == CHANCE)[0]:
+            board = self.board[node][self.board[node] >= 0]
+            prev_board = self.board[self.parent[node]]
+            prev_board = prev_board[prev_board >= 0]
+            new_cards = board[len(prev_board) :]
+            num_remaining = len(self.cards) - len(prev_board) - num_hole_cards
+            num_outcomes = math.comb(num_remaining, len(new_cards))
+            valid = ~self.deal_cards[:, new_cards].any(axis=1)
+            self._transition[node] = valid / num_outcomes
+        # deals which collide with the initial board are impossible
+        if self.node_type[0] == CHANCE:
+            self._transition[0] = 1
+        self._root_reach = np.full(num_deals, 1 / num_deals)
+
+        # segment starts of children grouped by parent for every layer
+        self._segments = []
+        for start, end in self.layers[1:]:
+            parents = self.parent[start:end]
+            seg_starts = np.concatenate(([0], np.nonzero(np.diff(parents))[0] + 1))
+            self._segments.append((start, end, seg_starts, parents[seg_starts]))
+
+    def _utilities(self, states: List[Optional[engine.DealerState]]) -> None:
+        dealer = self.dealer
+        num_deals = len(self.deals)
+        self.utilities = np.zeros(
+            (len(self.terminal_nodes), num_deals, self.num_players)
+        )
+        for term_idx, node in enumerate(self.terminal_nodes):
+            state = states[node]
+            assert state is not None
+            dealer.restore(state)
+            # pot has been paid out at terminal states
+            dealer.pot = sum(dealer.pot_commits)
+            board = [int(idx) for idx in self.board[node] if idx >= 0]
+            dealer.community_cards = [self.cards[idx] for idx in board]
+            if sum(dealer.active) == 1:
+                self.utilities[term_idx] = dealer._payouts()
+                continue
+            valid = ~self.deal_cards[:, board].any(axis=1)
+            for deal_idx in np.nonzero(valid)[0]:
+                dealer.hole_cards = [
+                    [self.cards[idx] for idx in self.hands[hand_idx]]
+                    for hand_idx in self.deals[deal_idx]
+                ]
+                self.utilities[term_idx, deal_idx] = dealer._payouts()
+
+    def uniform_strategy(self) -> np.ndarray:
+        """Strategy which plays every legal action with equal probability
+
+        Returns
+        -------
+        np.ndarray
+            strategy of shape (decision nodes, hands, actions)
+        """
+        strategy = np.broadcast_to(
+            self.action_mask[:, None, :],
+            (len(self.decision_nodes), len(self.hands), self.num_actions),
+        ).astype(float)
+        normalized: np.ndarray = strategy / strategy.sum(axis=-1, keepdims=True)
+        return normalized
+
+    def _transitions(self, strategy: np.ndarray) -> np.ndarray:
+        transition = self._transition.copy()
+        children = self._decision_children
+        parents = self.parent[children]
+        transition[children] = strategy[
+            self.decision_index[parents][:, None],
+            self.deals[:, self.player[parents]].T,
+            self.action_index[children][:, None],
+        ]
+        return transition
+
+    def _reach(self, transition: np.ndarray) -> np.ndarray:
+        # reach probability of every node and deal for every player,
+        # the last column contains the chance reach probability
+        reach = np.empty((self.num_nodes, len(self.deals), self.num_players + 1))
+        reach[0] = 1
+        reach[0, :, -1] = self._root_reach * transition[0]
+        for start, end in self.layers[1:]:
+            nodes = np.arange(start, end)
+            reach[start:end] = reach[self.parent[start:end]]
+            reach[nodes, :, self._mover[start:end]] *= transition[start:end]
+        return reach
+
+    def _values(self, transition: np.ndarray) -> np.ndarray:
+        # expected payouts of every node conditioned on reaching it
+        values = np.zeros((self.num_nodes, len(self.deals), self.num_players))
+        values[self.terminal_nodes] = self.utilities
+        for start, end, seg_starts, parents in reversed(self._segments):
+            contrib = transition[start:end, :, None] * values[start:end]
+            values[parents] = np.add.reduceat(contrib, seg_starts, axis=0)
+        return values
+
+    def expected_payouts(self, strategy: np.ndarray) -> np.ndarray:
+        """Computes the expected payout of every player if all players
+        follow the strategy
+
+        Parameters
+        ----------
+        strategy : np.ndarray
+            strategy of shape (decision nodes, hands, actions)
+
+        Returns
+        -------
+        np.ndarray
+            expected payout for every player
+        """
+        values = self._values(self._transitions(strategy))
+        expected: np.ndarray = (values[0] * self._root_reach[:, None]).sum(axis=0)
+        return expected
+
+    def best_response(
+        self, strategy: np.ndarray, player: int
+    ) -> Tuple[float, np.ndarray]:
+        """Computes the best response of a player against the strategy
+        of all other players
+
+        Parameters
+        ----------
+        strategy : np.ndarray
+            strategy of shape (decision nodes, hands, actions)
+        player : int
+            player for which to compute the best response
+
+        Returns
+        -------
+        Tuple[float, np.ndarray]
+            expected payout of the best response and deterministic best
+            response strategy of shape (decision nodes, hands, actions)
+        """
+        reach = self._reach(self._transitions(strategy))
+        return self._best_response(reach, player)
+
+    def _best_response(
+        self, reach: np.ndarray, player: int
+    ) -> Tuple[float, np.ndarray]:
+        reach = reach.copy()
+        reach[:, :, player] = 1
+        counterfactual = reach.prod(axis=-1)
+
+        hand_mask = self.hand_masks[player]
+        deal_hands = self.deals[:, player]
+        weighted = np.zeros((self.num_nodes, len(self.deals)))
+        weighted[self.terminal_nodes] = (
+            counterfactual[self.terminal_nodes] * self.utilities[:, :, player]
+        )
+        best = np.zeros((len(self.decision_nodes), len(self.hands), self.num_actions))
+        own_decisions = self.decision_nodes[self.player[self.decision_nodes] == player]
+        for start, end, seg_starts, parents in reversed(self._segments):
+            weighted[parents] = np.add.reduceat(weighted[start:end], seg_starts, axis=0)
+            # maximize instead of sum for own decisions
+            nodes = own_decisions[np.isin(own_decisions, parents)]
+            if not len(nodes):
+                continue
+            rows = self.decision_index[nodes]
+            child_values = weighted[self.action_children[rows]]
+            scores = np.einsum("nad,dh->nah", child_values, hand_mask)
+            scores[~self.action_mask[rows]] = -np.inf
+            best_actions = scores.argmax(axis=1)
+            weighted[nodes] = np.take_along_axis(
+                child_values, best_actions[:, deal_hands][:, None, :], axis=1
+            )[:, 0, :]
+            best[rows[:, None], np.arange(len(self.hands))[None, :], best_actions] = 1
+        return float(weighted[0].sum()), best
+
+    def exploitability(self, strategy: np.ndarray) -> float:
+        """Computes the exploitability of a strategy, i.e. the average
+        gain of every player switching to a best response
+
+        Parameters
+        ----------
+        strategy : np.ndarray
+            strategy of shape (decision nodes, hands, actions)
+
+        Returns
+        -------
+        float
+            exploitability
+        """
+        transition = self._transitions(strategy)
+        # forward pass is shared by all best responses
+        reach = self._reach(transition)
+        values = self._values(transition)
+        expected = (values[0] * self._root_reach[:, None]).sum(axis=0)
+        gains = [
+            self._best_response(reach, player)[0] - expected[player]
+            for player in range(self.num_players)
+        ]
+        return float(sum(gains) / self.num_players)
+
+
+class CFRSolver:
+    """Vectorized counterfactual regret minimization over a GameTree.
+    Every iteration updates the regrets of all information sets of all
+    players at once using numpy operations over the tree arrays.
+
+    Parameters
+    ----------
+    tree : GameTree
+        game tree to solve
+    """
+
+    def __init__(self, tree: GameTree) -> None:
+        self.tree = tree
+        shape = (len(tree.decision_nodes), len(tree.hands), tree.num_actions)
+        self.regrets = np.zeros(shape)
+        self.strategy_sum = np.zeros(shape)
+        self.iterations = 0
+
+    def strategy(self) -> np.ndarray:
+        """Current strategy computed by regret matching
+
+        Returns
+        -------
+        np.ndarray
+            strategy of shape (decision nodes, hands, actions)
+        """
+        positive = np.maximum(self.regrets, 0)
+        total = positive.sum(axis=-1, keepdims=True)
+        uniform = self.tree.uniform_strategy()
+        return np.where(total > 0, positive / np.where(total > 0, total, 1), uniform)
+
+    def average_strategy(self) -> np.ndarray:
+        """Average strategy over all iterations, converges to a Nash
+        equilibrium in two player games
+
+        Returns
+        -------
+        np.ndarray
+            strategy of shape (decision nodes, hands, actions)
+        """
+        total = self.strategy_sum.sum(axis=-1, keepdims=True)
+        uniform = self.tree.uniform_strategy()
+        return np.where(
+            total > 0, self.strategy_sum / np.where(total > 0, total, 1), uniform
+        )
+
+    def iterate(self, iterations: int = 1) -> "CFRSolver":
+        """Runs iterations of counterfactual regret minimization
+
+        Parameters
+        ----------
+        iterations : int, optional
+            number of iterations, by default 1
+
+        Returns
+        -------
+        CFRSolver
+            self
+        """
+        tree = self.tree
+        nodes = tree.decision_nodes
+        players = tree.player[nodes].astype(np.int64)
+        rows = np.arange(len(nodes))
+        for _ in range(iterations):
+            strategy = self.strategy()
+            transition = tree._transitions(strategy)
+            reach = tree._reach(transition)
+            values = tree._values(transition)
+
+            node_reach = reach[nodes]
+            own_reach = node_reach[rows, :, players]
+            possible = node_reach[:, :, -1] > 0
+            node_reach[rows, :, players] = 1
+            counterfactual = node_reach.prod(axis=-1)
+
+            action_values = values[tree.action_children, :, players[:, None]]
+            node_values = values[nodes, :, players]
+            regrets = counterfactual[:, None, :] * (
+                action_values - node_values[:, None, :]
+            )
+            regrets *= tree.action_mask[:, :, None]
+
+            for player in range(tree.num_players):
+                player_rows = players == player
+                hand_mask = tree.hand_masks[player]
+                self.regrets[player_rows] += np.einsum(
+                    "nad,dh->nha", regrets[player_rows], hand_mask
+                )
+                # own reach probability is equal for all deals of a hand
+                reach_sum = (own_reach[player_rows] * possible[player_rows]) @ hand_mask
+                count = possible[player_rows] @ hand_mask
+                hand_reach = reach_sum / np.where(count > 0, count, 1)
+                self.strategy_sum[player_rows] += (
+                    hand_reach[:, :, None] * strategy[player_rows]
+                )
+            self.iterations += 1
+        return self
@@ -1,5 +1,25 @@
+import importlib
+from typing import Any
+
 from .ascii_viewer import ASCIIViewer
-from .graphic import GraphicViewer
+from .throttled_viewer import ThrottledViewer
 from .viewer import PokerViewer
 
-__all__ = ["ASCIIViewer", "GraphicViewer", "PokerViewer"]
+
+def __getattr__(name: str) -> Any:
+    # the graphic viewer depends on flask, only import it when it is used
+    if name in ("GraphicViewer", "RenderServer"):
+        return getattr(importlib.import_module(".graphic", __name__), name)
+    if name == "FrameRecorder":
+        return importlib.import_module(".recorder", __name__).FrameRecorder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "ASCIIViewer",
+    "FrameRecorder",
+    "GraphicViewer",
+    "PokerViewer",
+    "RenderServer",
+    "ThrottledViewer",
+]
@@ -1,6 +1,7 @@
 import os
+import string
 import time
-from typing import Any, List
+from typing import Any, Dict, List, Tuple
 
 from . import viewer
 
@@ -84,7 +85,7 @@ class ASCIIViewer(viewer.PokerViewer):
         num_players: int,
         num_hole_cards: int,
         num_community_cards: int,
-        **kwargs: Any
+        **kwargs: Any,
     ) -> None:
         super(ASCIIViewer, self).__init__(
             num_players, num_hole_cards, num_community_cards, **kwargs
@@ -96,19 +97,55 @@ class ASCIIViewer(viewer.PokerViewer):
             self.table = file.read()
 
         self.player_pos = self.POS_DICT[num_players]
+        self._parts, self._slots = self._compile(self.table)
+
+        # template keys and card placeholders of every player
+        self._positions = ["p{}".format(idx) for idx in self.player_pos]
+        self._commit_keys = [pos + "c" for pos in self._positions]
+        self._action_keys = ["a{}".format(idx) for idx in self.player_pos]
+        self._button_keys = ["b{}".format(idx) for idx in self.player_pos]
+        self._folded_cards = ",".join(["--"] * self.num_hole_cards)
+        self._hidden_cards = ",".join(["??"] * self.num_hole_cards)
+
+    @staticmethod
+    def _compile(
+        table: str,
+    ) -> Tuple[List[str], Dict[str, List[Tuple[int, str]]]]:
+        # splits the template into static text and formatted fields.
+        # fields are prefilled with their empty value, rendering only
+        # formats the fields which are set and joins the parts
+        parts: List[str] = []
+        slots: Dict[str, List[Tuple[int, str]]] = {}
+        for literal, key, format_spec, _ in string.Formatter().parse(table):
+            parts.append(literal)
+            if key is None:
+                continue
+            slots.setdefault(key, []).append((len(parts), format_spec or ""))
+            parts.append(format("", format_spec or ""))
+        return parts, slots
+
+    def _format(self, fields: Dict[str, str]) -> str:
+        parts = list(self._parts)
+        slots = self._slots
+        for key, value in fields.items():
+            for idx, format_spec in slots[key]:
+                parts[idx] = format(value, format_spec)
+        return "".join(parts)
 
     def _parse_string(self, config: viewer.RenderConfig) -> str:
 
         action = config["action"]
         button = config["button"]
         done = config["done"]
-        positions = ["p{}".format(idx) for idx in self.player_pos]
+        positions = self._positions
+        commit_keys = self._commit_keys
 
         players = self._parse_players(config, done, action)
         action_string = _parse_action_string(config, done)
         win_string = _parse_win_string(config, done)
 
-        str_config = {key: "" for key in self.KEYS}
+        # only fields which are not empty
+        str_config: Dict[str, str] = {}
 
         # community cards
         ccs = [str(card) for card in config["community_cards"]]
@@ -118,35 +155,33 @@ class ASCIIViewer(viewer.PokerViewer):
 
         # pot
         if not done:
-            str_config["pot"] = "{:,}".format(config["pot"])
-            str_config["a{}".format(self.player_pos[action])] = "X"
+            str_config["pot"] = f"{config['pot']:,}"
+            str_config[self._action_keys[action]] = "X"
         else:
             str_config["pot"] = "0"
 
         # button + player positions
-        str_config["b{}".format(self.player_pos[button])] = "D "
+        str_config[self._button_keys[button]] = "D "
         street_commits = config["street_commits"]
         all_ins = config["all_in"]
         iterator = zip(players, street_commits, positions, all_ins)
-        for player, street_commit, pos, all_in in iterator:
+        for idx, (player, street_commit, pos, all_in) in enumerate(iterator):
             str_config[pos] = player
-            str_config[pos + "c"] = "{:,}".format(street_commit)
+            str_config[commit_keys[idx]] = f"{street_commit:,}"
             if all_in and not done:
-                str_config["a" + pos[1:]] = "A"
+                str_config[self._action_keys[idx]] = "A"
 
         # payouts
         if done:
             payouts: List[int] = config["payouts"]
-            for payout, pos in zip(payouts, positions):
-                str_config[pos + "c"] = "{:,}".format(payout)
+            for payout, commit_key in zip(payouts, commit_keys):
+                str_config[commit_key] = f"{payout:,}"
 
         # action + win string
         str_config["action"] = action_string
         str_config["win"] = win_string
 
-        string = self.table.format(**str_config)
-
-        return string
+        return self._format(str_config)
 
     def _parse_players(
         self, config: viewer.RenderConfig, done: bool, action: int
@@ -155,24 +190,12 @@ class ASCIIViewer(viewer.PokerViewer):
         iterator = zip(config["hole_cards"], config["stacks"], config["active"])
         for idx, (hand, stack, active) in enumerate(iterator):
             if not active:
-                players.append(
-                    "{:2}. ".format(idx + 1)
-                    + ",".join(["--"] * self.num_hole_cards)
-                    + " {:,}".format(stack)
-                )
-                continue
-            if done or idx == action:
-                players.append(
-                    "{:2}. ".format(idx + 1)
-                    + ",".join([str(card) for card in hand])
-                    + " {:,}".format(stack)
-                )
-                continue
-            players.append(
-                "{:2}. ".format(idx + 1)
-                + ",".join(["??"] * self.num_hole_cards)
-                + " {:,}".format(stack)
-            )
+                cards = self._folded_cards
+            elif done or idx == action:
+                cards = ",".join([str(card) for card in hand])
+            else:
+                cards = self._hidden_cards
+            players.append(f"{idx + 1:2}. {cards} {stack:,}")
         return players
 
     def render(self, config: viewer.RenderConfig, sleep: float = 0) -> None:
@@ -208,7 +231,7 @@ class ASCIIViewer(viewer.PokerViewer):
         ...     'stacks': [100, 100] # List[int] - list of stack sizes
         ... }
         """
-        string = self._parse_string(config)
-        print(string)
+        table = self._parse_string(config)
+        print(table)
         if sleep:
             time.sleep(sleep)
@@ -1,35 +1,55 @@
 import copy
 import http.client
+import importlib.util
 import math
 import multiprocessing
 import os
 import socket
+import threading
 import time
-import flask
-import flask_socketio
 import urllib.error
 import urllib.request
 from multiprocessing import connection
 from typing import Any, Dict, List, Optional, Tuple, Union, overload
 from xml.etree import ElementTree as et
 
-from .. import error, poker
+from .. import __version__, error, poker
 from . import viewer
 
 
-class GraphicViewer(viewer.PokerViewer):
-    def __init__(
-        self,
-        num_players: int,
-        num_hole_cards: int,
-        num_community_cards: int,
-        host: str = "127.0.0.1",
-        port: int = 0,
-        **kwargs: Any,
-    ):
-        super(GraphicViewer, self).__init__(
-            num_players, num_hole_cards, num_community_cards, **kwargs
-        )
+class RenderServer:
+    """Flask server process which hosts the tables of any number of
+    graphic viewers. Every table is served at /table/<table_id> and its
+    configs are broadcast to a socketio room of the same name, the index
+    page lists all tables. Messages of the viewers are handled as they
+    arrive, the server process idles while no table is rendered.
+
+    Parameters
+    ----------
+    host : str, optional
+        server host, by default "127.0.0.1"
+    port : int, optional
+        server port, the socket to the server process uses port + 1, by
+        default 0 which picks a free port
+
+    Examples
+    --------
+    >>> server = RenderServer()
+    >>> dealers = [Dealer(**configs.NO_LIMIT_HOLDEM_SIX_PLAYER) for _ in range(50)]
+    >>> for table_id, dealer in enumerate(dealers):
+    ...     dealer.reset()
+    ...     dealer.render(server=server, table_id=str(table_id))
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        # flask is only imported in the server process, check it is
+        # installed so missing dependencies are reported here
+        for module in ("flask", "flask_socketio", "gevent"):
+            if importlib.util.find_spec(module) is None:
+                raise error.MissingImportsError(
+                    f"{module} is required for the graphic viewer, "
+                    "install it with: pip install clubs[render]"
+                )
         self.host = host
         if port:
             self.port = port
@@ -38,12 +58,13 @@ class GraphicViewer(viewer.PokerViewer):
             tmp_socket.bind(("", 0))
             self.port = tmp_socket.getsockname()[1]
             tmp_socket.close()
+        self.tables: List[str] = []
+        # viewers rendering from background threads share the client
+        # socket, a message has to be written in one piece
+        self._lock = threading.Lock()
 
-        self.svg_poker = _SVGPoker(
-            self.num_players, self.num_hole_cards, self.num_community_cards
-        )
-
-        self.process = multiprocessing.Process(target=self._run_flask)
+        # daemonic so an unclosed server does not block interpreter exit
+        self.process = multiprocessing.Process(target=self._run_flask, daemon=True)
         self.process.start()
 
         self._test_socket_conn()
@@ -78,11 +99,59 @@ class GraphicViewer(viewer.PokerViewer):
 
         assert response and response.status == 200
 
+    def add_table(self, table_id: str, svg: str) -> None:
+        """Adds a table to the server
+
+        Parameters
+        ----------
+        table_id : str
+            unique table id, used in the table url
+        svg : str
+            svg of the empty table
+        """
+        with self._lock:
+            if table_id in self.tables:
+                raise error.InvalidConfigError(f"table {table_id} already exists")
+            self.tables.append(table_id)
+            self.socket.send({"content": "table", "table": table_id, "svg": svg})
+
+    def remove_table(self, table_id: str) -> None:
+        """Removes a table from the server
+
+        Parameters
+        ----------
+        table_id : str
+            table id
+        """
+        with self._lock:
+            self.tables.remove(table_id)
+            self.socket.send({"content": "remove", "table": table_id})
+
+    def send(self, table_id: str, message: Dict[str, Any]) -> None:
+        """Sends a config or config delta of a table to the browsers
+        watching the table
+
+        Parameters
+        ----------
+        table_id : str
+            table id
+        message : Dict[str, Any]
+            message with the config as content, delta messages are
+            merged into the previous config of the table
+        """
+        with self._lock:
+            self.socket.send({**message, "table": table_id})
+
     def close(self) -> None:
-        if self.process.is_alive():
-            self.socket.send({"content": "close"})
-            self.process.terminate()
-            self.process.join()
+        # __init__ may have failed before the process was started or
+        # the socket was connected
+        process = getattr(self, "process", None)
+        if process is not None and process.is_alive():
+            if getattr(self, "socket", None) is not None:
+                with self._lock:
+                    self.socket.send({"content": "close"})
+            process.terminate()
+            process.join()
 
     def __del__(self) -> None:
         self.close()
@@ -91,9 +160,13 @@ class GraphicViewer(viewer.PokerViewer):
         from gevent import monkey
 
         monkey.patch_all()
+        import flask
+        import flask_socketio
         import markupsafe
+        from gevent import socket as gevent_socket
 
-        config: Dict[str, Any] = {}
+        svgs: Dict[str, str] = {}
+        configs: Dict[str, Dict[str, Any]] = {}
         dir_path = os.path.dirname(os.path.realpath(__file__))
         templates_path = os.path.join(dir_path, "resources", "templates")
         static_path = os.path.join(dir_path, "resources", "static")
@@ -102,35 +175,138 @@ class GraphicViewer(viewer.PokerViewer):
         )
         socketio = flask_socketio.SocketIO(app)
 
-        @socketio.on("connect")
-        def connect():  # type: ignore
-            socketio.emit("config", config)
+        @socketio.on("join")  # type: ignore
+        def join(table_id: str) -> None:
+            flask_socketio.join_room(table_id)
+            flask_socketio.emit("config", configs.get(table_id, {}))
 
         @app.route("/")
-        def index():  # type: ignore
-            svg = str(self.svg_poker.base_svg)
-            return flask.render_template("index.html", svg=markupsafe.Markup(svg))
+        def index() -> str:
+            # a single table is shown directly
+            if len(svgs) == 1:
+                return table(next(iter(svgs)))
+            return flask.render_template("tables.html", table_ids=list(svgs))
+
+        @app.route("/table/<table_id>")
+        def table(table_id: str) -> str:
+            if table_id not in svgs:
+                flask.abort(404)
+            return flask.render_template(
+                "index.html", svg=markupsafe.Markup(svgs[table_id]), table_id=table_id
+            )
 
         def listener() -> None:
-            nonlocal config
             socket = connection.Listener((self.host, self.port + 1))
             conn = socket.accept()
+            # the patched socket is non blocking, a message which has
+            # only partly arrived has to be read to its end
+            os.set_blocking(conn.fileno(), True)
             while True:
-                if conn.poll():
-                    message: Dict[str, Any] = conn.recv()
-                    if message["content"] == "close":
-                        conn.close()
-                        break
-                    else:
-                        config = message["content"]
-                        socketio.emit("config", config, broadcast=True)
-                socketio.sleep(0.0001)
+                # yields to the server until a message arrives
+                gevent_socket.wait_read(conn.fileno())
+                message: Dict[str, Any] = conn.recv()
+                content = message["content"]
+                if content == "close":
+                    conn.close()
+                    break
+                table_id: str = message["table"]
+                if content == "table":
+                    svgs[table_id] = message["svg"]
+                    configs[table_id] = {}
+                elif content == "remove":
+                    svgs.pop(table_id, None)
+                    configs.pop(table_id, None)
+                elif message.get("delta", False):
+                    # keep the full config for newly connecting
+                    # browsers, connected browsers only get the patch
+                    configs[table_id].update(content)
+                    socketio.emit("delta", content, to=table_id)
+                else:
+                    configs[table_id] = content
+                    socketio.emit("config", content, to=table_id)
             socket.close()
 
         socketio.start_background_task(listener)
 
         socketio.run(app, port=self.port)
 
+
+class GraphicViewer(viewer.PokerViewer):
+    """Renders the table in a browser. Configs are sent to a render
+    server process which broadcasts them to all browsers watching the
+    table. Only the fields which changed since the last frame are sent,
+    with a full config every keyframe_interval frames.
+
+    Parameters
+    ----------
+    num_players : int
+        number of player
+    num_hole_cards : int
+        number of hole cards
+    num_community_cards : int
+        number of community cards
+    host : str, optional
+        server host, by default "127.0.0.1"
+    port : int, optional
+        server port, the socket to the server process uses port + 1, by
+        default 0 which picks a free port
+    keyframe_interval : int, optional
+        number of frames between two full configs, by default 100
+    svg_cache_dir : Optional[str], optional
+        directory to cache the table svg of every layout in, by default
+        None which only caches in memory
+    server : Optional[RenderServer], optional
+        shared render server hosting the table, host and port are
+        ignored, by default None which starts a server for this viewer
+    table_id : str, optional
+        id of the table on the render server, by default "0"
+    """
+
+    def __init__(
+        self,
+        num_players: int,
+        num_hole_cards: int,
+        num_community_cards: int,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        keyframe_interval: int = 100,
+        svg_cache_dir: Optional[str] = None,
+        server: Optional[RenderServer] = None,
+        table_id: str = "0",
+        **kwargs: Any,
+    ):
+        super(GraphicViewer, self).__init__(
+            num_players, num_hole_cards, num_community_cards, **kwargs
+        )
+        self.svg_poker = _SVGPoker(
+            self.num_players,
+            self.num_hole_cards,
+            self.num_community_cards,
+            svg_cache_dir,
+        )
+        self.encoder = _DeltaEncoder(keyframe_interval)
+
+        self.owns_server = server is None
+        if server is None:
+            server = RenderServer(host, port)
+        self.host = server.host
+        self.port = server.port
+        self.table_id = table_id
+        server.add_table(table_id, self.svg_poker.svg)
+        self.server = server
+
+    def close(self) -> None:
+        server: Optional[RenderServer] = getattr(self, "server", None)
+        if server is None:
+            return
+        if self.owns_server:
+            server.close()
+        elif server.process.is_alive() and self.table_id in server.tables:
+            server.remove_table(self.table_id)
+
+    def __del__(self) -> None:
+        self.close()
+
     def render(self, config: viewer.RenderConfig, sleep: float = 0) -> None:
         """Render the table in browser based on the table configuration
 
@@ -164,7 +340,9 @@ class GraphicViewer(viewer.PokerViewer):
         ...     'stacks': [100, 100] # List[int] - list of stack sizes
         ... }
         """
-        self.socket.send({"content": _jsonify(config)})
+        message = self.encoder.encode(_jsonify(config))
+        if message is not None:
+            self.server.send(self.table_id, message)
         if sleep:
             time.sleep(sleep)
 
@@ -198,12 +376,54 @@ def _convert_hands(
 
 
 def _jsonify(config: viewer.RenderConfig) -> Dict[str, Any]:
-    _config: Dict[str, Any] = {**config}
+    # lists are copied, the dealer updates them in place and delta
+    # encoding compares against the previous config
+    _config: Dict[str, Any] = {
+        key: list(value) if isinstance(value, list) else value
+        for key, value in config.items()
+    }
     _config["hole_cards"] = _convert_hands(_config["hole_cards"])
     _config["community_cards"] = _convert_hands(_config["community_cards"])
     return _config
 
 
+class _DeltaEncoder:
+    """Encodes consecutive json configs as patches of the top level
+    fields which changed since the previous config. Every
+    keyframe_interval frames the full config is sent so a lost or
+    skipped patch does not persist."""
+
+    def __init__(self, keyframe_interval: int) -> None:
+        if keyframe_interval < 1:
+            raise error.InvalidConfigError(
+                f"keyframe interval must be positive, got {keyframe_interval}"
+            )
+        self.keyframe_interval = keyframe_interval
+        self.previous: Optional[Dict[str, Any]] = None
+        self.num_frames = 0
+
+    def encode(self, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        previous = self.previous
+        self.previous = config
+        if previous is None or self.num_frames == self.keyframe_interval:
+            self.num_frames = 1
+            return {"content": config}
+        self.num_frames += 1
+        patch = _delta(previous, config)
+        if not patch:
+            return None
+        return {"content": patch, "delta": True}
+
+
+def _delta(previous: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    # top level fields which changed since the previous config
+    return {
+        key: value
+        for key, value in config.items()
+        if key not in previous or previous[key] != value
+    }
+
+
 class _RoundedRectangle:
     def __init__(self, x: float, y: float, width: float, height: float) -> None:
         self.x = x
@@ -271,13 +491,18 @@ class _SVGElement:
     SVGS_PATH = os.path.join(
         os.path.dirname(os.path.realpath(__file__)), "resources", "static", "images"
     )
+    # parsed svg files, every element gets its own copy of the tree
+    TEMPLATES: Dict[str, et.Element] = {}
 
     def __init__(self, name: str, svg: Optional[et.Element] = None) -> None:
         if svg is None:
-            svg_path = os.path.join(self.SVGS_PATH, f"{name}.svg")
-            with open(svg_path, "r") as file:
-                svg_str = file.read()
-            self.svg = et.fromstring(svg_str)
+            template = self.TEMPLATES.get(name)
+            if template is None:
+                svg_path = os.path.join(self.SVGS_PATH, f"{name}.svg")
+                with open(svg_path, "r") as file:
+                    svg_str = file.read()
+                template = self.TEMPLATES[name] = et.fromstring(svg_str)
+            self.svg = copy.deepcopy(template)
         else:
             self.svg = svg
         self.name = name
@@ -498,13 +723,55 @@ class _SVGElement:
 
 
 class _SVGPoker:
+    # serialized table svgs per layout
+    SVGS: Dict[Tuple[int, int, int], str] = {}
+
     def __init__(
-        self, num_players: int, num_hole_cards: int, num_community_cards: int
+        self,
+        num_players: int,
+        num_hole_cards: int,
+        num_community_cards: int,
+        cache_dir: Optional[str] = None,
     ) -> None:
         self.num_players = num_players
         self.num_hole_cards = num_hole_cards
         self.num_community_cards = num_community_cards
-        self.base_svg = self._base_svg()
+        self.cache_dir = cache_dir
+        self._base: Optional[_SVGElement] = None
+
+    @property
+    def base_svg(self) -> "_SVGElement":
+        if self._base is None:
+            self._base = self._base_svg()
+        return self._base
+
+    @property
+    def svg(self) -> str:
+        # the layout only depends on the table dimensions, it is built
+        # once per process or read from the cache directory
+        key = (self.num_players, self.num_hole_cards, self.num_community_cards)
+        svg = self.SVGS.get(key)
+        if svg is not None:
+            return svg
+        path = None
+        if self.cache_dir is not None:
+            name = "table-{}-{}-{}-{}.svg".format(__version__, *key)
+            path = os.path.join(self.cache_dir, name)
+            if os.path.exists(path):
+                with open(path, "r") as file:
+                    svg = file.read()
+        if svg is None:
+            svg = str(self.base_svg)
+            if path is not None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # written to a temporary file first so concurrent
+                # viewers never read a partial file
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as file:
+                    file.write(svg)
+                os.replace(tmp_path, path)
+        self.SVGS[key] = svg
+        return svg
 
     def _base_svg(self) -> "_SVGElement":
         base = _SVGElement("base")
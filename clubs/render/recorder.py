@@ -0,0 +1,238 @@
+"""Headless recording of render frames to compact replay files.
+
+A frame recorder captures the render config of every dealer state
+without a server process. The first frame of every hand is stored in
+full, later frames only store the fields which changed since the
+previous frame. Replays are saved as json, gzipped if the file name ends
+with .gz, and can be exported to a self contained html player which
+animates them offline with the table svg of the graphic viewer::
+
+    {
+        "format": "clubs-replay",
+        "version": 1,
+        "num_players": 6,
+        "num_hole_cards": 2,
+        "num_community_cards": 5,
+        "hands": [[full config, delta, delta, ...], ...]
+    }
+"""
+import gzip
+import json
+import os
+import string
+import time
+from typing import IO, Any, Callable, Dict, List, Optional, cast
+
+from .. import error, poker
+from . import graphic, viewer
+
+REPLAY_FORMAT = "clubs-replay"
+REPLAY_VERSION = 1
+RESOURCES_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "resources")
+
+Replay = Dict[str, Any]
+
+
+class FrameRecorder(viewer.PokerViewer, poker.engine.DealerListener):
+    """Records render frames as compact deltas. Use it as the viewer of
+    a dealer and call Dealer.render, or attach it as listener to record
+    every reset and step. A new hand starts with the first frame after a
+    finished hand or with every reset of an attached dealer.
+
+    Parameters
+    ----------
+    num_players : int
+        number of players
+    num_hole_cards : int
+        number of hole cards
+    num_community_cards : int
+        number of community cards
+    keep_hand : Optional[Callable[[Dict[str, Any]], bool]], optional
+        called with the last json config of every hand, hands for which
+        it returns False are discarded, by default None which keeps
+        every hand
+
+    Examples
+    --------
+    >>> dealer = Dealer(**configs.NO_LIMIT_HOLDEM_SIX_PLAYER)
+    >>> recorder = FrameRecorder(
+    ...     6, 2, 5, keep_hand=lambda config: max(config["payouts"]) > 100
+    ... ).attach(dealer)
+    >>> for _ in range(10000):
+    ...     obs = dealer.reset(reset_stacks=True)
+    ...     while not all(dealer.step(agent(obs))[2]):
+    ...         pass
+    >>> recorder.save("big_pots.json.gz")
+    >>> export_html(load("big_pots.json.gz"), "big_pots.html")
+    """
+
+    def __init__(
+        self,
+        num_players: int,
+        num_hole_cards: int,
+        num_community_cards: int,
+        keep_hand: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        **kwargs: Any,
+    ) -> None:
+        super(FrameRecorder, self).__init__(
+            num_players, num_hole_cards, num_community_cards, **kwargs
+        )
+        self.keep_hand = keep_hand
+        self.hands: List[List[Dict[str, Any]]] = []
+        self._frames: List[Dict[str, Any]] = []
+        self._previous: Optional[Dict[str, Any]] = None
+
+    def attach(self, dealer: poker.Dealer) -> "FrameRecorder":
+        """Registers the recorder as listener of a dealer
+
+        Parameters
+        ----------
+        dealer : poker.Dealer
+            dealer to record
+
+        Returns
+        -------
+        FrameRecorder
+            self
+        """
+        dealer.listeners.append(self)
+        return self
+
+    def on_reset(self, dealer: poker.Dealer) -> None:
+        self._end_hand()
+        self.render(dealer._render_config())
+
+    def on_step(
+        self, dealer: poker.Dealer, payouts: List[int], done: List[bool]
+    ) -> None:
+        self.render(dealer._render_config())
+
+    def _end_hand(self) -> None:
+        if self._frames and (
+            self.keep_hand is None
+            or self._previous is None
+            or self.keep_hand(self._previous)
+        ):
+            self.hands.append(self._frames)
+        self._frames = []
+        self._previous = None
+
+    def render(self, config: viewer.RenderConfig, sleep: float = 0) -> None:
+        """Records a frame
+
+        Parameters
+        ----------
+        config : viewer.RenderConfig
+            game configuration dictionary
+        sleep : float, optional
+            sleep time after render, by default 0
+        """
+        frame = graphic._jsonify(config)
+        previous = self._previous
+        if previous is not None and previous["done"] and not frame["done"]:
+            self._end_hand()
+            previous = None
+        if previous is None:
+            self._frames.append(frame)
+        else:
+            patch = graphic._delta(previous, frame)
+            if patch:
+                self._frames.append(patch)
+        self._previous = frame
+        if sleep:
+            time.sleep(sleep)
+
+    @property
+    def replay(self) -> Replay:
+        """Recorded hands, the hand which is currently recorded is not
+        included
+
+        Returns
+        -------
+        Replay
+            replay dictionary
+        """
+        return {
+            "format": REPLAY_FORMAT,
+            "version": REPLAY_VERSION,
+            "num_players": self.num_players,
+            "num_hole_cards": self.num_hole_cards,
+            "num_community_cards": self.num_community_cards,
+            "hands": self.hands,
+        }
+
+    def save(self, path: str) -> None:
+        """Ends the current hand and saves all recorded hands
+
+        Parameters
+        ----------
+        path : str
+            replay file, gzipped if it ends with .gz
+        """
+        self._end_hand()
+        with _open(path, "w") as file:
+            json.dump(self.replay, file, separators=(",", ":"))
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return cast(IO[str], gzip.open(path, mode + "t", encoding="utf8"))
+    return open(path, mode, encoding="utf8")
+
+
+def load(path: str) -> Replay:
+    """Loads a replay file
+
+    Parameters
+    ----------
+    path : str
+        replay file, gzipped if it ends with .gz
+
+    Returns
+    -------
+    Replay
+        replay dictionary
+    """
+    with _open(path, "r") as file:
+        replay: Replay = json.load(file)
+    if replay.get("format") != REPLAY_FORMAT:
+        raise error.InvalidFormatError(f"{path} is not a clubs replay file")
+    if replay.get("version") != REPLAY_VERSION:
+        raise error.InvalidFormatError(
+            f"unsupported replay version {replay.get('version')}, "
+            f"expected {REPLAY_VERSION}"
+        )
+    return replay
+
+
+def export_html(replay: Replay, path: str) -> None:
+    """Writes a self contained html player of a replay. The player
+    needs no server, it steps through the frames with the buttons or
+    the arrow keys and plays them with the space bar.
+
+    Parameters
+    ----------
+    replay : Replay
+        replay dictionary
+    path : str
+        html file
+    """
+    svg = graphic._SVGPoker(
+        replay["num_players"], replay["num_hole_cards"], replay["num_community_cards"]
+    ).svg
+    resources = {}
+    for name, resource_path in (
+        ("template", os.path.join("templates", "player.html")),
+        ("style", os.path.join("static", "styles", "style.css")),
+        ("parse_config", os.path.join("static", "parse_config.js")),
+        ("player", os.path.join("static", "player.js")),
+    ):
+        with open(os.path.join(RESOURCES_PATH, resource_path), encoding="utf8") as file:
+            resources[name] = file.read()
+    # a closing tag in a card or player string must not end the script
+    data = json.dumps(replay, separators=(",", ":")).replace("</", "<\\/")
+    html = string.Template(resources.pop("template")).substitute(
+        svg=svg, replay=data, **resources
+    )
+    with open(path, "w", encoding="utf8") as file:
+        file.write(html)
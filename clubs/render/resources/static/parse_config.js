@@ -1,6 +1,4 @@
 (function init() {
-  var socket = io()
-
   function reset_player() {
     let players = document.getElementsByClassName("player");
     for (let player_idx = 0; player_idx < players.length; player_idx++) {
@@ -111,7 +109,11 @@
     }
   }
 
-  socket.on('config', function (config) {
+  // full config of the current frame, delta messages only contain the
+  // fields which changed since the previous frame
+  var state = {};
+
+  function render(config) {
     reset_player();
     reset_community();
     reset_button();
@@ -122,5 +124,28 @@
       update_button(config);
       update_action(config);
     }
+  }
+
+  // the replay player renders recorded frames without a server
+  window.render_config = render;
+  if (typeof io === "undefined") {
+    return;
+  }
+
+  var socket = io()
+
+  // every table is broadcast to its own room on the render server
+  socket.on('connect', function () {
+    socket.emit('join', table_id);
+  })
+
+  socket.on('config', function (config) {
+    state = config;
+    render(state);
+  })
+
+  socket.on('delta', function (patch) {
+    Object.assign(state, patch);
+    render(state);
   })
 })()
\ No newline at end of file
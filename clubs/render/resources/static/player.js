@@ -0,0 +1,97 @@
+(function init() {
+  var hands = replay["hands"];
+  var hand_idx = 0;
+  var frame_idx = 0;
+  var timer = null;
+
+  // the first frame of a hand is a full config, every following frame
+  // only contains the fields which changed since the previous frame
+  function show() {
+    let frames = hands[hand_idx];
+    let state = {};
+    for (let idx = 0; idx <= frame_idx; idx++) {
+      Object.assign(state, frames[idx]);
+    }
+    render_config(state);
+    document.getElementById("position").innerHTML =
+      `hand ${hand_idx + 1}/${hands.length} frame ${frame_idx + 1}/${frames.length}`;
+  }
+
+  function next_frame() {
+    if (frame_idx + 1 < hands[hand_idx].length) {
+      frame_idx++;
+    } else if (hand_idx + 1 < hands.length) {
+      hand_idx++;
+      frame_idx = 0;
+    } else {
+      pause();
+      return;
+    }
+    show();
+  }
+
+  function prev_frame() {
+    if (frame_idx > 0) {
+      frame_idx--;
+    } else if (hand_idx > 0) {
+      hand_idx--;
+      frame_idx = hands[hand_idx].length - 1;
+    }
+    show();
+  }
+
+  function next_hand() {
+    hand_idx = Math.min(hand_idx + 1, hands.length - 1);
+    frame_idx = 0;
+    show();
+  }
+
+  function prev_hand() {
+    hand_idx = Math.max(hand_idx - 1, 0);
+    frame_idx = 0;
+    show();
+  }
+
+  function play() {
+    let fps = parseFloat(document.getElementById("fps").value);
+    timer = setInterval(next_frame, 1000 / fps);
+    document.getElementById("play").innerHTML = "pause";
+  }
+
+  function pause() {
+    clearInterval(timer);
+    timer = null;
+    document.getElementById("play").innerHTML = "play";
+  }
+
+  document.getElementById("next-frame").onclick = next_frame;
+  document.getElementById("prev-frame").onclick = prev_frame;
+  document.getElementById("next-hand").onclick = next_hand;
+  document.getElementById("prev-hand").onclick = prev_hand;
+  document.getElementById("play").onclick = function () {
+    timer === null ? play() : pause();
+  };
+  document.getElementById("fps").onchange = function () {
+    if (timer !== null) {
+      pause();
+      play();
+    }
+  };
+  document.onkeydown = function (event) {
+    if (event.key == "ArrowRight") {
+      next_frame();
+    } else if (event.key == "ArrowLeft") {
+      prev_frame();
+    } else if (event.key == "ArrowDown") {
+      next_hand();
+    } else if (event.key == "ArrowUp") {
+      prev_hand();
+    } else if (event.key == " ") {
+      timer === null ? play() : pause();
+    }
+  };
+
+  if (hands.length) {
+    show();
+  }
+})()
@@ -0,0 +1,127 @@
+import atexit
+import threading
+import time
+import weakref
+from typing import Any, Optional
+
+from .. import error
+from . import viewer
+
+
+def _snapshot(config: viewer.RenderConfig) -> viewer.RenderConfig:
+    # the dealer updates its lists in place, the background thread must
+    # render the state at the time of the render call
+    snapshot: viewer.RenderConfig = {
+        **config,
+        "active": list(config["active"]),
+        "all_in": list(config["all_in"]),
+        "community_cards": list(config["community_cards"]),
+        "hole_cards": [list(cards) for cards in config["hole_cards"]],
+        "payouts": list(config["payouts"]),
+        "street_commits": list(config["street_commits"]),
+        "stacks": list(config["stacks"]),
+    }
+    return snapshot
+
+
+# viewers which are not closed yet, their last frame is flushed at exit
+_OPEN: "weakref.WeakSet[ThrottledViewer]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_all() -> None:
+    for throttled_viewer in list(_OPEN):
+        throttled_viewer.close()
+
+
+class ThrottledViewer(viewer.PokerViewer):
+    """Wraps a viewer and renders in a background thread at most fps
+    frames per second. render only stores a snapshot of the config and
+    returns immediately, configs which are replaced by a newer config
+    before the next frame are dropped. The latest config is always
+    rendered eventually, viewers which are not closed are closed at
+    interpreter exit.
+
+    Parameters
+    ----------
+    wrapped : viewer.PokerViewer
+        viewer which renders the frames
+    fps : float, optional
+        maximum number of frames per second, by default 10
+
+    Examples
+    --------
+    >>> dealer = Dealer(**configs.NO_LIMIT_HOLDEM_SIX_PLAYER)
+    >>> for _ in range(100000):
+    ...     obs = dealer.reset(reset_stacks=True)
+    ...     while not all(dealer.step(obs["call"])[2]):
+    ...         dealer.render("ascii", fps=5)
+    """
+
+    def __init__(
+        self, wrapped: viewer.PokerViewer, fps: float = 10, **kwargs: Any
+    ) -> None:
+        super(ThrottledViewer, self).__init__(
+            wrapped.num_players, wrapped.num_hole_cards, wrapped.num_community_cards
+        )
+        self.viewer = wrapped
+        self.interval = 1 / fps
+        self.num_rendered = 0
+        self.num_dropped = 0
+
+        self._config: Optional[viewer.RenderConfig] = None
+        self._condition = threading.Condition()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        _OPEN.add(self)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._config is None and not self._closed.is_set():
+                    self._condition.wait()
+                config, self._config = self._config, None
+            if config is None:
+                return
+            start = time.perf_counter()
+            self.viewer.render(config)
+            self.num_rendered += 1
+            # closing cuts the wait short so the last frame is flushed
+            self._closed.wait(self.interval - (time.perf_counter() - start))
+
+    def render(self, config: viewer.RenderConfig, sleep: float = 0) -> None:
+        """Stores the config to be rendered with the next frame, closed
+        viewers raise an error
+
+        Parameters
+        ----------
+        config : viewer.RenderConfig
+            game configuration dictionary
+        sleep : float, optional
+            sleep time after render, by default 0
+        """
+        snapshot = _snapshot(config)
+        with self._condition:
+            if self._closed.is_set():
+                raise error.ViewerClosedError("cannot render on a closed viewer")
+            if self._config is not None:
+                self.num_dropped += 1
+            self._config = snapshot
+            self._condition.notify()
+        if sleep:
+            time.sleep(sleep)
+
+    def close(self) -> None:
+        """Renders the pending config, stops the background thread and
+        closes the wrapped viewer"""
+        with self._condition:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+            _OPEN.discard(self)
+            self._condition.notify()
+        self._thread.join()
+        close = getattr(self.viewer, "close", None)
+        if close is not None:
+            close()
@@ -167,3 +167,23 @@ def test_big_blind_raise_chance() -> None:
     assert obs["action"] == 2
     assert obs["call"] == 0
     assert obs["min_raise"] == 2
+
+
+def test_short_blind() -> None:
+
+    config = clubs.configs.NO_LIMIT_HOLDEM_TWO_PLAYER
+
+    dealer = clubs.poker.Dealer(**config)
+    # player 1 posts the big blind with a single chip left
+    dealer.stacks = [200, 1]
+    dealer.button = 1
+    obs = dealer.reset()
+    assert obs["stacks"] == [199, 0]
+    assert obs["pot"] == 2
+
+    done = [False]
+    while not all(done):
+        obs, payouts, done = dealer.step(obs["call"])
+    assert len(dealer.community_cards) == 5
+    assert min(dealer.stacks) >= 0
+    assert sum(dealer.stacks) == 201
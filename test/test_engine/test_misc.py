@@ -183,3 +183,39 @@ def test_win_probabilities() -> None:
         win_prob != 0 or not active
         for win_prob, active in zip(win_probs, dealer.active)
     )
+
+
+def test_from_config() -> None:
+
+    config = clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER
+
+    dealer = clubs.poker.Dealer.from_config(config)
+    other = clubs.poker.Dealer.from_config(config)
+    assert dealer.evaluator is other.evaluator
+    assert dealer.deck.full_deck is other.deck.full_deck
+    assert dealer.deck is not other.deck
+    assert clubs.poker.Dealer.from_config(config, shared=False).evaluator is not (
+        dealer.evaluator
+    )
+
+    # table state and config lists are independent
+    other.blinds[1] = 4
+    dealer.reset(reset_button=True, reset_stacks=True)
+    assert dealer.blinds == [1, 2, 0, 0, 0, 0]
+    assert dealer.pot == 3
+    assert other.pot == 0
+    assert other.stacks == [200] * 6
+
+    # plays the same as a dealer created from scratch
+    fresh = clubs.poker.Dealer(**config)
+    for seed in range(3):
+        results = []
+        for table in (dealer, fresh):
+            random.seed(seed)
+            table.reset(reset_button=True, reset_stacks=True)
+            while True:
+                _, payouts, done = table.step(table._bet_sizes()[1])
+                if all(done):
+                    break
+            results.append(([str(card) for card in table.community_cards], payouts))
+        assert results[0] == results[1]
@@ -1,4 +1,13 @@
+import operator
+import random
+from fractions import Fraction
+from typing import List
+
+import pytest
+
 import clubs
+from clubs import error
+from clubs.poker import engine
 
 
 def test_split_pot() -> None:
@@ -199,3 +208,233 @@ def test_all_in_split_pot() -> None:
     assert all(
         payout == test_payout for payout, test_payout in zip(payouts, test_payouts)
     )
+
+
+def legacy_eval_round(
+    hand_strengths: List[int],
+    pot_commits: List[int],
+    button: int,
+    worst_hand: int,
+) -> List[int]:
+    # previous implementation of Dealer._eval_round, with the remainder
+    # index fixed so it can serve as a reference
+    num_players = len(pot_commits)
+    hands = [
+        [player_idx, hand_strength, pot_commits[player_idx]]
+        for player_idx, hand_strength in enumerate(hand_strengths)
+    ]
+    hands = sorted(hands, key=operator.itemgetter(1, 2))
+    pot = sum(pot_commits)
+    remainder = 0
+    payouts = [0] * num_players
+    for hand_idx, (_, strength, pot_commit) in enumerate(hands):
+        eligible = [
+            player_idx
+            for player_idx, other_strength, _ in hands
+            if other_strength == strength
+        ]
+        cut = [min(hand[2], pot_commit) for hand in hands]
+        split_pot = sum(cut)
+        if not split_pot:
+            continue
+        split = split_pot // len(eligible)
+        remain = split_pot % len(eligible)
+        for player_idx in eligible:
+            payouts[player_idx] += split
+        remainder += remain
+        for idx in range(len(cut)):
+            hands[idx][2] -= cut[idx]
+        pot -= split_pot
+        hands[hand_idx][1] = worst_hand
+        if pot == 0:
+            break
+    if remainder:
+        for player_idx in range(1, num_players + 1):
+            player_idx = (player_idx + button) % num_players
+            if payouts[player_idx]:
+                payouts[player_idx] += remainder
+                break
+    return payouts
+
+
+def test_pot_layers() -> None:
+
+    dealer = clubs.poker.Dealer(**clubs.configs.NO_LIMIT_HOLDEM_NINE_PLAYER)
+    dealer.pot_commits = [50, 100, 30, 100, 0, 0, 0, 0, 0]
+    dealer.active = [True, True, False, True] + [False] * 5
+    assert dealer.pot_layers() == [
+        engine.PotLayer(180, (0, 1, 3)),
+        engine.PotLayer(100, (1, 3)),
+    ]
+
+    # uncalled chips of folded players go to the last layer
+    dealer.pot_commits = [50, 100, 120, 0, 0, 0, 0, 0, 0]
+    dealer.active = [True, True] + [False] * 7
+    assert dealer.pot_layers() == [
+        engine.PotLayer(150, (0, 1)),
+        engine.PotLayer(120, (1,)),
+    ]
+
+
+def exact_payouts(
+    hand_strengths: List[int], pot_commits: List[int], active: List[bool]
+) -> List[Fraction]:
+    # chip by chip reference, every chip level is split between the best
+    # active hands which committed at least that level
+    payouts = [Fraction(0)] * len(pot_commits)
+    top = max(commit for commit, act in zip(pot_commits, active) if act)
+    for level in range(1, max(pot_commits) + 1):
+        chips = sum(commit >= level for commit in pot_commits)
+        eligible = [
+            player
+            for player, commit in enumerate(pot_commits)
+            if active[player] and commit >= min(level, top)
+        ]
+        best = min(hand_strengths[player] for player in eligible)
+        winners = [player for player in eligible if hand_strengths[player] == best]
+        for player in winners:
+            payouts[player] += Fraction(chips, len(winners))
+    return payouts
+
+
+def layered_payouts(
+    hand_strengths: List[int], pot_commits: List[int], active: List[bool], button: int
+) -> List[int]:
+    # chip levels are grouped into layers between the commits of active
+    # players, the odd chips of a layer go to the first winner after the
+    # button
+    num_players = len(pot_commits)
+    levels = sorted({commit for commit, act in zip(pot_commits, active) if act})
+    layers = {level: 0 for level in levels}
+    for level in range(1, max(pot_commits) + 1):
+        upper = next((upper for upper in levels if upper >= level), levels[-1])
+        layers[upper] += sum(commit >= level for commit in pot_commits)
+    payouts = [0] * num_players
+    for upper, amount in layers.items():
+        eligible = [
+            player
+            for player, commit in enumerate(pot_commits)
+            if active[player] and commit >= upper
+        ]
+        best = min(hand_strengths[player] for player in eligible)
+        winners = [player for player in eligible if hand_strengths[player] == best]
+        split, remainder = divmod(amount, len(winners))
+        for player in winners:
+            payouts[player] += split
+        first = min(winners, key=lambda player: (player - button - 1) % num_players)
+        payouts[first] += remainder
+    return payouts
+
+
+def test_eval_round_matches_legacy() -> None:
+
+    random.seed(42)
+    dealer = clubs.poker.Dealer(**clubs.configs.NO_LIMIT_HOLDEM_NINE_PLAYER)
+    worst_hand = dealer.evaluator.table.max_rank + 1
+    num_players = dealer.num_players
+
+    for _ in range(1000):
+        active = [random.random() < 0.7 for _ in range(num_players)]
+        if sum(active) < 2:
+            continue
+        commits = [
+            random.randint(1, random.choice([5, 20, 200])) for _ in range(num_players)
+        ]
+        # folded players can have committed at most the largest active commit
+        largest = max(commit for commit, act in zip(commits, active) if act)
+        commits = [
+            commit if act else min(commit, largest)
+            for commit, act in zip(commits, active)
+        ]
+        ties = random.random() < 0.5
+        strengths = random.sample(range(1, 100), num_players)
+        if ties:
+            strengths = [strength % 3 for strength in strengths]
+        strengths = [
+            strength if act else worst_hand for strength, act in zip(strengths, active)
+        ]
+        dealer.pot_commits = commits
+        dealer.active = active
+        dealer.button = random.randrange(num_players)
+        dealer._eval_hands = lambda *_: strengths  # type: ignore
+
+        payouts = dealer._eval_round()
+        assert sum(payouts) == sum(commits)
+        exact = exact_payouts(strengths, commits, active)
+        # odd chips of every layer go to the first winner after the button
+        assert payouts == layered_payouts(strengths, commits, active, dealer.button)
+        if not ties:
+            # the legacy implementation mishandles ties of players whose
+            # commits are used up, without ties all three agree
+            legacy = legacy_eval_round(strengths, commits, dealer.button, worst_hand)
+            assert payouts == legacy == exact
+
+
+def test_all_in_expected_payouts() -> None:
+
+    random.seed(3)
+
+    config: clubs.configs.PokerConfig = {
+        **clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER,
+        "num_players": 3,
+        "blinds": [1, 2, 0],
+    }
+    dealer = clubs.poker.Dealer(**config)
+    dealer.stacks = [50, 100, 200]
+    obs = dealer.reset()
+    # call preflop and check the flop, shove and call the turn until
+    # the last call is pending
+    while dealer.street < 2:
+        obs, _, _ = dealer.step(obs["call"])
+    obs, _, _ = dealer.step(obs["max_raise"])
+    obs, _, _ = dealer.step(obs["call"])
+    state = dealer.snapshot()
+    remaining = dealer.deck.cards
+
+    # average payouts of every possible river
+    rivers = []
+    for river in remaining:
+        dealer.restore(state)
+        dealer.deck.cards = [river] + [card for card in remaining if card != river]
+        _, payouts, done = dealer.step(obs["call"])
+        assert all(done)
+        rivers.append(payouts)
+    average = [sum(payouts) / len(rivers) for payouts in zip(*rivers)]
+    assert len(set(map(tuple, rivers))) > 1
+
+    dealer.restore(state)
+    dealer.all_in_payouts = "exact"
+    _, payouts, done = dealer.step(obs["call"])
+    assert all(done)
+    assert payouts == pytest.approx(average)
+    # the river is still dealt and stacks are settled with it
+    assert len(dealer.community_cards) == 5
+    assert sum(dealer.stacks) == 350
+    # no runouts left to evaluate
+    assert dealer.expected_payouts() == pytest.approx(dealer._payouts())
+
+    dealer.restore(state)
+    dealer.all_in_payouts = "monte_carlo"
+    dealer.all_in_samples = 2000
+    _, payouts, _ = dealer.step(obs["call"])
+    assert payouts == pytest.approx(average, abs=10)
+
+    with pytest.raises(error.InvalidConfigError):
+        dealer.all_in_payouts = "sample"
+
+
+def test_all_in_runout() -> None:
+
+    random.seed(4)
+
+    config = clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER
+    dealer = clubs.poker.Dealer(**config)
+    obs = dealer.reset()
+    top_cards = dealer.deck.cards[:5]
+    # everyone goes all in preflop, the whole board is dealt at once
+    done = [False]
+    while not all(done):
+        obs, payouts, done = dealer.step(obs["max_raise"])
+    assert dealer.community_cards == top_cards
+    assert dealer.street == dealer.num_streets
+    assert sum(payouts) == 0
@@ -0,0 +1,85 @@
+import pytest
+
+import clubs
+from clubs import error
+
+
+def test_empty_seats() -> None:
+
+    config = clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER
+
+    dealer = clubs.poker.Dealer(**config)
+    assert dealer.stand(1) == 200
+    dealer.stand(2)
+
+    obs = dealer.reset(reset_button=True)
+    assert obs["active"] == [True, False, False, True, True, True]
+    # blinds are posted by the next players dealt in
+    assert obs["street_commits"] == [0, 0, 0, 1, 2, 0]
+    assert obs["action"] == 5
+    assert obs["pot"] == 3
+
+    # button skips empty seats
+    while dealer.action != -1:
+        dealer.step(-1)
+    obs = dealer.reset()
+    assert obs["button"] == 3
+    assert obs["street_commits"] == [0, 0, 0, 0, 1, 2]
+
+    while dealer.action != -1:
+        dealer.step(-1)
+    dealer.sit(1, 150)
+    obs = dealer.reset()
+    assert obs["button"] == 4
+    assert obs["active"] == [True, True, False, True, True, True]
+    assert obs["street_commits"] == [2, 0, 0, 0, 0, 1]
+    assert dealer.stacks[1] == 150
+
+
+def test_heads_up_seats() -> None:
+
+    config = clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER
+
+    dealer = clubs.poker.Dealer(**config)
+    for seat in (1, 2, 4, 5):
+        dealer.stand(seat)
+
+    # in heads up the button posts the small blind and acts first
+    obs = dealer.reset(reset_button=True)
+    assert obs["street_commits"] == [1, 0, 0, 2, 0, 0]
+    assert obs["action"] == 0
+
+    obs, _, _ = dealer.step(-1)
+    obs = dealer.reset()
+    assert obs["button"] == 3
+    assert obs["street_commits"] == [2, 0, 0, 1, 0, 0]
+
+
+def test_sit_out() -> None:
+
+    config = clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER
+
+    dealer = clubs.poker.Dealer(**config)
+    dealer.sit_out(0)
+    obs = dealer.reset(reset_stacks=True)
+    assert not obs["active"][0]
+    assert dealer.stacks[0] == 200
+
+    with pytest.raises(error.InvalidSeatError):
+        dealer.sit(0)
+    while dealer.action != -1:
+        dealer.step(-1)
+
+    dealer.sit(0)
+    obs = dealer.reset()
+    assert obs["active"][0]
+
+    while dealer.action != -1:
+        dealer.step(-1)
+    with pytest.raises(error.InvalidSeatError):
+        dealer.stand(6)
+
+    for seat in range(1, 6):
+        dealer.stand(seat)
+    with pytest.raises(error.TooFewActivePlayersError):
+        dealer.reset(reset_stacks=True)
@@ -0,0 +1,129 @@
+import random
+from typing import List, Tuple
+
+import pytest
+
+import clubs
+from clubs import error
+
+
+def test_snapshot_restore() -> None:
+
+    random.seed(42)
+
+    config = clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER
+
+    dealer = clubs.poker.Dealer(**config)
+    dealer.reset(reset_button=True, reset_stacks=True)
+
+    state = dealer.snapshot()
+    deck_len = len(dealer.deck)
+
+    results = []
+    for _ in range(2):
+        dealer.restore(state)
+        steps = []
+        while True:
+            obs, payouts, done = dealer.step(dealer._bet_sizes()[0])
+            steps.append((obs["pot"], list(obs["community_cards"]), payouts))
+            if all(done):
+                break
+        results.append(steps)
+
+    assert results[0] == results[1]
+
+    dealer.restore(state)
+    assert len(dealer.deck) == deck_len
+    assert dealer.pot == 3
+    assert not dealer.community_cards
+    assert not dealer.history
+    assert dealer.stacks == [200, 199, 198, 200, 200, 200]
+
+
+def test_snapshot_independent() -> None:
+
+    config = clubs.configs.LEDUC_TWO_PLAYER
+
+    dealer = clubs.poker.Dealer(**config)
+    dealer.reset(reset_button=True, reset_stacks=True)
+
+    state = dealer.snapshot()
+    dealer.step(2)
+    dealer.step(2)
+
+    assert state.pot == 2
+    assert state.stacks == (9, 9)
+    assert not state.history
+    assert dealer.pot == 6
+    assert len(dealer.community_cards) == 1
+
+
+def test_undo() -> None:
+
+    config = clubs.configs.LEDUC_TWO_PLAYER
+
+    dealer = clubs.poker.Dealer(**config)
+    dealer.undo_enabled = True
+    obs = dealer.reset(reset_button=True, reset_stacks=True)
+
+    with pytest.raises(error.EmptyUndoStackError):
+        dealer.undo()
+
+    dealer.step(2)
+    dealer.step(2)
+    assert len(dealer.community_cards) == 1
+    dealer.step(0)
+
+    dealer.undo()
+    undo_obs = dealer.undo()
+    assert len(dealer.community_cards) == 0
+    assert undo_obs["pot"] == 4
+    assert dealer.history == [(obs["action"], 2, False)]
+
+    undo_obs = dealer.undo()
+    assert undo_obs["pot"] == obs["pot"]
+    assert undo_obs["call"] == obs["call"]
+    assert undo_obs["action"] == obs["action"]
+    assert not dealer.undo_stack
+
+    dealer.step(2)
+    dealer.reset()
+    assert not dealer.undo_stack
+
+
+def test_running_aggregates() -> None:
+
+    random.seed(42)
+
+    def aggregates(
+        dealer: clubs.poker.Dealer,
+    ) -> Tuple[int, int, int, int, int, List[bool], List[int]]:
+        return (
+            dealer._max_commit,
+            dealer._num_active,
+            dealer._num_all_in,
+            dealer._num_options,
+            dealer._num_unmatched,
+            list(dealer._done_flags),
+            list(dealer._fold_payouts),
+        )
+
+    for config in (
+        clubs.configs.NO_LIMIT_HOLDEM_NINE_PLAYER,
+        clubs.configs.LIMIT_HOLDEM_SIX_PLAYER,
+        clubs.configs.LEDUC_TWO_PLAYER,
+    ):
+        dealer = clubs.poker.Dealer(**config)
+        dealer.undo_enabled = True
+        for _ in range(50):
+            dealer.reset(reset_stacks=True)
+            done = [False]
+            while not all(done):
+                call, min_raise, max_raise = dealer._bet_sizes()
+                bet = random.choice([-1, call, min_raise, max_raise])
+                _, _, done = dealer.step(bet)
+                if not all(done) and random.random() < 0.1:
+                    dealer.undo()
+                running = aggregates(dealer)
+                dealer._recount()
+                assert aggregates(dealer) == running
@@ -0,0 +1,56 @@
+import asyncio
+from typing import List, Sequence
+
+import pytest
+
+import clubs
+from clubs import error
+from clubs.poker import batching, engine
+
+
+def test_batch_scheduler() -> None:
+    batch_sizes: List[int] = []
+
+    def policy(observations: List[engine.ObservationDict]) -> Sequence[float]:
+        batch_sizes.append(len(observations))
+        return [float(obs["call"]) for obs in observations]
+
+    scheduler = batching.BatchScheduler(policy, max_batch_size=4)
+    dealers = [
+        clubs.Dealer.from_config(clubs.configs.LEDUC_TWO_PLAYER) for _ in range(8)
+    ]
+    payouts = scheduler.run(dealers, num_hands=10)
+
+    assert max(batch_sizes) == 4
+    assert scheduler.num_batches == len(batch_sizes)
+    assert scheduler.num_observations == sum(batch_sizes)
+    assert scheduler.mean_batch_size > 1
+    assert all(len(dealer_payouts) == 10 for dealer_payouts in payouts)
+    assert all(
+        sum(hand_payouts) == 0
+        for dealer_payouts in payouts
+        for hand_payouts in dealer_payouts
+    )
+
+
+def test_max_latency() -> None:
+    scheduler = batching.BatchScheduler(
+        lambda observations: [1] * len(observations), max_latency=0.01
+    )
+    dealer = clubs.Dealer.from_config(clubs.configs.LEDUC_TWO_PLAYER)
+
+    async def main() -> float:
+        # the batch is not full, the deadline flushes it
+        return await scheduler.act(dealer.reset())
+
+    assert asyncio.run(main()) == 1
+    assert scheduler.num_batches == 1
+
+
+def test_invalid_policy() -> None:
+    scheduler = batching.BatchScheduler(lambda observations: [])
+    dealers = [clubs.Dealer.from_config(clubs.configs.LEDUC_TWO_PLAYER)]
+    with pytest.raises(error.InvalidPolicyError):
+        scheduler.run(dealers, num_hands=1)
+    with pytest.raises(error.InvalidConfigError):
+        batching.BatchScheduler(lambda observations: [], max_batch_size=0)
@@ -42,6 +42,11 @@ def test_trick() -> None:
     assert cards[0] != poker.Card("Ah")
     assert cards[1] != poker.Card("2s")
 
+    # tricking every card fixes the whole order
+    order = random.sample(deck.full_deck, len(deck.full_deck))
+    deck = deck.trick(order).shuffle()
+    assert deck.draw(52) == order
+
 
 def test_invalid_init() -> None:
     with pytest.raises(error.InvalidRankError):
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+import clubs
+from clubs import error
+from clubs.poker import engine, evaluation
+
+
+def caller(obs: engine.ObservationDict) -> float:
+    return obs["call"]
+
+
+def tight(obs: engine.ObservationDict) -> float:
+    rank = obs["hole_cards"][0].rank
+    if rank == "A":
+        return obs["min_raise"]
+    if rank == "K" or not obs["call"]:
+        return obs["call"]
+    return -1
+
+
+def test_duplicate() -> None:
+    random.seed(42)
+    config = clubs.configs.LEDUC_TWO_PLAYER
+    # identical deterministic agents win back in the other seat
+    # exactly what they lost with the same cards
+    result = evaluation.evaluate_agents(config, [tight, tight], 100)
+    assert result.mean == [0, 0]
+    assert result.std_error == [0, 0]
+    assert result.num_hands == 200
+
+    result = evaluation.evaluate_agents(config, [caller, tight], 100, duplicate=False)
+    assert result.num_hands == 100
+    assert sum(result.mean) == pytest.approx(0)
+
+    with pytest.raises(error.InvalidConfigError):
+        evaluation.evaluate_agents(config, [caller], 10)
+
+
+def test_equity_baseline() -> None:
+    random.seed(42)
+    config = clubs.configs.LEDUC_TWO_PLAYER
+    # when both players check down the whole hand is luck
+    result = evaluation.evaluate_agents(
+        config, [caller, caller], 50, baseline=True, num_samples=None
+    )
+    assert result.mean == pytest.approx([0, 0])
+    assert result.std_error == pytest.approx([0, 0])
+
+    plain = evaluation.evaluate_agents(config, [caller, tight], 1000, duplicate=False)
+    corrected = evaluation.evaluate_agents(
+        config, [caller, tight], 1000, duplicate=False, baseline=True, num_samples=None
+    )
+    assert corrected.std_error[1] < plain.std_error[1]
+    # both estimates are unbiased
+    lower, upper = plain.confidence_intervals(z=4)[1]
+    assert lower < corrected.mean[1] < upper
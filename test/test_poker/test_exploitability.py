@@ -0,0 +1,85 @@
+from typing import Sequence
+
+import pytest
+
+import clubs
+from clubs import error
+from clubs.poker import exploitability, tree
+
+
+def test_uniform_policy() -> None:
+    config = clubs.configs.KUHN_TWO_PLAYER
+
+    def uniform(info_set: exploitability.InfoSet) -> Sequence[float]:
+        return [1] * len(info_set.actions)
+
+    assert exploitability.exploitability(config, uniform) == pytest.approx(11 / 24)
+    # empty table falls back to uniform play
+    assert exploitability.exploitability(config, {}) == pytest.approx(11 / 24)
+
+
+def test_kuhn_equilibrium() -> None:
+    config = clubs.configs.KUHN_TWO_PLAYER
+    game_tree = exploitability.get_game_tree(config)
+    assert exploitability.get_game_tree(config) is game_tree
+
+    # analytical equilibrium with alpha = 0, the deck contains Q, K and A
+    # player 0 always checks and calls a bet with K with prob 1/3
+    # player 1 bets A, bluffs Q with prob 1/3 and calls with K with prob 1/3
+    def nash(info_set: exploitability.InfoSet) -> Sequence[float]:
+        rank = info_set.hole_cards[0].rank
+        facing_bet = info_set.actions[0] == -1
+        if facing_bet:
+            return {"Q": [1.0, 0.0], "K": [2 / 3, 1 / 3], "A": [0.0, 1.0]}[rank]
+        if info_set.player == 0:
+            return [1, 0]
+        return {"Q": [2 / 3, 1 / 3], "K": [1.0, 0.0], "A": [0.0, 1.0]}[rank]
+
+    assert exploitability.exploitability(game_tree, nash) == pytest.approx(0, abs=1e-9)
+
+    table = exploitability.policy_from_strategy(
+        game_tree, exploitability.strategy_from_policy(game_tree, nash)
+    )
+    assert len(table) == len(game_tree.decision_nodes) * len(game_tree.hands)
+    assert exploitability.exploitability(config, table) == pytest.approx(0, abs=1e-9)
+
+
+def test_best_response() -> None:
+    config = clubs.configs.KUHN_THREE_PLAYER
+
+    def always_call(info_set: exploitability.InfoSet) -> Sequence[float]:
+        return (
+            [0] * (info_set.actions[0] == -1)
+            + [1]
+            + [0] * (len(info_set.actions) - 1 - (info_set.actions[0] == -1))
+        )
+
+    value, table = exploitability.best_response(config, always_call, 0)
+    assert value > 0
+    assert all(key[0] == 0 for key in table)
+    assert all(sorted(probs)[-1] == 1 for probs in table.values())
+
+    # best response table against the same policy achieves its value
+    def respond(info_set: exploitability.InfoSet) -> Sequence[float]:
+        if info_set.player == 0:
+            return table[info_set.key]
+        return always_call(info_set)
+
+    game_tree = exploitability.get_game_tree(config)
+    strategy = exploitability.strategy_from_policy(game_tree, respond)
+    assert game_tree.expected_payouts(strategy)[0] == pytest.approx(value)
+
+
+def test_leduc_cfr() -> None:
+    config = clubs.configs.LEDUC_TWO_PLAYER
+    game_tree = exploitability.get_game_tree(config)
+    solver = tree.CFRSolver(game_tree).iterate(200)
+    table = exploitability.policy_from_strategy(game_tree, solver.average_strategy())
+    value = exploitability.exploitability(config, table)
+    assert value == pytest.approx(game_tree.exploitability(solver.average_strategy()))
+    assert value < exploitability.exploitability(config, {})
+
+
+def test_invalid_policy() -> None:
+    with pytest.raises(error.InvalidPolicyError):
+        exploitability.exploitability(clubs.configs.KUHN_TWO_PLAYER, lambda _: [1])
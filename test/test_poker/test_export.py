@@ -0,0 +1,81 @@
+import pathlib
+import random
+import sys
+
+import numpy as np
+import pytest
+
+import clubs
+from clubs import error
+from clubs.poker import export
+
+
+def test_export(tmp_path: pathlib.Path) -> None:
+    random.seed(42)
+    config = clubs.configs.LIMIT_HOLDEM_SIX_PLAYER
+    dealer = clubs.Dealer(**config)
+    directory = str(tmp_path / "export")
+
+    payouts = []
+    histories = []
+    with export.ColumnarExporter(directory, 6, chunk_size=40).attach(dealer):
+        for _ in range(100):
+            dealer.reset(reset_stacks=True)
+            while True:
+                _, payout, done = dealer.step(random.choice([-1, 0, 2, 4]))
+                if all(done):
+                    break
+            payouts.append(payout)
+            histories.append(list(dealer.history))
+
+    chunks = list(export.read_chunks(directory))
+    assert [len(hands["hand_id"]) for hands, _ in chunks] == [40, 40, 20]
+
+    hands = export.load(directory)
+    assert hands["payouts"].shape == (100, 6)
+    assert np.array_equal(hands["hand_id"], np.arange(100))
+    assert np.array_equal(hands["payouts"], np.array(payouts))
+    assert np.all(hands["stacks"] == 200)
+    assert np.all(hands["payouts"].sum(axis=1) == 0)
+    # hands ending before the river have no hand ranks
+    showdown = np.all(hands["hand_ranks"] > 0, axis=1)
+    assert showdown.any()
+    assert np.all(hands["hand_ranks"][~showdown] == -1)
+
+    hand_id = 0
+    for hand_columns, actions in chunks:
+        for start, num_actions in zip(
+            hand_columns["action_start"], hand_columns["num_actions"]
+        ):
+            rows = slice(start, start + num_actions)
+            assert np.all(actions["hand_id"][rows] == hand_id)
+            history = list(
+                zip(
+                    actions["player"][rows].tolist(),
+                    actions["bet"][rows].tolist(),
+                    actions["fold"][rows].tolist(),
+                )
+            )
+            assert history == histories[hand_id]
+            assert np.all(np.diff(actions["street"][rows]) >= 0)
+            hand_id += 1
+
+    # appended chunks continue the hand ids
+    dealer.listeners = []
+    with export.ColumnarExporter(directory, 6).attach(dealer):
+        for _ in range(10):
+            dealer.reset(reset_stacks=True)
+            while not all(dealer.step(0)[2]):
+                pass
+    assert np.array_equal(export.load(directory)["hand_id"], np.arange(110))
+
+
+def test_errors(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    with pytest.raises(error.InvalidFormatError):
+        export.ColumnarExporter(str(tmp_path), 2, file_format="csv")
+    with pytest.raises(error.InvalidConfigError):
+        exporter = export.ColumnarExporter(str(tmp_path), 2)
+        exporter.attach(clubs.Dealer(**clubs.configs.KUHN_THREE_PLAYER))
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(error.MissingImportsError):
+        export.ColumnarExporter(str(tmp_path), 2, file_format="parquet")
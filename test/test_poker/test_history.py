@@ -0,0 +1,137 @@
+import io
+import pathlib
+import random
+import sys
+from typing import List, Tuple
+
+import pytest
+
+import clubs
+from clubs import error
+from clubs.poker import history
+
+
+Hand = Tuple[
+    int,
+    Tuple[int, ...],
+    Tuple[bool, ...],
+    List[List[str]],
+    List[str],
+    Tuple[Tuple[int, int, bool], ...],
+    Tuple[float, ...],
+]
+
+
+def play(
+    dealer: clubs.Dealer, writer: history.HistoryWriter, num_hands: int
+) -> List[Hand]:
+    writer.attach(dealer)
+    hands: List[Hand] = []
+    for hand_idx in range(num_hands):
+        # every other hand one seat sits out
+        for seat in range(dealer.num_players):
+            dealer.sit(seat)
+        if hand_idx % 2:
+            dealer.sit_out(hand_idx % dealer.num_players)
+        dealer.reset(reset_stacks=True)
+        stacks = tuple(
+            stack + commit for stack, commit in zip(dealer.stacks, dealer.pot_commits)
+        )
+        button = dealer.button
+        while True:
+            bet = random.choice([-1, 0, *dealer._bet_sizes()])
+            _, payouts, done = dealer.step(bet)
+            if all(done):
+                break
+        hands.append(
+            (
+                button,
+                stacks,
+                tuple(dealer.seated),
+                [[str(card) for card in hand] for hand in dealer.hole_cards],
+                [str(card) for card in dealer.community_cards],
+                tuple(dealer.history),
+                tuple(payouts),
+            )
+        )
+    return hands
+
+
+@pytest.mark.parametrize("compression", [None, "zlib", "lzma"])
+def test_round_trip(compression: str) -> None:
+    random.seed(42)
+    config = clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER
+    dealer = clubs.Dealer(**config)
+    file = io.BytesIO()
+
+    config_id = history.config_id(config)
+    writer = history.HistoryWriter(
+        file, config_id=config_id, compression=compression, block_size=512
+    )
+    hands = play(dealer, writer, 50)
+    writer.close()
+
+    file.seek(0)
+    records = list(history.read_history(file))
+    assert len(records) == len(hands)
+    for idx, (record, hand) in enumerate(zip(records, hands)):
+        assert record.config_id == config_id
+        assert record.hand_id == idx
+        assert record.button == hand[0]
+        assert record.stacks == hand[1]
+        assert record.seated == hand[2]
+        assert [[str(card) for card in cards] for cards in record.hole_cards] == hand[3]
+        assert [str(card) for card in record.community_cards] == hand[4]
+        assert record.actions == hand[5]
+        assert record.payouts == hand[6]
+
+
+def test_append(tmp_path: pathlib.Path) -> None:
+    random.seed(42)
+    dealer = clubs.Dealer(**clubs.configs.LEDUC_TWO_PLAYER)
+    path = tmp_path / "hands.clhh"
+
+    with history.HistoryWriter(path, compression="zlib") as writer:
+        writer.attach(dealer)
+        dealer.reset()
+        dealer.step(0)
+        dealer.step(0)
+        dealer.step(0)
+        dealer.step(0)
+    dealer.listeners = []
+    with history.HistoryWriter(path, compression=None) as writer:
+        writer.attach(dealer)
+        dealer.reset()
+        dealer.step(2)
+        dealer.step(-1)
+    # hand ids continue after the last hand of the file
+    dealer = clubs.Dealer(**clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER)
+    with history.HistoryWriter(path, block_size=1) as writer:
+        play(dealer, writer, 3)
+    dealer.listeners = []
+    with history.HistoryWriter(path) as writer:
+        play(dealer, writer, 1)
+
+    records = list(history.read_history(path))
+    assert [record.hand_id for record in records] == [0, 1, 2, 3, 4, 5]
+    assert len(records[0].actions) == 4
+    assert records[1].actions[-1][2]
+    assert records[1].payouts[records[1].actions[-1][0]] == -1
+    assert len(records[1].community_cards) == 1
+
+
+def test_card_codes() -> None:
+    assert history.encode_card(clubs.Card("2s")) == 0
+    assert history.encode_card(clubs.Card("Ac")) == 51
+    for code, card in enumerate(history.CARDS):
+        assert history.encode_card(card) == code
+
+
+def test_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    with pytest.raises(error.InvalidCompressionError):
+        history.HistoryWriter(io.BytesIO(), compression="foo")
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+    with pytest.raises(error.MissingImportsError):
+        history.HistoryWriter(io.BytesIO(), compression="zstd")
+    with pytest.raises(error.InvalidHistoryError):
+        list(history.read_history(io.BytesIO(b"JSON\x01")))
@@ -0,0 +1,96 @@
+import random
+import struct
+from typing import Dict, List, Tuple
+
+import pytest
+
+import clubs
+from clubs import error
+from clubs.poker import history, infoset
+
+
+def reference_key(
+    streets: List[Tuple[int, List[clubs.Card], List[Tuple[int, int, bool]]]],
+    player: int,
+    hole_cards: List[clubs.Card],
+) -> bytes:
+    key = b""
+    for street, cards, actions in streets:
+        key += bytes((0xFF, street, len(cards)))
+        key += bytes(history.encode_card(card) for card in cards)
+        for action_player, bet, fold in actions:
+            key += struct.pack("<BI", action_player | fold << 7, bet)
+    return key + bytes((player,)) + bytes(history.encode_card(c) for c in hole_cards)
+
+
+def test_incremental_keys() -> None:
+    random.seed(42)
+    dealer = clubs.Dealer(**clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER)
+    tracker = infoset.InfoSetTracker(dealer)
+    keys = set()
+    hashes = set()
+    for _ in range(50):
+        obs = dealer.reset(reset_stacks=True)
+        streets: List[Tuple[int, List[clubs.Card], List[Tuple[int, int, bool]]]] = [
+            (0, list(dealer.community_cards), [])
+        ]
+        while True:
+            action = dealer.action
+            key = tracker.key()
+            assert key == reference_key(streets, action, dealer.hole_cards[action])
+            assert tracker.hash() == infoset.fnv1a64(key)
+            assert tracker.hash(action) < 1 << 64
+            keys.add(key)
+            hashes.add(tracker.hash())
+
+            street = dealer.street
+            num_cards = len(dealer.community_cards)
+            bet = random.choice([-1, obs["call"], obs["min_raise"]])
+            obs, _, done = dealer.step(bet)
+            streets[-1][2].append(dealer.history[-1])
+            if dealer.street != street:
+                streets.append((dealer.street, dealer.community_cards[num_cards:], []))
+            if all(done):
+                break
+        with pytest.raises(error.InvalidSeatError):
+            tracker.key()
+    # no collisions between distinct information sets
+    assert len(hashes) == len(keys)
+
+
+def test_restore() -> None:
+    random.seed(42)
+    dealer = clubs.Dealer(**clubs.configs.LEDUC_TWO_PLAYER)
+    dealer.undo_enabled = True
+    tracker = infoset.InfoSetTracker(dealer)
+    dealer.reset()
+    # walk random lines of the hand and jump back to earlier states,
+    # keys of a state must not depend on the way it was reached
+    root = dealer.snapshot()
+    states = [root]
+    keys: Dict[Tuple[Tuple[int, int, bool], ...], Tuple[bytes, int]] = {
+        (): (tracker.key(), tracker.hash())
+    }
+    for _ in range(200):
+        if dealer.action == -1 or random.random() < 0.3:
+            dealer.restore(random.choice(states))
+        elif random.random() < 0.2 and dealer.undo_stack:
+            dealer.undo()
+        else:
+            dealer.step(random.choice([-1, 0, 2, 4]))
+            if dealer.action == -1:
+                continue
+            states.append(dealer.snapshot())
+        history = tuple(dealer.history)
+        key = (tracker.key(), tracker.hash())
+        assert keys.setdefault(history, key) == key
+    # lines reaching later streets were explored
+    assert any(len(state.community_cards) for state in states)
+
+    # states of another hand cannot be tracked
+    dealer.reset()
+    with pytest.raises(error.InvalidHistoryError):
+        dealer.restore(root)
+        tracker.key()
+    dealer.reset()
+    assert tracker.key(0) != tracker.key(1)
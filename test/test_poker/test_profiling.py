@@ -0,0 +1,49 @@
+import random
+
+import clubs
+from clubs.poker import profiling
+
+
+def _play(dealer: clubs.Dealer, num_hands: int) -> None:
+    for _ in range(num_hands):
+        obs = dealer.reset(reset_stacks=True)
+        while not all(dealer.step(obs["call"])[2]):
+            pass
+
+
+def test_profiler() -> None:
+    random.seed(42)
+    config = clubs.configs.NO_LIMIT_HOLDEM_TWO_PLAYER
+    dealer = clubs.Dealer.from_config(config)
+    other = clubs.Dealer.from_config(config)
+    assert dealer.evaluator is other.evaluator
+
+    profiler = profiling.Profiler()
+    profiler.attach(dealer)
+    _play(dealer, 10)
+    _play(other, 10)
+
+    stats = profiler.as_dict()
+    assert stats["dealer.reset"]["calls"] == 10
+    assert stats["deck.shuffle"]["calls"] == 10
+    # every hand is called down to showdown
+    assert stats["dealer.eval_round"]["calls"] == 10
+    assert stats["evaluator.evaluate"]["calls"] == 20
+    assert stats["dealer.step"]["seconds"] >= stats["dealer.eval_round"]["seconds"]
+    assert "seconds" not in stats["lookup_table.lookup"]
+    # 21 five card combinations out of 7 cards
+    assert profiler.lookups_per_evaluate == 21
+
+    text = profiler.to_prometheus(labels={"table": "1"})
+    assert "# TYPE clubs_calls_total counter" in text
+    assert 'clubs_calls_total{method="dealer.reset",table="1"} 10' in text
+
+    profiler.detach()
+    assert "step" not in dealer.__dict__
+    assert dealer.evaluator is other.evaluator
+    assert "lookup" not in dealer.evaluator.table.__dict__
+    _play(dealer, 1)
+    assert profiler.calls["dealer.reset"] == 10
+
+    profiler.clear()
+    assert not any(profiler.calls.values())
@@ -0,0 +1,93 @@
+import io
+import random
+from typing import List, Tuple
+
+import pytest
+
+import clubs
+from clubs import error
+from clubs.poker import history, replay
+
+
+Step = Tuple[int, int, int, List[int]]
+Hand = Tuple[List[Step], List[float]]
+
+
+def record_hands(
+    config: clubs.configs.PokerConfig, num_hands: int
+) -> Tuple[List[history.HandRecord], List[Hand]]:
+    random.seed(42)
+    dealer = clubs.Dealer(**config)
+    file = io.BytesIO()
+    writer = history.HistoryWriter(file).attach(dealer)
+    hands: List[Hand] = []
+    for hand_idx in range(num_hands):
+        # a seat which sits out keeps its chips and is skipped
+        if dealer.num_players > 2:
+            for seat in range(dealer.num_players):
+                dealer.sit(seat)
+            if hand_idx % 3 == 1:
+                dealer.sit_out(hand_idx % dealer.num_players)
+        obs = dealer.reset(reset_stacks=True)
+        steps: List[Step] = []
+        while True:
+            bet = random.choice([-1, 0, *dealer._bet_sizes()[:2]])
+            steps.append((obs["action"], obs["call"], obs["pot"], list(obs["stacks"])))
+            obs, payouts, done = dealer.step(bet)
+            if all(done):
+                break
+        hands.append((steps, payouts))
+    writer.close()
+    file.seek(0)
+    return list(history.read_history(file)), hands
+
+
+def summarize(record: history.HandRecord, steps: List[replay.ReplayStep]) -> Hand:
+    return (
+        [
+            (
+                step.observation["action"],
+                step.observation["call"],
+                step.observation["pot"],
+                step.observation["stacks"],
+            )
+            for step in steps
+        ],
+        steps[-1].payouts,
+    )
+
+
+def test_replay_hand() -> None:
+    config = clubs.configs.LIMIT_HOLDEM_SIX_PLAYER
+    records, hands = record_hands(config, 20)
+    dealer = clubs.Dealer.from_config(config)
+    for record, hand in zip(records, hands):
+        steps = list(replay.replay_hand(record, config, dealer))
+        assert summarize(record, steps) == hand
+        assert all(steps[-1].done)
+        assert [step.action for step in steps] == list(record.actions)
+
+
+def test_replay_hands() -> None:
+    config = clubs.configs.LIMIT_HOLDEM_SIX_PLAYER
+    records, hands = record_hands(config, 50)
+    serial = list(replay.replay_hands(records, config, transform=summarize))
+    parallel = list(
+        replay.replay_hands(
+            records, config, transform=summarize, processes=2, chunk_size=8
+        )
+    )
+    assert serial == hands
+    assert parallel == hands
+
+
+def test_replay_mismatch() -> None:
+    config = clubs.configs.LEDUC_TWO_PLAYER
+    records, _ = record_hands(config, 1)
+    record = records[0]
+    actions = ((1 - record.actions[0][0],) + record.actions[0][1:],)
+    with pytest.raises(error.ReplayMismatchError):
+        list(replay.replay_hand(record._replace(actions=actions), config))
+    payouts = tuple(-payout for payout in record.payouts)
+    with pytest.raises(error.ReplayMismatchError):
+        list(replay.replay_hand(record._replace(payouts=payouts), config))
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import random
+from typing import List
+
+import pytest
+
+import clubs
+from clubs import error
+from clubs.poker import engine, service
+
+
+def caller(obs: engine.ObservationDict) -> float:
+    assert isinstance(obs["hole_cards"][0], str)
+    return float(obs["call"])
+
+
+def raiser(obs: engine.ObservationDict) -> float:
+    return float(obs["min_raise"])
+
+
+async def _silent_agent(port: int, table: str, seat: int) -> None:
+    # joins a seat and never acts
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(json.dumps({"type": "join", "table": table, "seat": seat}).encode())
+    writer.write(b"\n")
+    await writer.drain()
+    while json.loads(await reader.readline())["type"] != "closed":
+        pass
+    writer.close()
+
+
+async def _late_agent(port: int, table: str, seat: int) -> List[str]:
+    # answers the first observation after the action timeout and calls
+    # afterwards, returns the request types of all errors received
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(json.dumps({"type": "join", "table": table, "seat": seat}).encode())
+    writer.write(b"\n")
+    await writer.drain()
+    late = True
+    errors: List[str] = []
+    message = json.loads(await reader.readline())
+    while message["type"] != "closed":
+        if message["type"] == "error":
+            errors.append(message["request"])
+        elif message["type"] == "observation":
+            if late:
+                await asyncio.sleep(0.2)
+                late = False
+            action = {
+                "type": "action",
+                "table": table,
+                "seat": seat,
+                "id": message["id"],
+                "bet": message["observation"]["call"],
+            }
+            writer.write(json.dumps(action).encode() + b"\n")
+            await writer.drain()
+        message = json.loads(await reader.readline())
+    # errors of earlier messages arrive before the error of the probe
+    writer.write(json.dumps({"type": "join", "table": "foo", "seat": 0}).encode())
+    writer.write(b"\n")
+    await writer.drain()
+    while not errors or errors[-1] != "join":
+        message = json.loads(await reader.readline())
+        if message["type"] == "error":
+            errors.append(message["request"])
+    writer.close()
+    return errors
+
+
+async def _protocol_errors(port: int) -> List[str]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    messages = [
+        {"type": "join", "table": "foo", "seat": 0},
+        {"type": "join", "table": "0", "seat": 5},
+        {"type": "action", "table": "0", "seat": 0, "id": 1, "bet": 0},
+        {"type": "action", "table": "0", "seat": 0, "bet": 0},
+    ]
+    errors = []
+    for message in messages:
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        errors.append(json.loads(await reader.readline())["message"])
+    writer.close()
+    return errors
+
+
+def test_service() -> None:
+    async def main() -> None:
+        dealer_service = service.DealerService(action_timeout=0.05)
+        config = clubs.configs.LEDUC_TWO_PLAYER
+        for table_id in range(3):
+            dealer_service.add_table(str(table_id), config, num_hands=5)
+        dealer_service.add_table("silent", config, num_hands=2)
+        dealer_service.add_table("late", config, num_hands=3)
+        with pytest.raises(error.InvalidConfigError):
+            dealer_service.add_table("0", config)
+        await dealer_service.start()
+        port = dealer_service.port
+
+        errors = await _protocol_errors(port)
+        assert "unknown table" in errors[0]
+        assert "out of range" in errors[1]
+        assert "not acting" in errors[2]
+        assert "id" in errors[3]
+
+        results = await asyncio.gather(
+            service.run_agent(
+                caller,
+                [(str(table_id), 0) for table_id in range(3)] + [("foo", 0)],
+                port=port,
+            ),
+            service.run_agent(
+                raiser,
+                [(str(table_id), 1) for table_id in range(3)]
+                + [("silent", 0), ("late", 1)],
+                port=port,
+            ),
+            _silent_agent(port, "silent", 1),
+            _late_agent(port, "late", 0),
+            dealer_service.wait_closed(),
+        )
+        await dealer_service.close()
+
+        callers, raisers, _, late_errors, _ = results
+        for table_id in range(3):
+            seat_payouts = zip(callers[(str(table_id), 0)], raisers[(str(table_id), 1)])
+            assert [sum(payouts) for payouts in seat_payouts] == [0] * 5
+        # the silent seat checks or folds every action after a timeout
+        assert len(raisers[("silent", 0)]) == 2
+        assert all(payout > 0 for payout in raisers[("silent", 0)])
+        assert dealer_service.num_timeouts >= 2
+        # seats which cannot be joined are skipped
+        assert callers[("foo", 0)] == []
+        # the late answer is ignored instead of acting on a later observation
+        assert late_errors == ["join"]
+        assert len(raisers[("late", 1)]) == 3
+
+    asyncio.run(main())
+
+
+def test_bust() -> None:
+    def shover(obs: engine.ObservationDict) -> float:
+        return float(obs["max_raise"])
+
+    async def main() -> None:
+        random.seed(42)
+        dealer_service = service.DealerService(action_timeout=1)
+        dealer = dealer_service.add_table(
+            "0",
+            clubs.configs.NO_LIMIT_HOLDEM_TWO_PLAYER,
+            num_hands=50,
+            reset_stacks=False,
+        )
+        await dealer_service.start()
+        port = dealer_service.port
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                service.run_agent(shover, [("0", 0)], port=port),
+                service.run_agent(shover, [("0", 1)], port=port),
+                dealer_service.wait_closed(),
+            ),
+            5,
+        )
+        await dealer_service.close()
+
+        # the table closes after the first player busts
+        assert sorted(dealer.stacks)[0] == 0
+        assert len(results[0][("0", 0)]) == dealer_service.tables["0"].num_played
+        assert dealer_service.tables["0"].num_played < 50
+
+    asyncio.run(main())
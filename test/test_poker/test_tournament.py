@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+import clubs
+from clubs import error
+from clubs.poker import engine, tournament
+
+SCHEDULE = [
+    tournament.BlindLevel([1, 2, 0, 0, 0, 0], 0, 20),
+    tournament.BlindLevel([5, 10, 0, 0, 0, 0], 1, 20),
+    tournament.BlindLevel([25, 50, 0, 0, 0, 0], 5, 20),
+]
+
+
+def caller(obs: engine.ObservationDict) -> float:
+    return obs["call"]
+
+
+def shover(obs: engine.ObservationDict) -> float:
+    if obs["hole_cards"][0].rank in "AKQJT":
+        return obs["max_raise"]
+    return obs["call"] if not obs["call"] else -1
+
+
+def test_balance_tables() -> None:
+    tables = [tournament.Table(6) for _ in range(3)]
+    for player in range(6):
+        tables[0].sit(player, 100)
+    for player in range(6, 8):
+        tables[1].sit(player, 100)
+    tables[2].sit(8, 100)
+
+    tables = tournament.balance_tables(tables)
+    assert len(tables) == 2
+    assert sorted(len(table.players) for table in tables) == [4, 5]
+    assert sorted(player for table in tables for player in table.players) == list(
+        range(9)
+    )
+    assert sum(sum(table.stacks) for table in tables) == 900
+
+    with pytest.raises(error.InvalidConfigError):
+        tables[0].stand(tables[0].seats.index(None))
+
+
+def test_tournament() -> None:
+    config = clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER
+    agents = [caller, shover] * 7
+    game = tournament.Tournament(config, agents, SCHEDULE, seed=1)
+    chips = len(agents) * config["start_stack"]
+    # play round by round to check chips are never lost
+    tournament._init_worker(config, agents)
+    while game.num_players > 1:
+        tasks = game._tasks()
+        # tables are dealt from their own seeds, the global random state
+        # is left untouched
+        state = random.getstate()
+        game._update(tasks, [tournament._play_table(task) for task in tasks])
+        assert random.getstate() == state
+        assert sum(sum(table.stacks) for table in game.tables) == chips
+        sizes = [len(table.players) for table in game.tables]
+        assert max(sizes) - min(sizes) <= 1
+
+    result = tournament.Tournament(config, agents, SCHEDULE, seed=1).run()
+    assert sorted(result.places) == list(range(len(agents)))
+    assert result.places[0] == game.tables[0].players[0]
+    assert result.num_hands == game.num_hands
+
+    # results do not depend on the number of processes
+    parallel = tournament.Tournament(config, agents, SCHEDULE, processes=2, seed=1)
+    assert parallel.run() == result
+
+
+def test_invalid_schedule() -> None:
+    config = clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER
+    with pytest.raises(error.InvalidConfigError):
+        tournament.Tournament(config, [caller] * 8, [])
+    with pytest.raises(error.InvalidConfigError):
+        tournament.Tournament(
+            config, [caller] * 8, [tournament.BlindLevel([1, 2], 0, 10)]
+        )
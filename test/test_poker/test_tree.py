@@ -0,0 +1,120 @@
+import itertools
+from typing import List
+
+import numpy as np
+import pytest
+
+import clubs
+from clubs import error
+from clubs.poker import tree
+
+
+def test_kuhn_tree() -> None:
+    game_tree = tree.GameTree(clubs.configs.KUHN_TWO_PLAYER)
+
+    assert game_tree.num_nodes == 9
+    assert len(game_tree.decision_nodes) == 4
+    assert len(game_tree.terminal_nodes) == 5
+    assert len(game_tree.deals) == 6
+    assert len(game_tree.hands) == 3
+
+    # children are contiguous and point back to their parent
+    for node in range(game_tree.num_nodes):
+        start = game_tree.child_start[node]
+        for child in range(start, start + game_tree.num_children[node]):
+            assert game_tree.parent[child] == node
+
+    # check or bet at root, fold or call after bet
+    root_children = list(range(game_tree.child_start[0], game_tree.child_start[0] + 2))
+    assert list(game_tree.bet[root_children]) == [0, 1]
+    assert game_tree.num_actions == 2
+
+
+def test_kuhn_values() -> None:
+    game_tree = tree.GameTree(clubs.configs.KUHN_TWO_PLAYER)
+
+    uniform = game_tree.uniform_strategy()
+    assert game_tree.exploitability(uniform) == pytest.approx(11 / 24)
+
+    solver = tree.CFRSolver(game_tree).iterate(1000)
+    strategy = solver.average_strategy()
+    payouts = game_tree.expected_payouts(strategy)
+    assert payouts[0] == pytest.approx(-1 / 18, abs=1e-3)
+    assert payouts.sum() == pytest.approx(0)
+    assert game_tree.exploitability(strategy) < 0.01
+
+
+def test_best_response() -> None:
+    game_tree = tree.GameTree(clubs.configs.KUHN_THREE_PLAYER)
+
+    uniform = game_tree.uniform_strategy()
+    expected = game_tree.expected_payouts(uniform)
+    for player in range(3):
+        value, best = game_tree.best_response(uniform, player)
+        assert value >= expected[player]
+        # deterministic strategy for own decisions
+        rows = game_tree.player[game_tree.decision_nodes] == player
+        assert np.all(best[rows].sum(axis=-1) == 1)
+        # best response is at least as good as the strategy itself
+        strategy = uniform.copy()
+        strategy[rows] = best[rows]
+        assert game_tree.expected_payouts(strategy)[player] == pytest.approx(value)
+
+
+def test_leduc_matches_dealer() -> None:
+    config = clubs.configs.LEDUC_TWO_PLAYER
+    game_tree = tree.GameTree(config)
+    dealer = clubs.Dealer(**config)
+
+    def walk() -> List[float]:
+        state = dealer.snapshot()
+        game_tree.dealer = dealer
+        actions = game_tree._actions()
+        values = [0.0, 0.0]
+        for action in actions:
+            dealer.restore(state)
+            _, payouts, done = dealer.step(action)
+            if not all(done):
+                payouts = walk()
+            values = [
+                value + payout / len(actions) for value, payout in zip(values, payouts)
+            ]
+        return values
+
+    cards = dealer.deck.full_deck
+    total = [0.0, 0.0]
+    permutations = list(itertools.permutations(range(len(cards)), 3))
+    for permutation in permutations:
+        dealer.deck.trick([cards[idx] for idx in permutation])
+        dealer.reset(reset_button=True, reset_stacks=True)
+        total = [value + payout for value, payout in zip(total, walk())]
+    expected = [value / len(permutations) for value in total]
+
+    uniform = game_tree.uniform_strategy()
+    assert np.allclose(game_tree.expected_payouts(uniform), expected)
+
+
+def test_raise_fractions() -> None:
+    config = clubs.configs.KUHN_TWO_PLAYER.copy()
+    config["blinds"] = [1, 2]
+    config["antes"] = 0
+    config["raise_sizes"] = "inf"
+    config["num_raises"] = [2]
+    config["start_stack"] = 20
+
+    game_tree = tree.GameTree(config)
+    fraction_tree = tree.GameTree(config, raise_fractions=[1])
+
+    assert fraction_tree.num_actions == game_tree.num_actions + 1
+    assert fraction_tree.num_nodes > game_tree.num_nodes
+    # pot sized raise for small blind, call 1 and raise 4 into pot of 4
+    root_start = fraction_tree.child_start[0]
+    root_bets = fraction_tree.bet[root_start : root_start + 4]
+    assert list(root_bets) == [0, 1, 3, 5]
+
+
+def test_size_error() -> None:
+    with pytest.raises(error.GameTreeSizeError):
+        tree.GameTree(clubs.configs.NO_LIMIT_HOLDEM_TWO_PLAYER, max_deals=100)
+    with pytest.raises(error.GameTreeSizeError):
+        tree.GameTree(clubs.configs.LEDUC_TWO_PLAYER, max_nodes=100)
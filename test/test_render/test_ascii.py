@@ -146,3 +146,19 @@ def test_render() -> None:
     not_sub_strings = []
     assert all(sub_string in string for sub_string in sub_strings)
     assert all(sub_string not in string for sub_string in not_sub_strings)
+
+
+def test_compiled_template() -> None:
+    viewer = render.ASCIIViewer(9, 2, 5)
+    fields = {key: "" for key in viewer.KEYS + ["win"]}
+    assert viewer._format({}) == viewer.table.format(**fields)
+
+    set_fields = {
+        "p0": " 1. A\u2665,A\u2666 200",
+        "p9c": "1,000",
+        "b3": "D ",
+        "ccs": "[--,--,--,--,--]",
+        "action": "Action on Player 1",
+    }
+    fields.update(set_fields)
+    assert viewer._format(set_fields) == viewer.table.format(**fields)
@@ -1,11 +1,16 @@
+import gc
 import http.client
+import pathlib
+import sys
+import threading
 import time
 import urllib.error
 import urllib.request
-from typing import Optional
+from typing import Any, List, Optional
 
 import pytest
 
+from clubs import error
 from clubs.render import graphic
 
 
@@ -96,3 +101,106 @@ def test_port() -> None:
         time.sleep(1)
 
     assert response and response.status == 200
+
+
+def test_delta_encoder() -> None:
+    with pytest.raises(error.InvalidConfigError):
+        graphic._DeltaEncoder(0)
+
+    encoder = graphic._DeltaEncoder(3)
+    config = {"action": 0, "pot": 3, "stacks": [199, 198]}
+    assert encoder.encode(dict(config)) == {"content": config}
+    assert encoder.encode({**config, "action": 1, "pot": 5}) == {
+        "content": {"action": 1, "pot": 5},
+        "delta": True,
+    }
+    assert encoder.encode({**config, "action": 1, "pot": 5}) is None
+    # every third frame is a full config
+    keyframe = {**config, "stacks": [197, 198]}
+    assert encoder.encode(keyframe) == {"content": keyframe}
+    assert encoder.encode(keyframe) is None
+
+
+def test_server() -> None:
+    server = graphic.RenderServer()
+    viewers = [
+        graphic.GraphicViewer(2, 2, 5, server=server, table_id=str(table_id))
+        for table_id in range(2)
+    ]
+    assert viewers[1].port == server.port
+    with pytest.raises(error.InvalidConfigError):
+        graphic.GraphicViewer(2, 2, 5, server=server, table_id="0")
+
+    # tables are added asynchronously
+    url = f"http://{server.host}:{server.port}"
+    start = time.time()
+    index = ""
+    while "/table/1" not in index and time.time() - start < 10:
+        index = urllib.request.urlopen(url).read().decode()
+    assert "/table/0" in index and "/table/1" in index
+    table = urllib.request.urlopen(f"{url}/table/1").read().decode()
+    assert 'var table_id = "1";' in table
+
+    # viewers rendering from several threads share the server socket
+    def send(table_id: str) -> None:
+        for idx in range(50):
+            server.send(table_id, {"content": {"pot": idx, "padding": "x" * 100000}})
+
+    threads = [threading.Thread(target=send, args=(str(idx),)) for idx in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.add_table("2", "<svg></svg>")
+    start = time.time()
+    while "/table/2" not in index and time.time() - start < 10:
+        index = urllib.request.urlopen(url).read().decode()
+    assert "/table/2" in index
+    server.remove_table("2")
+
+    viewers[1].close()
+    assert server.tables == ["0"]
+    with pytest.raises(urllib.error.HTTPError):
+        start = time.time()
+        while time.time() - start < 10:
+            urllib.request.urlopen(f"{url}/table/1")
+            time.sleep(0.01)
+    server.close()
+
+
+def test_svg_cache(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(graphic._SVGPoker, "SVGS", {})
+    svg_poker = graphic._SVGPoker(3, 2, 5, str(tmp_path))
+    svg = svg_poker.svg
+    assert svg == str(svg_poker.base_svg)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # cached in memory, the layout is not built again
+    svg_poker = graphic._SVGPoker(3, 2, 5)
+    assert svg_poker.svg is svg
+    assert svg_poker._base is None
+
+    # cached on disk
+    monkeypatch.setattr(graphic._SVGPoker, "SVGS", {})
+    svg_poker = graphic._SVGPoker(3, 2, 5, str(tmp_path))
+    assert svg_poker.svg == svg
+    assert svg_poker._base is None
+
+    # elements are copies of the parsed template
+    table = graphic._SVGElement("table")
+    table.x = 10
+    assert graphic._SVGElement("table").x != 10
+
+
+def test_failed_init(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(self: graphic.RenderServer) -> None:
+        raise error.RenderInitializationError("unable to connect")
+
+    unraisable: List[Any] = []
+    monkeypatch.setattr(graphic.RenderServer, "_test_socket_conn", fail)
+    monkeypatch.setattr(sys, "unraisablehook", unraisable.append)
+    with pytest.raises(error.RenderInitializationError):
+        graphic.RenderServer()
+    gc.collect()
+    # closing the half initialized server in __del__ does not fail
+    assert not unraisable
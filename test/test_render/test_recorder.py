@@ -0,0 +1,72 @@
+import json
+import pathlib
+import random
+
+import pytest
+
+import clubs
+from clubs import error
+from clubs.render import graphic, recorder
+
+
+def test_recorder(tmp_path: pathlib.Path) -> None:
+    random.seed(42)
+    dealer = clubs.Dealer(**clubs.configs.NO_LIMIT_HOLDEM_SIX_PLAYER)
+    frame_recorder = recorder.FrameRecorder(6, 2, 5).attach(dealer)
+    # only hands which are played to showdown
+    showdown_recorder = recorder.FrameRecorder(
+        6, 2, 5, keep_hand=lambda config: len(config["community_cards"]) == 5
+    ).attach(dealer)
+
+    configs = []
+    num_showdowns = 0
+    for _ in range(20):
+        obs = dealer.reset(reset_stacks=True)
+        hand = [graphic._jsonify(dealer._render_config())]
+        while True:
+            bet = random.choice([obs["call"], obs["min_raise"], -1])
+            obs, _, done = dealer.step(bet)
+            hand.append(graphic._jsonify(dealer._render_config()))
+            if all(done):
+                break
+        configs.append(hand)
+        num_showdowns += len(dealer.community_cards) == 5
+
+    path = str(tmp_path / "replay.json.gz")
+    frame_recorder.save(path)
+    replay = recorder.load(path)
+    assert replay["num_players"] == 6
+    assert len(replay["hands"]) == 20
+    assert len(showdown_recorder.replay["hands"]) < num_showdowns
+    showdown_recorder.save(str(tmp_path / "showdowns.json"))
+    assert len(showdown_recorder.hands) == num_showdowns
+
+    # applying the deltas restores every frame, unchanged frames are
+    # not recorded
+    for frames, hand in zip(replay["hands"], configs):
+        # json stores tuples as lists
+        hand = json.loads(json.dumps(hand))
+        assert frames[0] == hand[0]
+        state = dict(frames[0])
+        restored = [dict(state)]
+        for frame in frames[1:]:
+            state.update(frame)
+            restored.append(dict(state))
+        expected = [hand[0]]
+        for config in hand[1:]:
+            if config != expected[-1]:
+                expected.append(config)
+        assert restored == expected
+
+    html_path = str(tmp_path / "replay.html")
+    recorder.export_html(replay, html_path)
+    with open(html_path, encoding="utf8") as file:
+        html = file.read()
+    assert 'id="card-community-0"' in html
+    assert 'var replay = {"format":"clubs-replay"' in html
+    assert "$" not in html.split("var replay")[0]
+
+    with open(str(tmp_path / "other.json"), "w") as file:
+        json.dump({"format": "other"}, file)
+    with pytest.raises(error.InvalidFormatError):
+        recorder.load(str(tmp_path / "other.json"))
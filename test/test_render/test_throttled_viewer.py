@@ -0,0 +1,87 @@
+import subprocess
+import sys
+import time
+from typing import List
+
+import pytest
+
+import clubs
+from clubs import error, render
+
+
+class _RecordingViewer(render.PokerViewer):
+    def __init__(self) -> None:
+        super().__init__(2, 2, 5)
+        self.configs: List[render.viewer.RenderConfig] = []
+        self.closed = False
+
+    def render(self, config: render.viewer.RenderConfig, sleep: float = 0) -> None:
+        self.configs.append(config)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_throttled_viewer() -> None:
+    dealer = clubs.Dealer(**clubs.configs.NO_LIMIT_HOLDEM_TWO_PLAYER)
+    recording = _RecordingViewer()
+    viewer = render.ThrottledViewer(recording, fps=20)
+
+    start = time.perf_counter()
+    num_frames = 0
+    for _ in range(200):
+        obs = dealer.reset(reset_stacks=True)
+        while True:
+            viewer.render(dealer._render_config())
+            num_frames += 1
+            obs, _, done = dealer.step(obs["call"])
+            if all(done):
+                break
+    last_stacks = list(dealer.stacks)
+    viewer.render(dealer._render_config())
+    num_frames += 1
+    # dealer state changed after the last render is not shown
+    dealer.reset(reset_stacks=True)
+    elapsed = time.perf_counter() - start
+    viewer.close()
+
+    assert recording.closed
+    assert viewer.num_rendered == len(recording.configs)
+    assert viewer.num_rendered + viewer.num_dropped == num_frames
+    assert viewer.num_rendered <= elapsed * 20 + 2
+    assert recording.configs[-1]["stacks"] == last_stacks
+    with pytest.raises(error.ViewerClosedError):
+        viewer.render(dealer._render_config())
+
+
+def test_dealer_fps() -> None:
+    dealer = clubs.Dealer(**clubs.configs.LEDUC_TWO_PLAYER)
+    dealer.reset()
+    dealer.render("ascii", fps=10)
+    assert isinstance(dealer.viewer, render.ThrottledViewer)
+    assert isinstance(dealer.viewer.viewer, render.ASCIIViewer)
+    throttled = dealer.viewer
+    # the pending frame is rendered when the dealer's viewer is replaced
+    dealer.render("ascii")
+    dealer.viewer = None
+    assert not throttled._thread.is_alive()
+    assert throttled.num_rendered + throttled.num_dropped == 2
+    assert dealer.viewer is None
+
+
+def test_close_at_exit() -> None:
+    code = (
+        "import time\n"
+        "import clubs\n"
+        "dealer = clubs.Dealer(**clubs.configs.LEDUC_TWO_PLAYER)\n"
+        "dealer.reset()\n"
+        "dealer.render('ascii', fps=1)\n"
+        "time.sleep(0.1)\n"
+        "dealer.step(0)\n"
+        "dealer.render('ascii')\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    # the last frame is flushed before the interpreter exits
+    assert output.count("Action on Player") == 2
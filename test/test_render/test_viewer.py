@@ -1,3 +1,6 @@
+import subprocess
+import sys
+
 import pytest
 
 from clubs import poker, render
@@ -21,3 +24,19 @@ def test_base() -> None:
     viewer = render.PokerViewer(0, 0, 0)
     with pytest.raises(NotImplementedError):
         viewer.render(config, sleep=5)
+
+
+def test_lazy_import() -> None:
+    code = (
+        "import sys\n"
+        "import clubs\n"
+        "dealer = clubs.Dealer(**clubs.configs.LEDUC_TWO_PLAYER)\n"
+        "dealer.reset()\n"
+        "assert 'clubs.render' not in sys.modules\n"
+        "assert 'flask' not in sys.modules\n"
+        "str(dealer)\n"
+        "assert 'clubs.render' in sys.modules\n"
+        "assert clubs.render.GraphicViewer\n"
+        "assert 'flask' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)